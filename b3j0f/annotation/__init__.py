@@ -31,7 +31,7 @@ __all__ = [
     'Annotation',
     'Synchronized', 'SynchronizedClass',
     'Asynchronous', 'TimeOut', 'Wait', 'Observable',
-    'Types', 'types', 'Curried', 'curried', 'Retries',
+    'Types', 'types', 'Curried', 'curried', 'Retries', 'Instrument',
     'Condition', 'MaxCount', 'Target',
     'Interceptor',
     'PrivateInterceptor', 'CallInterceptor', 'PrivateCallInterceptor',
@@ -44,7 +44,7 @@ from .core import Annotation
 from .async import (
     Synchronized, SynchronizedClass, Asynchronous, TimeOut, Wait, Observable
 )
-from .call import Types, types, Curried, curried, Retries
+from .call import Types, types, Curried, curried, Retries, Instrument
 from .check import Condition, MaxCount, Target
 from .interception import (
     Interceptor, PrivateInterceptor, CallInterceptor, PrivateCallInterceptor
@@ -0,0 +1,1988 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Bounded caches with constant time eviction policies and cache keys used by
+Memoize.
+
+In-process caches are mappings of keys to values whose entries are nodes of
+circular doubly linked lists. Lookups, insertions, updates and evictions cost
+O(1). They are not thread-safe.
+
+In-process caches can also be bounded by an estimated size in bytes, and be
+shrunk by a RSSWatcher when the resident set size of the process crosses a
+threshold.
+
+The SQLiteCache persists entries in a sqlite database shared by threads and
+processes, the SharedMemoryCache shares entries between processes of one host
+in shared memory, and a TieredCache puts an in-process cache in front of them.
+"""
+
+from __future__ import absolute_import
+
+from sys import maxsize, getsizeof
+
+from time import time, sleep
+
+from os import getpid
+
+from mmap import PAGESIZE
+
+from inspect import isclass
+
+from weakref import WeakKeyDictionary
+
+from sqlite3 import connect, Binary
+
+from struct import Struct
+
+from binascii import hexlify
+
+from multiprocessing import Lock as ProcessLock
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+
+except ImportError:  # python < 3.8
+    SharedMemory = None
+
+try:
+    from threading import local, Lock, Thread
+
+except ImportError:
+    from dummy_threading import local, Lock, Thread
+
+from six import binary_type, text_type, integer_types, PY2
+from six.moves import cPickle as pickle
+
+try:
+    from collections.abc import Mapping, Sequence, Set
+
+except ImportError:  # python < 3.3
+    from collections import Mapping, Sequence, Set
+
+try:
+    _BUFFERS = bytearray, memoryview
+
+except NameError:  # python < 2.7
+    _BUFFERS = bytearray,
+
+try:
+    from psutil import Process
+
+except ImportError:
+    Process = None
+
+try:
+    from hashlib import blake2b
+
+except ImportError:  # python < 3.6
+    from hashlib import sha1 as _hasher
+
+else:
+    def _hasher():
+        """Get a new buffer hasher."""
+
+        return blake2b(digest_size=16)
+
+__all__ = [
+    'Cache', 'LRUCache', 'LFUCache', 'TTLCache', 'POLICIES',
+    'makekey', 'freeze', 'digest', 'stabledigest',
+    'SQLiteCache', 'TieredCache', 'PickleSerializer', 'getlock', 'sizeof',
+    'rss', 'RSSWatcher', 'SharedMemoryCache'
+]
+
+PREV, NEXT, KEY, VALUE, DATA, SIZE = range(6)  #: node item indexes.
+
+_MARKER = object()  #: marker of missing values.
+
+#: lock of sqlite database setups by connections of the process.
+_SETUPLOCK = Lock()
+
+#: errors raised by keys or values which can not be serialized.
+_UNSERIALIZABLE = (pickle.PicklingError, TypeError, AttributeError)
+
+
+class _NoLock(object):
+    """Lock which does nothing for thread-safe caches."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        pass
+
+
+def sizeof(value):
+    """Estimate the memory footprint in bytes of a value and of the objects it
+    contains (items of containers and attributes of objects), each counted
+    once.
+
+    :rtype: int
+    """
+
+    result = 0
+
+    seen = set()
+    values = [value]
+
+    while values:
+        value = values.pop()
+
+        if id(value) in seen:
+            continue
+
+        seen.add(id(value))
+        result += getsizeof(value, 0)
+
+        if isinstance(value, (binary_type, text_type)):
+            continue
+
+        if isinstance(value, Mapping):
+            values.extend(value.keys())
+            values.extend(value.values())
+
+        elif isinstance(value, (tuple, list, Set, frozenset)):
+            values.extend(value)
+
+        elif hasattr(value, '__dict__') and not isclass(value):
+            values.append(value.__dict__)
+
+    return result
+
+
+_sizeof = sizeof  #: default value size estimator of caches.
+
+
+def rss():
+    """Get the resident set size in bytes of the current process from procfs,
+    otherwise from psutil if installed.
+
+    :return: resident set size, or None if it can not be measured.
+    :rtype: int
+    """
+
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGESIZE
+
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    if Process is not None:
+        return Process().memory_info().rss
+
+
+def getlock(cache):
+    """Get a lock which protects accesses to input cache.
+
+    :return: a new lock if cache is not thread-safe, otherwise a lock which
+        does nothing.
+    """
+
+    return _NoLock() if cache.threadsafe else Lock()
+
+
+class _Frozen(object):
+    """Tag of frozen values which can not be confused with parameters."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+
+        return 'frozen'
+
+
+_FROZEN = _Frozen()  #: frozen values tag.
+
+
+def makekey(args, kwargs):
+    """Get a cache key which equals keys of equal parameters only.
+
+    The key is the full tuple of parameters (keywords are sorted by name), and
+    unhashable parameters are frozen (see freeze). Contrary to a hash, it is
+    safe from collisions.
+
+    :param tuple args: called vargs.
+    :param dict kwargs: called keywords.
+    :rtype: tuple
+    """
+
+    result = tuple(args), (tuple(sorted(kwargs.items())) if kwargs else ())
+
+    try:
+        hash(result)
+
+    except (TypeError, ValueError):  # unhashable (or writable buffer) values
+        result = freeze(result)
+
+    return result
+
+
+def freeze(value):
+    """Get a hashable value which equals frozen values of equal values only.
+
+    Unhashable values are converted into tagged tuples:
+
+    - sequences: frozen items.
+    - sets and mappings: frozensets of frozen items.
+    - numpy arrays: dtype, shape and a digest of their data (or their frozen
+      items if they contain objects).
+    - buffers (bytearray, memoryview): format, shape and a digest of their
+      bytes.
+
+    :param value: value to freeze.
+    :raises: TypeError if value can not be frozen.
+    """
+
+    try:
+        hash(value)
+
+    except (TypeError, ValueError):
+        pass
+
+    else:
+        return value
+
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+
+    cls = type(value)
+
+    dtype = getattr(value, 'dtype', None)
+
+    if dtype is not None and hasattr(value, '__array_interface__'):
+        if dtype.hasobject:  # data contains pointers
+            result = _FROZEN, cls, value.shape, freeze(value.tolist())
+
+        else:
+            result = _FROZEN, cls, dtype.str, value.shape, digest(value)
+
+    elif isinstance(value, _BUFFERS):
+        result = (
+            _FROZEN, cls, getattr(value, 'format', None),
+            getattr(value, 'shape', None), digest(value)
+        )
+
+    elif isinstance(value, Mapping):
+        result = _FROZEN, cls, frozenset(
+            (freeze(key), freeze(item)) for key, item in value.items()
+        )
+
+    elif isinstance(value, Set):
+        result = _FROZEN, cls, frozenset(freeze(item) for item in value)
+
+    elif isinstance(value, Sequence):
+        result = _FROZEN, cls, tuple(freeze(item) for item in value)
+
+    else:
+        raise TypeError('Impossible to freeze {0}.'.format(value))
+
+    return result
+
+
+def digest(value):
+    """Get the digest of a buffer.
+
+    C-contiguous buffers are hashed without copy.
+
+    :param value: object which supports the buffer protocol.
+    :rtype: bytes
+    """
+
+    hasher = _hasher()
+
+    try:
+        hasher.update(value)
+
+    except (ValueError, BufferError, TypeError):  # not C-contiguous buffer
+        hasher = _hasher()
+        hasher.update(value.tobytes())
+
+    return hasher.digest()
+
+
+def _root():
+    """Create the root node of an empty circular doubly linked list."""
+
+    result = [None] * 5
+    result[PREV] = result[NEXT] = result
+
+    return result
+
+
+def _append(root, node):
+    """Link node at the end of a circular doubly linked list."""
+
+    last = root[PREV]
+    node[PREV], node[NEXT] = last, root
+    last[NEXT] = root[PREV] = node
+
+
+def _unlink(node):
+    """Unlink node from its circular doubly linked list."""
+
+    prev, _next = node[PREV], node[NEXT]
+    prev[NEXT], _next[PREV] = _next, prev
+
+
+def stabledigest(key):
+    """Get a digest of a (frozen) cache key which is the same in all
+    processes.
+
+    Tuples, frozensets, classes, strings, numbers and None are encoded
+    canonically, other objects with pickle.
+
+    Keys which are equal (such as (1,), (1.,) and (True,)) are the same key of
+    in-process caches, and have the same digest.
+
+    :rtype: bytes
+    """
+
+    hasher = _hasher()
+    _feed(hasher, key)
+
+    return hasher.digest()
+
+
+def _feed(hasher, value):
+    """Feed a hasher with the canonical encoding of value."""
+
+    if isinstance(value, tuple):
+        hasher.update(b'(')
+
+        for item in value:
+            _feed(hasher, item)
+
+        hasher.update(b')')
+
+    elif isinstance(value, frozenset):  # ordered by item digests
+        hasher.update(b'{')
+        hasher.update(b''.join(sorted(stabledigest(item) for item in value)))
+        hasher.update(b'}')
+
+    elif value is _FROZEN:
+        hasher.update(b'!')
+
+    else:
+        if PY2 and isinstance(value, binary_type):
+            try:  # equals its unicode value
+                value = value.decode('ascii')
+
+            except UnicodeDecodeError:
+                pass
+
+        if isinstance(value, binary_type):
+            data = b'b' + value
+
+        elif isinstance(value, text_type):
+            data = b'u' + value.encode('utf-8')
+
+        elif isclass(value):
+            data = 'c{0}.{1}'.format(
+                value.__module__, value.__name__
+            ).encode('utf-8')
+
+        elif value is None:
+            data = b'n'
+
+        elif isinstance(value, integer_types + (float, complex)):
+            data = _number(value).encode('utf-8')  # bool is an integer type
+
+        else:
+            data = b'p' + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        hasher.update('{0}:'.format(len(data)).encode('utf-8'))
+        hasher.update(data)
+
+
+def _number(value):
+    """Get the encoding of a number which equals encodings of equal numbers
+    only."""
+
+    if isinstance(value, complex) and not value.imag:
+        value = value.real
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    if isinstance(value, integer_types):
+        result = 'i{0:d}'.format(value)
+
+    else:
+        result = '{0}{1!r}'.format(type(value).__name__, value)
+
+    return result
+
+
+class PickleSerializer(object):
+    """Serialize values with the highest pickle protocol."""
+
+    @staticmethod
+    def dumps(value):
+        """Serialize a value into bytes."""
+
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(data):
+        """Deserialize bytes into a value."""
+
+        return pickle.loads(data)
+
+
+class Cache(object):
+    """Base bounded cache.
+
+    Sub-classes implement an eviction policy with node hooks _link, _unlink,
+    _touch and _victim.
+    """
+
+    threadsafe = False  #: True if the cache can be used by several threads.
+
+    #: max size attribute name.
+    MAX_SIZE = 'max_size'
+
+    #: private max size attribute name.
+    _MAX_SIZE = '_max_size'
+
+    #: removal callback attribute name.
+    ONREMOVE = 'onremove'
+
+    #: number of evicted (or expired) entries attribute name.
+    EVICTIONS = 'evictions'
+
+    #: value size estimator attribute name.
+    SIZEOF = 'sizeof'
+
+    #: estimated size in bytes of values attribute name.
+    BYTES = 'bytes'
+
+    #: private max bytes attribute name.
+    _MAX_BYTES = '_max_bytes'
+
+    #: private nodes by key attribute name.
+    _NODES = '_nodes'
+
+    # caches are weakly referenced by watchers, therefore sub-classes only
+    # declare their own slots (__weakref__ can not be declared twice)
+    __slots__ = (
+        ONREMOVE, EVICTIONS, SIZEOF, BYTES, _MAX_SIZE, _MAX_BYTES, _NODES,
+        '__weakref__'
+    )
+
+    def __init__(
+            self, max_size=maxsize, onremove=None, sizeof=None, max_bytes=None
+    ):
+        """
+        :param int max_size: maximal number of entries.
+        :param onremove: function called with the key and the value of every
+            removed entry (evicted, expired, popped, replaced or cleared).
+        :param sizeof: function which estimates the size in bytes of a value.
+            Default is the function sizeof if max_bytes is given.
+        :param int max_bytes: maximal estimated size in bytes of values.
+        """
+
+        super(Cache, self).__init__()
+
+        if sizeof is None and max_bytes is not None:
+            sizeof = _sizeof
+
+        self._nodes = {}
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self.onremove = onremove
+        self.sizeof = sizeof
+        self.evictions = 0
+        self.bytes = 0
+
+    @property
+    def max_size(self):
+        """Get the maximal number of entries."""
+
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        """Change the maximal number of entries and evict exceeding ones."""
+
+        self._max_size = value
+
+        while self._nodes and len(self._nodes) > value:
+            self._evict()
+
+    @property
+    def max_bytes(self):
+        """Get the maximal estimated size in bytes of values (None if
+        unbounded)."""
+
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        """Change the maximal estimated size in bytes of values and evict
+        exceeding entries."""
+
+        if value is not None and self.sizeof is None:
+            raise ValueError('Values are not sized (see sizeof).')
+
+        self._max_bytes = value
+
+        if value is not None:
+            while self._nodes and self.bytes > value:
+                self._evict()
+
+    def __len__(self):
+
+        return len(self._nodes)
+
+    def __contains__(self, key):
+
+        return self._node(key, False) is not None
+
+    def __iter__(self):
+
+        return iter(list(self._nodes))
+
+    def __getitem__(self, key):
+
+        node = self._node(key, True)
+
+        if node is None:
+            raise KeyError(key)
+
+        return node[VALUE]
+
+    def __setitem__(self, key, value):
+
+        self.set(key, value)
+
+    def __delitem__(self, key):
+
+        self._remove(self._nodes[key])
+
+    def get(self, key, default=None):
+        """Get the value of input key and update the eviction policy.
+
+        :param key: key to find.
+        :param default: value to return if key is not cached.
+        """
+
+        node = self._node(key, True)
+
+        return default if node is None else node[VALUE]
+
+    def set(self, key, value):
+        """Cache a value, and evict entries if the cache is full.
+
+        A value bigger than max_bytes is not cached.
+
+        :param key: value key.
+        :param value: value to cache.
+        """
+
+        node = self._nodes.get(key)
+
+        size = 0 if self.sizeof is None else self.sizeof(value)
+        max_bytes = self._max_bytes
+
+        if max_bytes is not None and size > max_bytes:
+            if node is not None:
+                self._remove(node)
+
+            return
+
+        if node is None:
+            if self._max_size <= 0:
+                return
+
+            while len(self._nodes) >= self._max_size:
+                self._evict()
+
+            if max_bytes is not None:
+                while self._nodes and self.bytes + size > max_bytes:
+                    self._evict()
+
+            node = [None, None, key, value, None, size]
+            self._nodes[key] = node
+            self._link(node)
+
+        else:
+            if self.onremove is not None:
+                self.onremove(key, node[VALUE])
+
+            node[VALUE] = value
+            self.bytes += size - node[SIZE]
+            node[SIZE] = size
+            self._touch(node)
+
+            if max_bytes is not None:
+                while self.bytes > max_bytes:
+                    self._evict()
+
+            return
+
+        self.bytes += size
+
+    def pop(self, key, default=_MARKER):
+        """Remove an entry and return its value.
+
+        :param key: key to remove.
+        :param default: value to return if key is not cached.
+        :raises: KeyError if key is not cached and default is not given.
+        """
+
+        node = self._nodes.get(key)
+
+        if node is None:
+            if default is _MARKER:
+                raise KeyError(key)
+
+            return default
+
+        self._remove(node)
+
+        return node[VALUE]
+
+    def items(self):
+        """Get a list of cached (key, value)."""
+
+        nodes = list(self._nodes.values())
+
+        return [(node[KEY], node[VALUE]) for node in nodes]
+
+    def clear(self):
+        """Remove all entries."""
+
+        for key in list(self._nodes):
+            self.pop(key)
+
+    def shrink(self, ratio=0.5):
+        """Evict a ratio of entries (at least one) chosen by the eviction
+        policy.
+
+        :param float ratio: ratio of entries to evict.
+        :return: number of evicted entries.
+        :rtype: int
+        """
+
+        count = min(len(self._nodes), max(1, int(len(self._nodes) * ratio)))
+
+        for _ in range(count):
+            self._evict()
+
+        return count
+
+    def _node(self, key, hit):
+        """Get the node of input key.
+
+        :param bool hit: if True, the access updates the eviction policy.
+        :return: key node or None if key is not cached.
+        """
+
+        node = self._nodes.get(key)
+
+        if node is not None and hit:
+            self._touch(node)
+
+        return node
+
+    def _evict(self):
+        """Remove the entry chosen by the eviction policy.
+
+        :return: removed node.
+        """
+
+        node = self._victim()
+
+        self._remove(node)
+        self.evictions += 1
+
+        return node
+
+    def _remove(self, node):
+        """Remove a node and call onremove."""
+
+        del self._nodes[node[KEY]]
+        self._unlink(node)
+        self.bytes -= node[SIZE]
+
+        if self.onremove is not None:
+            self.onremove(node[KEY], node[VALUE])
+
+    def _clear(self):
+        """Call onremove with all entries and reset bytes before a clear."""
+
+        if self.onremove is not None:
+            for key, value in self.items():
+                self.onremove(key, value)
+
+        self.bytes = 0
+
+    def _link(self, node):
+        """Link a new node."""
+
+        raise NotImplementedError()
+
+    def _unlink(self, node):
+        """Unlink a removed node."""
+
+        raise NotImplementedError()
+
+    def _touch(self, node):
+        """Update the eviction policy after a node access."""
+
+        raise NotImplementedError()
+
+    def _victim(self):
+        """Get the node to evict."""
+
+        raise NotImplementedError()
+
+
+class LRUCache(Cache):
+    """Evict least recently used entries."""
+
+    #: private root node attribute name.
+    _ROOT = '_root'
+
+    __slots__ = (_ROOT,)
+
+    def __init__(self, *args, **kwargs):
+
+        self._root = _root()
+
+        super(LRUCache, self).__init__(*args, **kwargs)
+
+    def _link(self, node):
+
+        _append(self._root, node)
+
+    def _unlink(self, node):
+
+        _unlink(node)
+
+    def _touch(self, node):
+
+        _unlink(node)
+        _append(self._root, node)
+
+    def _victim(self):
+
+        return self._root[NEXT]
+
+    def clear(self):
+
+        self._clear()
+        self._nodes.clear()
+        self._root = _root()
+
+
+class LFUCache(Cache):
+    """Evict least frequently used entries, and the least recently used ones
+    among entries used as often.
+
+    Nodes are linked in one list by use count, and these lists are linked in
+    a list of buckets ordered by use count. Therefore, the victim is found,
+    and a used node is moved to the next use count, in constant time, even
+    after removals.
+    """
+
+    #: private list of use count buckets attribute name.
+    _BUCKETS = '_buckets'
+
+    __slots__ = (_BUCKETS,)
+
+    def __init__(self, *args, **kwargs):
+
+        self._buckets = _root()
+
+        super(LFUCache, self).__init__(*args, **kwargs)
+
+    @staticmethod
+    def _bucket(prev, count):
+        """Create an empty bucket of input use count after prev bucket.
+
+        A bucket is a node whose KEY is a use count and VALUE is the root of
+        its list of nodes.
+        """
+
+        result = [None, None, count, _root()]
+        _append(prev[NEXT], result)
+
+        return result
+
+    def _link(self, node):
+
+        buckets = self._buckets
+        bucket = buckets[NEXT]
+
+        if bucket is buckets or bucket[KEY] != 1:
+            bucket = LFUCache._bucket(buckets, 1)
+
+        node[DATA] = bucket
+        _append(bucket[VALUE], node)
+
+    def _unlink(self, node):
+
+        _unlink(node)
+
+        bucket = node[DATA]
+        root = bucket[VALUE]
+
+        if root[NEXT] is root:  # empty bucket
+            _unlink(bucket)
+
+    def _touch(self, node):
+
+        bucket = node[DATA]
+        count = bucket[KEY] + 1
+        _next = bucket[NEXT]
+
+        if _next is self._buckets or _next[KEY] != count:
+            _next = LFUCache._bucket(bucket, count)
+
+        self._unlink(node)
+        node[DATA] = _next
+        _append(_next[VALUE], node)
+
+    def _victim(self):
+
+        return self._buckets[NEXT][VALUE][NEXT]
+
+    def clear(self):
+
+        self._clear()
+        self._nodes.clear()
+        self._buckets = _root()
+
+
+class TTLCache(LRUCache):
+    """Evict entries ttl seconds after they are set, and the least recently
+    used ones when the cache is full.
+
+    Nodes are linked by set time, therefore expired entries are at the head of
+    the list and are purged in amortized constant time at every set.
+    """
+
+    #: time to live attribute name.
+    TTL = 'ttl'
+
+    #: timer attribute name.
+    TIMER = 'timer'
+
+    #: private root node by set time attribute name.
+    _EXPIRATIONS = '_expirations'
+
+    __slots__ = (TTL, TIMER, _EXPIRATIONS)
+
+    def __init__(self, max_size=maxsize, ttl=60, timer=time, *args, **kwargs):
+        """
+        :param float ttl: entry time to live in seconds.
+        :param timer: function which returns the current time in seconds.
+        """
+
+        self.ttl = ttl
+        self.timer = timer
+        self._expirations = _root()
+
+        super(TTLCache, self).__init__(max_size=max_size, *args, **kwargs)
+
+    def set(self, key, value):
+
+        self._purge()
+
+        node = self._nodes.get(key)
+
+        if node is not None:  # renew the entry
+            self._unlink(node)
+            self._link(node)
+
+        super(TTLCache, self).set(key, value)
+
+    def items(self):
+
+        self._purge()
+
+        return super(TTLCache, self).items()
+
+    def _node(self, key, hit):
+
+        node = self._nodes.get(key)
+
+        if node is not None:
+            if node[DATA][KEY] <= self.timer():  # expired entry
+                self._remove(node)
+                self.evictions += 1
+                node = None
+
+            elif hit:
+                self._touch(node)
+
+        return node
+
+    def _purge(self):
+        """Remove expired entries."""
+
+        now = self.timer()
+        expirations = self._expirations
+
+        while expirations[NEXT] is not expirations:
+            node = expirations[NEXT][VALUE]
+
+            if node[DATA][KEY] > now:
+                break
+
+            self._remove(node)
+            self.evictions += 1
+
+    def _link(self, node):
+
+        super(TTLCache, self)._link(node)
+
+        # expiration nodes are [prev, next, expiration, node, None]
+        expiration = [None, None, self.timer() + self.ttl, node, None]
+        node[DATA] = expiration
+        _append(self._expirations, expiration)
+
+    def _unlink(self, node):
+
+        super(TTLCache, self)._unlink(node)
+
+        _unlink(node[DATA])
+
+    def clear(self):
+
+        super(TTLCache, self).clear()
+
+        self._expirations = _root()
+
+
+#: cache classes by policy name.
+POLICIES = {'lru': LRUCache, 'lfu': LFUCache, 'ttl': TTLCache}
+
+
+class SQLiteCache(object):
+    """Persistent cache stored in a sqlite database and shared by threads and
+    processes.
+
+    Keys are stable digests of cache keys (see stabledigest), values are
+    serialized with a pluggable serializer. When the cache is full, least
+    recently used entries are evicted.
+
+    Every thread and process (after a fork) opens its own connection, and
+    writes are serialized by sqlite transactions. The database uses the write
+    ahead log journal mode which lets readers run concurrently with a writer.
+
+    Access times of read entries are written once every ATIMES reads (and
+    before evictions) instead of once per read, so that the least recently
+    used order ignores the latest reads of other processes.
+
+    Several caches can share one database with different names (see the
+    Memoize parameter backend about keys of several functions).
+    """
+
+    threadsafe = True  #: True if the cache can be used by several threads.
+
+    ATIMES = 64  #: number of reads between writes of access times.
+
+    #: database path attribute name.
+    PATH = 'path'
+
+    #: cache name (and table name) attribute name.
+    NAME = 'name'
+
+    #: serializer attribute name.
+    SERIALIZER = 'serializer'
+
+    #: connection timeout attribute name.
+    TIMEOUT = 'timeout'
+
+    #: private max size attribute name.
+    _MAX_SIZE = '_max_size'
+
+    #: private connections by thread attribute name.
+    _LOCAL = '_local'
+
+    #: private access times to write by key digest attribute name.
+    _ATIMES = '_atimes'
+
+    #: private number of reads since access times were written attribute
+    #: name.
+    _READS = '_reads'
+
+    #: private access times lock attribute name.
+    _LOCK = '_lock'
+
+    #: number of entries evicted by this process attribute name.
+    EVICTIONS = 'evictions'
+
+    __slots__ = (
+        PATH, NAME, SERIALIZER, TIMEOUT, EVICTIONS, _MAX_SIZE, _LOCAL,
+        _ATIMES, _READS, _LOCK, '__weakref__'
+    )
+
+    def __init__(
+            self, path, max_size=maxsize, name='memoize',
+            serializer=PickleSerializer, timeout=30
+    ):
+        """
+        :param str path: database file path.
+        :param int max_size: maximal number of entries.
+        :param str name: cache name which is also its table name.
+        :param serializer: object with functions dumps (value to bytes) and
+            loads (bytes to value). Default uses pickle.
+        :param float timeout: seconds to wait for a locked database.
+        """
+
+        super(SQLiteCache, self).__init__()
+
+        if not name.replace('_', '').isalnum():
+            raise ValueError('Wrong cache name {0}.'.format(name))
+
+        self.path = path
+        self.name = name
+        self.serializer = serializer
+        self.timeout = timeout
+        self._local = local()
+        self._max_size = max_size
+        self._atimes = {}
+        self._reads = 0
+        self._lock = Lock()
+        self.evictions = 0
+
+    def _connection(self):
+        """Get the connection of the current thread and process."""
+
+        _local = self._local
+        pid = getpid()
+
+        if getattr(_local, 'pid', None) != pid:  # new thread or forked process
+            result = _local.connection = connect(
+                self.path, timeout=self.timeout, isolation_level=None,
+                check_same_thread=False
+            )
+            _local.pid = pid
+
+            name = self.name
+
+            with _SETUPLOCK:  # concurrent schema changes fail on python 2
+                result.execute('PRAGMA journal_mode=WAL')
+                result.executescript(
+                    """
+                    BEGIN IMMEDIATE;
+                    CREATE TABLE IF NOT EXISTS {0} (
+                        key BLOB PRIMARY KEY, value BLOB, atime REAL
+                    );
+                    CREATE INDEX IF NOT EXISTS {0}_atime ON {0} (atime);
+                    CREATE TABLE IF NOT EXISTS {0}_size (size INTEGER);
+                    INSERT INTO {0}_size SELECT 0
+                        WHERE NOT EXISTS (SELECT * FROM {0}_size);
+                    CREATE TRIGGER IF NOT EXISTS {0}_insert AFTER INSERT
+                        ON {0} BEGIN UPDATE {0}_size SET size = size + 1; END;
+                    CREATE TRIGGER IF NOT EXISTS {0}_delete AFTER DELETE
+                        ON {0} BEGIN UPDATE {0}_size SET size = size - 1; END;
+                    COMMIT;
+                    """.format(name)
+                )
+
+        else:
+            result = _local.connection
+
+        return result
+
+    @property
+    def max_size(self):
+        """Get the maximal number of entries."""
+
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        """Change the maximal number of entries and evict exceeding ones."""
+
+        self._max_size = value
+
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            self._evict(connection)
+
+        finally:
+            connection.execute('COMMIT')
+
+    def _touch(self, connection):
+        """Write access times of read entries in a transaction."""
+
+        with self._lock:
+            atimes, self._atimes = self._atimes, {}
+            self._reads = 0
+
+        if atimes:
+            connection.executemany(
+                'UPDATE {0} SET atime = ? WHERE key = ?'.format(self.name),
+                [(atime, Binary(digest)) for digest, atime in atimes.items()]
+            )
+
+    def _evict(self, connection):
+        """Evict exceeding entries in a transaction."""
+
+        self._touch(connection)
+
+        size = connection.execute(
+            'SELECT size FROM {0}_size'.format(self.name)
+        ).fetchone()[0]
+
+        if size > self._max_size:
+            self.evictions += connection.execute(
+                """DELETE FROM {0} WHERE key IN (
+                    SELECT key FROM {0} ORDER BY atime LIMIT ?
+                )""".format(self.name),
+                (size - max(self._max_size, 0),)
+            ).rowcount
+
+    def __len__(self):
+
+        return self._connection().execute(
+            'SELECT size FROM {0}_size'.format(self.name)
+        ).fetchone()[0]
+
+    def __contains__(self, key):
+
+        return self._connection().execute(
+            'SELECT 1 FROM {0} WHERE key = ?'.format(self.name),
+            (Binary(stabledigest(key)),)
+        ).fetchone() is not None
+
+    def get(self, key, default=None):
+        """Get the value of input key and update its access time.
+
+        :param key: key to find.
+        :param default: value to return if key is not cached.
+        """
+
+        connection = self._connection()
+        digest = stabledigest(key)
+
+        row = connection.execute(
+            'SELECT value FROM {0} WHERE key = ?'.format(self.name),
+            (Binary(digest),)
+        ).fetchone()
+
+        if row is None:
+            result = default
+
+        else:
+            result = self.serializer.loads(bytes(row[0]))
+
+            with self._lock:
+                self._atimes[digest] = time()
+                self._reads += 1
+                full = self._reads >= self.ATIMES
+
+            if full:
+                connection.execute('BEGIN IMMEDIATE')
+
+                try:
+                    self._touch(connection)
+
+                finally:
+                    connection.execute('COMMIT')
+
+        return result
+
+    def set(self, key, value):
+        """Cache a value, and evict entries if the cache is full.
+
+        :param key: value key.
+        :param value: value to cache.
+        """
+
+        if self._max_size <= 0:
+            return
+
+        data = Binary(self.serializer.dumps(value))
+        digest = Binary(stabledigest(key))
+        name = self.name
+
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            if connection.execute(
+                    'UPDATE {0} SET value = ?, atime = ? WHERE key = ?'.format(
+                        name
+                    ),
+                    (data, time(), digest)
+            ).rowcount == 0:
+                connection.execute(
+                    'INSERT INTO {0} VALUES (?, ?, ?)'.format(name),
+                    (digest, data, time())
+                )
+                self._evict(connection)
+
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        connection.execute('COMMIT')
+
+    def pop(self, key, default=_MARKER):
+        """Remove an entry and return its value.
+
+        :param key: key to remove.
+        :param default: value to return if key is not cached.
+        :raises: KeyError if key is not cached and default is not given.
+        """
+
+        connection = self._connection()
+        digest = Binary(stabledigest(key))
+
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            row = connection.execute(
+                'SELECT value FROM {0} WHERE key = ?'.format(self.name),
+                (digest,)
+            ).fetchone()
+
+            if row is not None:
+                connection.execute(
+                    'DELETE FROM {0} WHERE key = ?'.format(self.name),
+                    (digest,)
+                )
+
+        finally:
+            connection.execute('COMMIT')
+
+        if row is None:
+            if default is _MARKER:
+                raise KeyError(key)
+
+            return default
+
+        return self.serializer.loads(bytes(row[0]))
+
+    def items(self):
+        """Get a list of cached (key digest, value)."""
+
+        loads = self.serializer.loads
+
+        return [
+            (bytes(key), loads(bytes(value)))
+            for key, value in self._connection().execute(
+                'SELECT key, value FROM {0}'.format(self.name)
+            )
+        ]
+
+    def clear(self):
+        """Remove all entries."""
+
+        self._connection().execute('DELETE FROM {0}'.format(self.name))
+
+
+class SharedMemoryCache(object):
+    """Cache stored in a shared memory block (python >= 3.8) and shared by
+    threads and processes of one host.
+
+    Entries are fixed size slots of an open addressing table. Keys are stable
+    digests of cache keys (see stabledigest), and a key is found in at most
+    probes consecutive slots. When they are all used, the least recently used
+    one is replaced. Values bigger than a slot are not cached.
+
+    Values are serialized with a pluggable serializer. Without serializer,
+    values must be bytes-like and are read as bytes, or without copy as
+    memoryviews (parameter zerocopy) which are valid until the entry is
+    replaced, evicted or removed.
+
+    Accesses are serialized by a process lock. Processes created by fork use
+    the cache of their parent, others get it as a process parameter (it is
+    pickled with the shared memory block name and the lock).
+
+    Memoize entries are tuples, therefore Memoize requires a serializer (zero
+    copy reads are available to direct users only). See the Memoize parameter
+    backend about keys of several functions.
+    """
+
+    threadsafe = True  #: True if the cache can be used by several threads.
+
+    #: header struct (magic, slots, slot size, probes, entries, evictions).
+    HEADER = Struct('<4sIIIQQ')
+
+    #: slot header struct (state, key digest, access time, value length).
+    SLOT = Struct('<B20sdI')
+
+    MAGIC = b'B3MC'  #: shared memory block magic number.
+
+    EMPTY, USED, REMOVED = range(3)  #: slot states.
+
+    SERIALIZER = 'serializer'  #: serializer attribute name.
+    ZEROCOPY = 'zerocopy'  #: zero copy reads attribute name.
+    _SHM = '_shm'  #: shared memory block attribute name.
+    _LOCK = '_lock'  #: process lock attribute name.
+    _SLOTS = '_slots'  #: number of slots attribute name.
+    _SLOT_SIZE = '_slot_size'  #: slot size attribute name.
+    _PROBES = '_probes'  #: maximal probe length attribute name.
+
+    __slots__ = (
+        SERIALIZER, ZEROCOPY, _SHM, _LOCK, _SLOTS, _SLOT_SIZE, _PROBES,
+        '__weakref__'
+    )
+
+    def __init__(
+            self, slots=1024, slot_size=4096, name=None, probes=8,
+            serializer=PickleSerializer, zerocopy=False, lock=None
+    ):
+        """
+        :param int slots: number of slots (maximal number of entries).
+        :param int slot_size: slot size in bytes, including a slot header of
+            SLOT.size bytes.
+        :param str name: name of a shared memory block to attach instead of
+            creating a new one. Its slots, slot size and probes are used.
+        :param int probes: maximal number of slots where a key is searched.
+        :param serializer: object with functions dumps (value to bytes) and
+            loads (bytes to value). None stores bytes-like values.
+        :param bool zerocopy: if True (default False) and without serializer,
+            values are read as memoryviews of the shared memory block.
+        :param lock: process lock shared by processes which attach the block.
+        :raises: RuntimeError if shared memory is not available.
+        """
+
+        super(SharedMemoryCache, self).__init__()
+
+        if SharedMemory is None:
+            raise RuntimeError('Shared memory requires python >= 3.8.')
+
+        self.serializer = serializer
+        self.zerocopy = zerocopy
+        self._lock = ProcessLock() if lock is None else lock
+
+        if name is None:
+            if slot_size <= SharedMemoryCache.SLOT.size:
+                raise ValueError('Wrong slot size {0}.'.format(slot_size))
+
+            self._shm = SharedMemory(
+                create=True,
+                size=SharedMemoryCache.HEADER.size + slots * slot_size
+            )
+            SharedMemoryCache.HEADER.pack_into(
+                self._shm.buf, 0, SharedMemoryCache.MAGIC, slots, slot_size,
+                probes, 0, 0
+            )
+
+        else:
+            self._shm = SharedMemory(name=name)
+
+        header = SharedMemoryCache.HEADER.unpack_from(self._shm.buf, 0)
+        magic, slots, slot_size, probes = header[:4]
+
+        if magic != SharedMemoryCache.MAGIC:
+            raise ValueError('Wrong shared memory block {0}.'.format(name))
+
+        self._slots = slots
+        self._slot_size = slot_size
+        self._probes = min(probes, slots)
+
+    def __getstate__(self):
+
+        return (
+            self._shm.name, self._lock, self.serializer, self.zerocopy
+        )
+
+    def __setstate__(self, state):
+
+        name, lock, serializer, zerocopy = state
+
+        self.__init__(
+            name=name, lock=lock, serializer=serializer, zerocopy=zerocopy
+        )
+
+    @property
+    def name(self):
+        """Get the shared memory block name."""
+
+        return self._shm.name
+
+    @property
+    def max_size(self):
+        """Get the number of slots."""
+
+        return self._slots
+
+    @property
+    def evictions(self):
+        """Get the number of entries evicted by all processes."""
+
+        return SharedMemoryCache.HEADER.unpack_from(self._shm.buf, 0)[5]
+
+    def _count(self, entries=0, evictions=0):
+        """Update entry and eviction counters."""
+
+        header = SharedMemoryCache.HEADER
+        buf = self._shm.buf
+
+        values = list(header.unpack_from(buf, 0))
+        values[4] += entries
+        values[5] += evictions
+        header.pack_into(buf, 0, *values)
+
+    def _offset(self, index):
+        """Get the offset of a slot."""
+
+        return SharedMemoryCache.HEADER.size + index * self._slot_size
+
+    def _probe(self, digest):
+        """Find the slot of a digest, or the slot where to put it.
+
+        :return: slot offset, and True if it contains digest.
+        :rtype: tuple
+        """
+
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+        start = int(hexlify(digest[:8]), 16)
+
+        result = None
+
+        for probe in range(self._probes):
+            offset = self._offset((start + probe) % self._slots)
+            state, _digest, atime, _ = slot.unpack_from(buf, offset)
+
+            if state == SharedMemoryCache.USED:
+                if _digest[:len(digest)] == digest:
+                    return offset, True
+
+                if result is None or (
+                        result[1] is not None and atime < result[1]
+                ):  # least recently used
+                    result = offset, atime
+
+            else:
+                if result is None or result[1] is not None:
+                    result = offset, None
+
+                if state == SharedMemoryCache.EMPTY:  # end of the probe
+                    break
+
+        return result[0], False
+
+    def __len__(self):
+
+        return SharedMemoryCache.HEADER.unpack_from(self._shm.buf, 0)[4]
+
+    def __contains__(self, key):
+
+        digest = stabledigest(key)
+
+        with self._lock:
+            return self._probe(digest)[1]
+
+    def get(self, key, default=None):
+        """Get the value of input key and update its access time.
+
+        :param key: key to find.
+        :param default: value to return if key is not cached.
+        """
+
+        digest = stabledigest(key)
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+
+        with self._lock:
+            offset, found = self._probe(digest)
+
+            if not found:
+                return default
+
+            state, _digest, _, length = slot.unpack_from(buf, offset)
+            slot.pack_into(buf, offset, state, _digest, time(), length)
+
+            start = offset + slot.size
+            data = buf[start:start + length]
+
+            if not (self.zerocopy and self.serializer is None):
+                data = data.tobytes()
+
+        return data if self.serializer is None else self.serializer.loads(
+            data
+        )
+
+    def set(self, key, value):
+        """Cache a value, and replace the least recently used entry of its
+        slots if they are used.
+
+        :param key: value key.
+        :param value: value to cache (bytes-like without serializer).
+        """
+
+        data = value if self.serializer is None else self.serializer.dumps(
+            value
+        )
+        data = memoryview(data).cast('B')
+
+        digest = stabledigest(key)
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+
+        with self._lock:
+            offset, found = self._probe(digest)
+
+            if len(data) > self._slot_size - slot.size:  # too big
+                if found:
+                    self._remove(offset)
+
+                return
+
+            if not found:
+                state = slot.unpack_from(buf, offset)[0]
+
+                if state == SharedMemoryCache.USED:
+                    self._count(evictions=1)
+
+                else:
+                    self._count(entries=1)
+
+            slot.pack_into(
+                buf, offset, SharedMemoryCache.USED, digest, time(), len(data)
+            )
+            start = offset + slot.size
+            buf[start:start + len(data)] = data
+
+    def _remove(self, offset):
+        """Remove the entry of a slot."""
+
+        slot = SharedMemoryCache.SLOT
+
+        slot.pack_into(
+            self._shm.buf, offset, SharedMemoryCache.REMOVED, b'', 0, 0
+        )
+        self._count(entries=-1)
+
+    def pop(self, key, default=_MARKER):
+        """Remove an entry and return its value.
+
+        :param key: key to remove.
+        :param default: value to return if key is not cached.
+        :raises: KeyError if key is not cached and default is not given.
+        """
+
+        digest = stabledigest(key)
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+
+        with self._lock:
+            offset, found = self._probe(digest)
+
+            if found:
+                length = slot.unpack_from(buf, offset)[3]
+                start = offset + slot.size
+                data = buf[start:start + length].tobytes()
+
+                self._remove(offset)
+
+        if not found:
+            if default is _MARKER:
+                raise KeyError(key)
+
+            return default
+
+        return data if self.serializer is None else self.serializer.loads(
+            data
+        )
+
+    def items(self):
+        """Get a list of cached (key digest, value)."""
+
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+
+        result = []
+
+        with self._lock:
+            for index in range(self._slots):
+                offset = self._offset(index)
+                state, digest, _, length = slot.unpack_from(buf, offset)
+
+                if state == SharedMemoryCache.USED:
+                    start = offset + slot.size
+                    result.append(
+                        (digest, buf[start:start + length].tobytes())
+                    )
+
+        if self.serializer is not None:
+            loads = self.serializer.loads
+            result = [(digest, loads(data)) for digest, data in result]
+
+        return result
+
+    def clear(self):
+        """Remove all entries."""
+
+        slot = SharedMemoryCache.SLOT
+        buf = self._shm.buf
+
+        with self._lock:
+            for index in range(self._slots):
+                slot.pack_into(
+                    buf, self._offset(index), SharedMemoryCache.EMPTY, b'', 0,
+                    0
+                )
+
+            values = list(SharedMemoryCache.HEADER.unpack_from(buf, 0))
+            values[4] = 0
+            SharedMemoryCache.HEADER.pack_into(buf, 0, *values)
+
+    def close(self):
+        """Detach the shared memory block from this process."""
+
+        self._shm.close()
+
+    def unlink(self):
+        """Destroy the shared memory block (once detached by all
+        processes)."""
+
+        self._shm.unlink()
+
+
+class TieredCache(object):
+    """Cache with an in-process first level in front of a shared second level
+    (such as a SQLiteCache) in order to preserve hit latency.
+
+    Values found in the second level are copied in the first level, and set
+    values are written in both levels. Values whose key or value can not be
+    serialized are kept in the first level only. The max size is the first
+    level one.
+    """
+
+    threadsafe = True  #: True if the cache can be used by several threads.
+
+    L1 = 'l1'  #: first level cache attribute name.
+    L2 = 'l2'  #: second level cache attribute name.
+    _LOCK = '_lock'  #: first level lock attribute name.
+
+    __slots__ = (L1, L2, _LOCK, '__weakref__')
+
+    def __init__(self, l1, l2):
+        """
+        :param Cache l1: in-process first level cache.
+        :param l2: shared second level cache.
+        """
+
+        super(TieredCache, self).__init__()
+
+        self.l1 = l1
+        self.l2 = l2
+        self._lock = getlock(l1)
+
+    @property
+    def evictions(self):
+        """Get the number of entries evicted from the first level."""
+
+        return self.l1.evictions
+
+    @property
+    def onremove(self):
+        """Get the first level removal callback."""
+
+        return self.l1.onremove
+
+    @onremove.setter
+    def onremove(self, value):
+        """Change the first level removal callback."""
+
+        self.l1.onremove = value
+
+    @property
+    def max_size(self):
+        """Get the first level maximal number of entries."""
+
+        return self.l1.max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        """Change the first level maximal number of entries."""
+
+        with self._lock:
+            self.l1.max_size = value
+
+    @property
+    def sizeof(self):
+        """Get the first level value size estimator."""
+
+        return self.l1.sizeof
+
+    @property
+    def bytes(self):
+        """Get the first level estimated size in bytes of values."""
+
+        return self.l1.bytes
+
+    @property
+    def max_bytes(self):
+        """Get the first level maximal estimated size in bytes of values."""
+
+        return self.l1.max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        """Change the first level maximal estimated size in bytes of
+        values."""
+
+        with self._lock:
+            self.l1.max_bytes = value
+
+    def shrink(self, ratio=0.5):
+        """Evict a ratio of first level entries."""
+
+        with self._lock:
+            result = self.l1.shrink(ratio)
+
+        return result
+
+    def __len__(self):
+
+        return len(self.l2)
+
+    def __contains__(self, key):
+
+        with self._lock:
+            result = key in self.l1
+
+        return result or self.load(key, _MARKER) is not _MARKER
+
+    def get(self, key, default=None):
+        """Get the value of input key from the first level, otherwise from the
+        second level.
+
+        :param key: key to find.
+        :param default: value to return if key is not cached.
+        """
+
+        with self._lock:
+            result = self.l1.get(key, _MARKER)
+
+        if result is _MARKER:
+            result = self.load(key, _MARKER)
+
+            if result is _MARKER:
+                result = default
+
+            else:
+                with self._lock:
+                    self.l1.set(key, result)
+
+        return result
+
+    def load(self, key, default=None):
+        """Get the value of input key from the second level only.
+
+        :param key: key to find.
+        :param default: value to return if key is not cached, or if key or
+            value can not be serialized.
+        """
+
+        try:
+            result = self.l2.get(key, default)
+
+        except _UNSERIALIZABLE:
+            result = default
+
+        return result
+
+    def set(self, key, value):
+        """Cache a value in both levels."""
+
+        self.store(key, value)
+
+        with self._lock:
+            self.l1.set(key, value)
+
+    def store(self, key, value):
+        """Cache a value in the second level only.
+
+        If key or value can not be serialized, the value is not stored and a
+        former value of key is removed from the second level, which is then
+        bypassed for key.
+        """
+
+        try:
+            self.l2.set(key, value)
+
+        except _UNSERIALIZABLE:
+            self._discard(key)
+
+    def _discard(self, key):
+        """Remove an entry from the second level, and get its value (_MARKER
+        if key is not cached or can not be serialized)."""
+
+        try:
+            result = self.l2.pop(key)
+
+        except (KeyError,) + _UNSERIALIZABLE:
+            result = _MARKER
+
+        return result
+
+    def pop(self, key, default=_MARKER):
+        """Remove an entry from both levels and return its value."""
+
+        with self._lock:
+            result = self.l1.pop(key, _MARKER)
+
+        l2result = self._discard(key)
+
+        if result is _MARKER:
+            result = l2result
+
+        if result is _MARKER:
+            if default is _MARKER:
+                raise KeyError(key)
+
+            result = default
+
+        return result
+
+    def items(self):
+        """Get a list of first level cached (key, value)."""
+
+        with self._lock:
+            result = self.l1.items()
+
+        return result
+
+    def clear(self):
+        """Remove all entries from both levels."""
+
+        self.l2.clear()
+
+        with self._lock:
+            self.l1.clear()
+
+
+class RSSWatcher(object):
+    """Shrink watched caches when the resident set size of the process crosses
+    a threshold.
+
+    The resident set size is checked every interval seconds by a daemon thread
+    which runs while caches are watched. Freed memory is not always given back
+    to the system, therefore caches are shrunk by a ratio at every check which
+    exceeds the threshold instead of until the resident set size decreases.
+
+    Caches are weakly referenced, so that a watched cache is unwatched when it
+    is garbage collected.
+    """
+
+    MAX_RSS = 'max_rss'  #: resident set size threshold attribute name.
+    INTERVAL = 'interval'  #: check interval attribute name.
+    RATIO = 'ratio'  #: ratio of entries evicted by check attribute name.
+    RSS = 'rss'  #: resident set size function attribute name.
+    _CACHES = '_caches'  #: locks by watched cache attribute name.
+    _LOCK = '_lock'  #: watched caches lock attribute name.
+    _THREAD = '_thread'  #: checking thread attribute name.
+
+    __slots__ = (MAX_RSS, INTERVAL, RATIO, RSS, _CACHES, _LOCK, _THREAD)
+
+    def __init__(self, max_rss, interval=1, ratio=0.5, rss=rss):
+        """
+        :param int max_rss: resident set size threshold in bytes.
+        :param float interval: check interval in seconds.
+        :param float ratio: ratio of entries evicted from every cache when
+            the threshold is crossed.
+        :param rss: function which returns the resident set size in bytes.
+        """
+
+        super(RSSWatcher, self).__init__()
+
+        self.max_rss = max_rss
+        self.interval = interval
+        self.ratio = ratio
+        self.rss = rss
+        self._caches = WeakKeyDictionary()
+        self._lock = Lock()
+        self._thread = None
+
+    def watch(self, cache, lock=None):
+        """Watch a cache and start the checking thread if needed.
+
+        :param cache: cache to shrink (with a method shrink) which supports
+            weak references.
+        :param lock: lock of cache accesses. Default is getlock(cache).
+        """
+
+        if lock is None:
+            lock = getlock(cache)
+
+        with self._lock:
+            self._caches[cache] = lock
+
+            if self._thread is None:
+                self._thread = Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def unwatch(self, cache):
+        """Stop to watch a cache."""
+
+        with self._lock:
+            self._caches.pop(cache, None)
+
+    def check(self):
+        """Shrink watched caches if the resident set size exceeds max_rss.
+
+        :return: True if caches were shrunk.
+        :rtype: bool
+        """
+
+        rss = self.rss()
+
+        result = rss is not None and rss > self.max_rss
+
+        if result:
+            with self._lock:
+                caches = list(self._caches.items())
+
+            for cache, lock in caches:
+                with lock:
+                    cache.shrink(self.ratio)
+
+        return result
+
+    def _run(self):
+        """Check the resident set size while caches are watched."""
+
+        while True:
+            sleep(self.interval)
+
+            with self._lock:
+                if not self._caches:
+                    self._thread = None
+                    break
+
+            self.check()
@@ -28,22 +28,117 @@
 
 from __future__ import absolute_import
 
-from .interception import PrivateInterceptor
+from .interception import PrivateInterceptor, isstream
+from .cache import (
+    POLICIES, makekey, sizeof as _sizeof, LRUCache, TieredCache, TTLCache
+)
 from .check import Target
 
 from b3j0f.utils.iterable import first
 from b3j0f.utils.version import getcallargs
 
-from six import get_function_code
+from six import get_function_code, string_types, reraise
 from six.moves import range
+from six.moves.queue import Queue, Empty, Full
 
-from sys import stderr, maxsize
+from sys import stderr, maxsize, exc_info
 
-from time import sleep
+from time import sleep, time
 
-from functools import wraps
+from functools import wraps, partial
 
-__all__ = ['Types', 'types', 'Curried', 'curried', 'Retries', 'Memoize']
+from copy import copy
+
+from itertools import islice
+
+from random import randrange
+
+from inspect import isclass, CO_VARARGS, CO_VARKEYWORDS
+
+from weakref import ref, WeakKeyDictionary
+
+try:
+    from threading import Lock, Event, Thread, local
+
+except ImportError:
+    from dummy_threading import Lock, Event, Thread, local
+
+try:
+    from collections.abc import Mapping, Sequence, Set, Sized
+
+except ImportError:  # python < 3.3
+    from collections import Mapping, Sequence, Set, Sized
+
+try:
+    from typing import Any, Dict, Tuple, TypeVar, Union, get_type_hints
+
+except ImportError:  # typing is optional before python 3.5
+    Any = Dict = Tuple = TypeVar = Union = get_type_hints = None
+
+try:
+    from asyncio import (
+        ensure_future, iscoroutine, iscoroutinefunction, isfuture, shield
+    )
+
+except ImportError:  # python < 3.5
+    ensure_future = shield = None
+
+    def iscoroutine(_):
+        """Coroutines do not exist before python 3.5."""
+
+        return False
+
+    iscoroutinefunction = isfuture = iscoroutine
+
+try:
+    from numpy import ndarray, dtype as _dtype, isfinite
+
+except ImportError:  # numpy is optional and only required by Types.Array
+    ndarray = None
+
+__all__ = [
+    'Types', 'types', 'Curried', 'curried', 'Retries', 'Memoize',
+    'MemoizeMany', 'Instrument', 'addtags', 'invalidate'
+]
+
+_NODEFAULT = object()  #: marker of parameters without valid default value.
+
+
+def _generic(expected_type):
+    """Get the runtime origin and the arguments of a typing generic type.
+
+    :return: (origin, args) or None if expected_type is not a generic type.
+    :rtype: tuple
+    """
+
+    result = None
+
+    origin = getattr(expected_type, '__origin__', None)
+
+    if origin is not None:
+        # before python 3.7, origins are typing generic classes
+        origin = getattr(expected_type, '__extra__', None) or origin
+        args = getattr(expected_type, '__args__', None)
+
+        if args == () and not getattr(expected_type, '_special', False):
+            args = ((),)  # empty tuple type since python 3.11 (and tuple[()])
+
+        result = origin, args or ()
+
+    return result
+
+
+def _isplain(expected_type):
+    """True iif expected_type is a class or a tuple of classes which can be
+    given to isinstance."""
+
+    if isinstance(expected_type, tuple):
+        result = all(_isplain(item) for item in expected_type)
+
+    else:
+        result = isclass(expected_type) and _generic(expected_type) is None
+
+    return result
 
 
 @Target(callable)
@@ -75,6 +170,122 @@ class Types(PrivateInterceptor):
     class NotEmpty(SpecialCondition):
         """Handle NotEmpty SpecialCondition."""
 
+    class Iter(SpecialCondition):
+        """Handle iterable result specifications whose items are checked
+        lazily while the consumer pulls them.
+
+        As a rtype, an iterator result is proxied by a generator and never
+        materialized, while items of a container result (which can be
+        iterated again) are checked at once with the container checking mode
+        and the container is returned unchanged. Elsewhere, only the
+        iterability of values is checked.
+
+        Example:
+
+        >>> @Types(rtype=Types.Iter(int))
+        ... def ids(cursor):
+        ...     return (row[0] for row in cursor)
+        """
+
+    class Array(object):
+        """Handle numpy array specifications.
+
+        Metadata (dtype, ndim, shape and memory layout) are checked in constant
+        time, and value predicates with vectorised numpy reductions.
+
+        Example:
+
+        >>> @Types(ptypes={'points': Types.Array(float, shape=(None, 3))})
+        ... def center(points):
+        ...     return points.mean(axis=0)
+        """
+
+        __slots__ = ('dtype', 'ndim', 'shape', 'contiguous', 'finite')
+
+        def __init__(
+                self, dtype=None, ndim=None, shape=None, contiguous=None,
+                finite=False
+        ):
+            """
+            :param dtype: expected array dtype (any numpy dtype specification).
+            :param int ndim: expected number of dimensions.
+            :param tuple shape: expected shape where None matches any length.
+                ndim equals len(shape) if not given.
+            :param contiguous: expected memory layout. True or 'C' for C
+                contiguous arrays, 'F' for fortran contiguous arrays.
+            :param bool finite: if True, check that all items are finite (no
+                nan or infinity).
+            :raises: ImportError if numpy is not installed.
+            """
+
+            super(Types.Array, self).__init__()
+
+            if ndarray is None:
+                raise ImportError('Types.Array requires numpy')
+
+            self.dtype = None if dtype is None else _dtype(dtype)
+            self.shape = None if shape is None else tuple(shape)
+
+            if ndim is None and shape is not None:
+                ndim = len(self.shape)
+
+            self.ndim = ndim
+            self.contiguous = 'C' if contiguous is True else contiguous
+            self.finite = finite
+
+        def __repr__(self):
+
+            return 'Array({0})'.format(
+                ', '.join(
+                    '{0}={1!r}'.format(name, getattr(self, name))
+                    for name in Types.Array.__slots__
+                    if getattr(self, name) not in (None, False)
+                )
+            )
+
+        def validator(self):
+            """Compile this specification into a validator.
+
+            :return: function which takes a value in parameter and returns True
+                if the value is None or an array respecting this specification.
+            """
+
+            dtype, ndim, shape = self.dtype, self.ndim, self.shape
+            flag = None if self.contiguous is None else (
+                'F_CONTIGUOUS' if self.contiguous == 'F' else 'C_CONTIGUOUS'
+            )
+            finite = self.finite
+
+            def result(value):
+                """Check numpy array values."""
+
+                if value is None:
+                    return True
+
+                if not isinstance(value, ndarray):
+                    return False
+
+                if dtype is not None and value.dtype != dtype:
+                    return False
+
+                if ndim is not None and value.ndim != ndim:
+                    return False
+
+                if shape is not None:
+                    for length, expected in zip(value.shape, shape):
+                        if expected is not None and length != expected:
+                            return False
+
+                if flag is not None and not value.flags[flag]:
+                    return False
+
+                if finite and value.dtype.kind in 'fc':  # only inexact kinds
+                    return bool(isfinite(value).all())
+
+                return True
+
+            return result
+
     class NamedParameterType(object):
         """Handle Named Parameter Type."""
 
@@ -116,439 +327,2172 @@ class Types(PrivateInterceptor):
     #: parameter types attribute name
     PTYPES = 'ptypes'
 
-    __slots__ = (RTYPE, PTYPES) + PrivateInterceptor.__slots__
+    #: yielded item type attribute name
+    YTYPE = 'ytype'
+
+    #: function annotations usage attribute name
+    ANNOTATIONS = 'annotations'
+
+    #: container checking mode attribute name
+    CHECKING = 'checking'
+
+    #: number of checked container items attribute name
+    LIMIT = 'limit'
+
+    FULL = 'full'  #: check all container items.
+    FIRST = 'first'  #: check the first limit container items.
+    SAMPLE = 'sample'  #: check limit container items chosen randomly.
+    OFF = 'off'  #: do not check container items.
+
+    #: global container checking mode used by annotations without checking.
+    default_checking = FULL
+
+    #: global limit used by annotations without limit.
+    default_limit = 16
+
+    #: private return type attribute name
+    _RTYPE = '_rtype'
+
+    #: private parameter types attribute name
+    _PTYPES = '_ptypes'
+
+    #: private yielded item type attribute name
+    _YTYPE = '_ytype'
+
+    #: private return validator attribute name
+    _RVALIDATOR = '_rvalidator'
+
+    #: private parameter validators attribute name
+    _PVALIDATORS = '_pvalidators'
+
+    #: private yielded item validator attribute name
+    _YVALIDATOR = '_yvalidator'
+
+    #: private iterable result item validator attribute name
+    _IVALIDATOR = '_ivalidator'
+
+    #: private parameter bindings by target code attribute name
+    _BINDINGS = '_bindings'
+
+    #: private container checking mode attribute name
+    _CHECKING = '_checking'
+
+    #: private number of checked container items attribute name
+    _LIMIT = '_limit'
+
+    NAMED = 0  #: named parameter binding kind.
+    VARARGS = 1  #: varargs parameter binding kind.
+    VARKW = 2  #: keywords parameter binding kind.
+
+    __slots__ = (
+        _RTYPE, _PTYPES, _YTYPE, _RVALIDATOR, _PVALIDATORS, _YVALIDATOR,
+        _IVALIDATOR, _BINDINGS, _CHECKING, _LIMIT, ANNOTATIONS
+    ) + PrivateInterceptor.__slots__
+
+    MAX_VALIDATORS = 1024  #: maximal number of shared validators.
+
+    #: least recently used validators by hashable type specification,
+    #: checking mode and limit.
+    _VALIDATORS = LRUCache(max_size=MAX_VALIDATORS)
+
+    _VALIDATORSLOCK = Lock()  #: shared validators lock.
 
     """
     Check parameter or result types of decorated class or function call.
     """
-    def __init__(self, rtype=None, ptypes=None, *args, **kwargs):
+    def __init__(
+            self, rtype=None, ptypes=None, ytype=None, checking=None,
+            limit=None, annotations=False, *args, **kwargs
+    ):
         """
-        :param rtype:
+        :param rtype: expected return type. If it is a Types.Iter, items of
+            iterable results are checked lazily while they are consumed.
+        :param dict ptypes: expected types by parameter name.
+        :param ytype: expected type of items yielded by a (async) generator
+            result. Items are checked lazily while they are consumed.
+        :param str checking: container checking mode among FULL, FIRST,
+            SAMPLE and OFF. Default is Types.default_checking.
+        :param int limit: number of checked container items in FIRST and
+            SAMPLE modes. Default is Types.default_limit.
+        :param bool annotations: if True (default False), complete rtype and
+            ptypes with the annotations of bound functions (typing generics
+            are supported). Annotations which are not type specifications
+            (such as strings or documentation objects) are ignored.
         """
 
         super(Types, self).__init__(*args, **kwargs)
 
+        self.annotations = annotations
+
+        self._checking = Types._checkmode(checking)
+        self._limit = limit
+        self._yvalidator = self._ivalidator = None
+
         self.rtype = rtype
-        self.ptypes = {} if ptypes is None else ptypes
+        self.ptypes = ptypes
+        self.ytype = ytype
 
-    @staticmethod
-    def check_value(value, expected_type):
-        """Check Types parameters."""
+    @property
+    def rtype(self):
+        """Get the expected return type."""
 
-        result = False
+        return self._rtype
 
-        if isinstance(expected_type, Types.NotNone):
-            result = value is not None and Types.check_value(
-                value,
-                expected_type.get_type()
+    @rtype.setter
+    def rtype(self, value):
+        """Change the expected return type and compile its validator."""
+
+        self._rtype = value
+        self._rvalidator = None if value is None else Types.validator(
+            value, checking=self._checking, limit=self._limit
+        )
+        self._ivalidator = Types.validator(
+            value.get_type(), checking=self._checking, limit=self._limit
+        ) if isinstance(value, Types.Iter) else None
+        self._setiteminterception()
+
+    @property
+    def ptypes(self):
+        """Get expected types by parameter name."""
+
+        return self._ptypes
+
+    @ptypes.setter
+    def ptypes(self, value):
+        """Change expected parameter types and compile their validators."""
+
+        self._ptypes = {} if value is None else value
+        self._pvalidators = dict(
+            (
+                name,
+                Types.validator(
+                    self._ptypes[name],
+                    checking=self._checking, limit=self._limit
+                )
             )
+            for name in self._ptypes
+        )
+        self._bindings = {}  # bindings are computed again from validators
 
-        else:
-            result = value is None
+    @property
+    def ytype(self):
+        """Get the expected type of yielded items."""
 
-            if not result:
+        return self._ytype
 
-                value_type = type(value)
+    @ytype.setter
+    def ytype(self, value):
+        """Change the expected type of yielded items and compile its
+        validator."""
 
-                if isinstance(expected_type, Types.NotEmpty):
-                    try:
-                        result = len(value) != 0
-                        if result:
-                            _type = expected_type.get_type()
-                            result = Types.check_value(value, _type)
-                    except TypeError:
-                        result = False
+        self._ytype = value
+        self._yvalidator = None if value is None else Types.validator(
+            value, checking=self._checking, limit=self._limit
+        )
+        self._setiteminterception()
 
-                elif isinstance(expected_type, list):
-                    result = issubclass(value_type, list)
+    def _setiteminterception(self):
+        """Intercept stream items only if they have to be checked."""
 
-                    if result:
-                        if len(expected_type) == 0:
-                            result = len(value) == 0
-                        else:
-                            _expected_type = expected_type[0]
+        self.item_interception = None if (
+            self._yvalidator is None and self._ivalidator is None
+        ) else self._item_interception
 
-                            for item in value:
-                                result = Types.check_value(
-                                    item,
-                                    _expected_type
-                                )
+    @property
+    def checking(self):
+        """Get the container checking mode (None for the global mode)."""
 
-                                if not result:
-                                    break
+        return self._checking
 
-                elif isinstance(expected_type, set):
-                    result = issubclass(value_type, set)
+    @checking.setter
+    def checking(self, value):
+        """Change the container checking mode and compile validators again."""
 
-                    if result:
-                        if len(expected_type) == 0:
-                            result = len(value) == 0
-                        else:
+        self._checking = Types._checkmode(value)
+        self._compile()
 
-                            _expected_type = expected_type.copy().pop()
-                            _value = value.copy()
+    @property
+    def limit(self):
+        """Get the number of checked container items (None for the global
+        limit)."""
 
-                            value_length = len(_value)
+        return self._limit
 
-                            for _ in range(value_length):
-                                item = _value.pop()
-                                result = Types.check_value(
-                                    item,
-                                    _expected_type)
+    @limit.setter
+    def limit(self, value):
+        """Change the number of checked container items and compile
+        validators again."""
 
-                                if not result:
-                                    break
-                else:
-                    result = issubclass(value_type, expected_type)
+        self._limit = value
+        self._compile()
 
-        return result
+    def _compile(self):
+        """Compile all validators."""
 
-    def _interception(self, joinpoint):
+        self.rtype = self._rtype
+        self.ptypes = self._ptypes
+        self.ytype = self._ytype
 
-        target = joinpoint.target
-        args = joinpoint.args
-        kwargs = joinpoint.kwargs
+    @staticmethod
+    def _checkmode(checking):
+        """Check a container checking mode.
 
-        if self.ptypes:
-            callargs = getcallargs(target, *args, **kwargs)
+        :raises: ValueError if checking is not a container checking mode.
+        """
 
-            for arg in callargs:
-                value = callargs[arg]
-                expected_type = self.ptypes.get(arg)
+        if checking not in (
+                None, Types.FULL, Types.FIRST, Types.SAMPLE, Types.OFF
+        ):
+            raise ValueError(
+                'Wrong container checking mode {0}.'.format(checking)
+            )
 
-                if (
-                        expected_type is not None and
-                        not Types.check_value(value, expected_type)
-                ):
-                    raise Types.TypesError(
-                        "wrong typed parameter for arg {0} : {1} ({2}). \
-                        Expected: {3}."
-                        .format(
-                            arg, value, type(value), expected_type
-                        )
-                    )
+        return checking
 
-        result = joinpoint.proceed()
+    @staticmethod
+    def validator(expected_type, checking=None, limit=None):
+        """Get the validator of a type specification.
+
+        Validators of hashable specifications (classes and typing generics)
+        are compiled once and shared (up to MAX_VALIDATORS least recently
+        used ones).
+
+        :param expected_type: type specification. It is a class, a tuple of
+            specifications, a list or set literal of one item specification,
+            a NotNone, NotEmpty, Iter or Array specification, or a typing
+            generic type (Any, Union, Optional, Tuple, list, set, mapping
+            generics, etc.). As with classes, typing specifications accept None
+            values (use NotNone to reject them).
+        :param str checking: container checking mode. If None (default),
+            Types.default_checking is read at every check.
+        :param int limit: number of checked container items in FIRST and
+            SAMPLE modes. If None (default), Types.default_limit is read at
+            every check.
+        :return: function which takes a value in parameter and returns True if
+            the value respects expected_type.
+        """
 
-        target = joinpoint.target
-        args = joinpoint.args
-        kwargs = joinpoint.kwargs
+        if isinstance(expected_type, (Types.SpecialCondition, Types.Array)):
+            key = None  # specification instances are not shared
 
-        if self.rtype:
-            if not Types.check_value(result, self.rtype):
-                raise Types.TypesError(
-                    "wrong result type for {0} with parameters {1}, {2}: {3} \
-                    ({4}). Expected {5}."
-                    .format(
-                        target, args, kwargs, result, type(result),
-                        self.rtype
-                    )
-                )
+        else:
+            key = expected_type, checking, limit
+
+            try:
+                with Types._VALIDATORSLOCK:
+                    result = Types._VALIDATORS.get(key)
+
+            except TypeError:  # unhashable specification
+                key = None
+
+            else:
+                if result is not None:
+                    return result
+
+        result = Types._compilevalidator(expected_type, checking, limit)
+
+        if key is not None:
+            with Types._VALIDATORSLOCK:  # compiled meanwhile by another thread
+                shared = Types._VALIDATORS.get(key)
+
+                if shared is None:
+                    Types._VALIDATORS.set(key, result)
+
+                else:
+                    result = shared
 
         return result
 
+    @staticmethod
+    def _compilevalidator(expected_type, checking, limit):
+        """Compile a type specification into a validator.
 
-def types(*args, **kwargs):
-    """Quick alias for the Types Annotation with only args and kwargs
-    parameters.
+        :param expected_type: type specification.
+        :param str checking: container checking mode.
+        :param int limit: number of checked items in FIRST and SAMPLE modes.
+        """
 
-    :param tuple args: may contain rtype.
-    :param dict kwargs: may contain ptypes.
-    """
+        generic = _generic(expected_type)
 
-    rtype = first(args)
+        if isinstance(expected_type, Types.NotNone):
+            check = Types.validator(
+                expected_type.get_type(), checking=checking, limit=limit
+            )
 
-    return Types(rtype=rtype, ptypes=kwargs)
+            def result(value):
+                """Check not None values."""
 
+                return value is not None and check(value)
 
-class Curried(PrivateInterceptor):
-    """Annotation that returns a function that keeps returning functions
-    until all arguments are supplied; then the original function is
-    evaluated.
+        elif isinstance(expected_type, Types.NotEmpty):
+            check = Types.validator(
+                expected_type.get_type(), checking=checking, limit=limit
+            )
 
-    Inspirated from Jeff Laughlin Consulting LLC projects.
-    """
+            def result(value):
+                """Check not empty values."""
 
-    ARGS = 'args'  #: args attribute name
-    KWARGS = 'kwargs'  #: kwargs attribute name
-    DEFAULT_ARGS = 'default_args'  #: default args attribute name
-    DEFAULT_KWARGS = 'default_kwargs'  #: default kwargs attribute name
+                if value is None:
+                    return True
 
-    __slots__ = (
-        ARGS, KWARGS, DEFAULT_ARGS, DEFAULT_KWARGS
-    ) + PrivateInterceptor.__slots__
+                try:
+                    return len(value) != 0 and check(value)
 
-    class CurriedResult(object):
-        """Curried result in case of missing arguments."""
+                except TypeError:
+                    return False
 
-        __slots__ = ('curried', 'exception')
+        elif isinstance(expected_type, Types.Array):
+            result = expected_type.validator()
 
-        def __init__(self, curried, exception):
+        elif isinstance(expected_type, Types.Iter):
+            def result(value):
+                """Check iterable values."""
 
-            super(Curried.CurriedResult, self).__init__()
+                if value is None or isstream(value):
+                    return True
 
-            self.curried = curried
-            self.exception = exception
+                try:
+                    iter(value)
 
-    def __init__(self, varargs=None, keywords=None, *args, **kwargs):
-        """
-        :param tuple varargs: function call varargs.
-        :param dict keywords: function call keywords.
-        """
+                except TypeError:
+                    return False
 
-        super(Curried, self).__init__(*args, **kwargs)
+                return True
 
-        # initialize arguments
-        if varargs is None:
-            varargs = ()
-        if keywords is None:
-            keywords = {}
-        # set attributes
-        self.args = self.default_args = varargs
-        self.kwargs = self.default_kwargs = keywords
+        elif isinstance(expected_type, (list, set)):
+            container_type = type(expected_type)
 
-    def _bind_target(self, target, *args, **kwargs):
+            if expected_type:
+                item_type = next(iter(expected_type))
 
-        @wraps(target)
-        def wrapper(*args, **kwargs):
-            """Target wrapper."""
+                result = Types._containervalidator(
+                    container_type, item_type, checking=checking, limit=limit
+                )
 
-            return target(*args, **kwargs)
+            else:
+                def result(value):
+                    """Check empty containers."""
 
-        result = super(Curried, self)._bind_target(
-            target=wrapper, *args, **kwargs
-        )
+                    return value is None or (
+                        isinstance(value, container_type) and len(value) == 0
+                    )
+
+        elif generic is not None:
+            result = Types._genericvalidator(
+                generic[0], generic[1], checking, limit
+            )
+
+        elif (Any is not None and expected_type is Any) or (
+                TypeVar is not None and isinstance(expected_type, TypeVar)
+        ):
+            def result(value):
+                """Check any value."""
+
+                return True
+
+        elif isinstance(expected_type, tuple) and not _isplain(expected_type):
+            result = Types._unionvalidator(expected_type, checking, limit)
+
+        else:
+            def result(value):
+                """Check value type."""
+
+                return value is None or isinstance(value, expected_type)
 
         return result
 
-    def _interception(self, joinpoint, *args, **kwargs):
+    @staticmethod
+    def _unionvalidator(expected_types, checking=None, limit=None):
+        """Compile a validator of values which respect at least one type
+        specification.
 
-        result = None
+        :param tuple expected_types: type specifications.
+        :param str checking: container checking mode.
+        :param int limit: number of checked items in FIRST and SAMPLE modes.
+        """
 
-        target = joinpoint.target
+        checks = tuple(
+            Types.validator(expected_type, checking=checking, limit=limit)
+            for expected_type in expected_types
+        )
 
-        args = joinpoint.args
-        kwargs = joinpoint.kwargs
+        def result(value):
+            """Check values with one of several validators."""
 
-        self.kwargs.update(kwargs)
-        self.args += args
+            if value is None:
+                return True
 
-        try:
-            # check if all arguments are given
-            getcallargs(target, *self.args, **self.kwargs)
-            joinpoint.args = self.args
-            joinpoint.kwargs = self.kwargs
-            result = joinpoint.proceed()
-        except TypeError as ex:
-            # in case of problem, returns curried decorater and exception
-            result = Curried.CurriedResult(self, ex)
+            for check in checks:
+                if check(value):
+                    return True
+
+            return False
 
         return result
 
+    @staticmethod
+    def _genericvalidator(origin, args, checking=None, limit=None):
+        """Compile a validator of typing generic types.
 
-def curried(*args, **kwargs):
-    """Curried annotation with varargs and kwargs.
-    """
+        Items of tuples, sequences, sets and mappings are checked with the
+        container checking mode. Other generic types only check the origin
+        type.
 
-    return Curried(varargs=args, keywords=kwargs)
+        :param origin: runtime origin of the generic type.
+        :param tuple args: generic type arguments.
+        :param str checking: container checking mode.
+        :param int limit: number of checked items in FIRST and SAMPLE modes.
+        """
 
+        if TypeVar is not None and all(
+                isinstance(arg, TypeVar) for arg in args
+        ):
+            args = ()  # not parameterized generic type
 
-def example_exc_handler(tries_remaining, exception, delay):
-    """Example exception handler; prints a warning to stderr.
+        if Union is not None and origin is Union:
+            result = Types._unionvalidator(
+                tuple(arg for arg in args if arg is not type(None)),
+                checking=checking, limit=limit
+            )
 
-    tries_remaining: The number of tries remaining.
-    exception: The exception instance which was raised.
-    """
+        elif not isclass(origin):  # special forms such as Literal
+            def result(value):
+                """Check any value."""
 
-    print >> stderr, "Caught '{0}', {1} tries remaining, \
-    sleeping for {2} seconds".format(exception, tries_remaining, delay)
+                return True
 
+        elif not args:
+            def result(value):
+                """Check value origin type."""
 
-class Retries(PrivateInterceptor):
-    """Function decorator implementing retrying logic.
+                return value is None or isinstance(value, origin)
 
-    condition: retry condition, among execution success or failure or both.
-    delay: Sleep this many seconds * backoff * try number after failure
-    backoff: Multiply delay by this factor after each failure
-    exceptions: A tuple of exception classes; default (Exception,)
-    hook: A function with the signature myhook(data, condition, tries_remaining
-    , mydelay) where data is result function or raised Exception, condition is
-    ON_ERROR or ON_SUCCESS depending on error or success execution function,
-    tries_remaining is tries remaining, and finally, mydelay is waiting seconds
-    between calls; default None.
+        elif issubclass(origin, tuple) and not (
+                len(args) == 2 and args[1] is Ellipsis
+        ):
+            if args == ((),):  # empty tuple
+                args = ()
 
-    The decorator will call the function up to max_tries times if it raises
-    an exception or if it simply execute the function, depending on state
-    condition.
+            checks = tuple(
+                Types.validator(arg, checking=checking, limit=limit)
+                for arg in args
+            )
 
-    By default it catches instances of the Exception class and subclasses.
-    This will recover after all but the most fatal errors. You may specify a
-    custom tuple of exception classes with the 'exceptions' argument; the
-    function will only be retried if it raises one of the specified
-    exceptions.
+            def result(value):
+                """Check tuple items one by one."""
 
-    Additionally you may specify a hook function which will be called prior
-    to retrying with the number of remaining tries and the exception instance;
+                if value is None:
+                    return True
+
+                if not isinstance(value, origin) or len(value) != len(checks):
+                    return False
+
+                for check, item in zip(checks, value):
+                    if not check(item):
+                        return False
+
+                return True
+
+        elif issubclass(origin, Mapping) and len(args) == 2:
+            checkkey, checkvalue = (
+                Types.validator(arg, checking=checking, limit=limit)
+                for arg in args
+            )
+            checkeditems = Types._checkeditems
+
+            def result(value):
+                """Check mapping keys and values."""
+
+                if value is None:
+                    return True
+
+                if not isinstance(value, origin):
+                    return False
+
+                for key in checkeditems(value, checking, limit):
+                    if not (checkkey(key) and checkvalue(value[key])):
+                        return False
+
+                return True
+
+        elif issubclass(origin, (tuple, Sequence, Set)) and not issubclass(
+                origin, string_types
+        ):
+            result = Types._containervalidator(
+                origin, args[0], checking=checking, limit=limit
+            )
+
+        else:
+            def result(value):
+                """Check value origin type."""
+
+                return value is None or isinstance(value, origin)
+
+        return result
+
+    @staticmethod
+    def _containervalidator(
+            container_type, item_type, checking=None, limit=None
+    ):
+        """Compile a validator of containers.
+
+        :param type container_type: expected container type (list or set).
+        :param item_type: expected item type specification.
+        :param str checking: container checking mode.
+        :param int limit: number of checked items in FIRST and SAMPLE modes.
+        """
+
+        checkeditems = Types._checkeditems
+
+        if _isplain(item_type):
+
+            def result(value):
+                """Check container items with isinstance."""
+
+                if value is None:
+                    return True
+
+                if not isinstance(value, container_type):
+                    return False
+
+                for item in checkeditems(value, checking, limit):
+                    if item is not None and not isinstance(item, item_type):
+                        return False
+
+                return True
+
+        else:
+            check = Types.validator(item_type, checking=checking, limit=limit)
+
+            def result(value):
+                """Check container items with an item validator."""
+
+                if value is None:
+                    return True
+
+                if not isinstance(value, container_type):
+                    return False
+
+                for item in checkeditems(value, checking, limit):
+                    if not check(item):
+                        return False
+
+                return True
+
+        return result
+
+    @staticmethod
+    def _checkeditems(value, checking, limit):
+        """Get container items to check without copying the container.
+
+        Random samples of sequences are chosen in constant time by index.
+        Unordered containers (sets and mappings) can not be indexed, and
+        skipping items to a random position would cost O(n), therefore their
+        first items are checked instead.
+
+        :param value: container to check.
+        :param str checking: container checking mode.
+        :param int limit: number of checked items in FIRST and SAMPLE modes.
+        :return: iterable of items to check.
+        """
+
+        if checking is None:
+            checking = Types.default_checking
+
+        if checking == Types.FULL:
+            result = value
+
+        elif checking == Types.OFF:
+            result = ()
+
+        else:
+            if limit is None:
+                limit = Types.default_limit
+
+            length = len(value)
+
+            if length <= limit:
+                result = value
+
+            elif checking == Types.SAMPLE and isinstance(value, Sequence):
+                result = (value[randrange(length)] for _ in range(limit))
+
+            else:  # FIRST mode or unordered containers
+                result = islice(value, limit)
+
+        return result
+
+    @staticmethod
+    def check_value(value, expected_type):
+        """Check Types parameters."""
+
+        return Types.validator(expected_type)(value)
+
+    def _bind_target(self, target, ctx=None, *args, **kwargs):
+
+        if self.annotations:
+            self._annotate(target)
+
+        # compute parameter bindings before target code is intercepted
+        self._getbinding(target)
+
+        return super(Types, self)._bind_target(
+            target=target, ctx=ctx, *args, **kwargs
+        )
+
+    def _annotate(self, target):
+        """Complete rtype and ptypes with input target function annotations.
+
+        Annotations of varargs and keywords parameters become respectively
+        tuple and dict item types.
+        """
+
+        code = getattr(target, '__code__', None)
+
+        if code is None or not getattr(target, '__annotations__', None):
+            return
+
+        if get_type_hints is None:  # python < 3.5
+            hints = target.__annotations__
+
+        else:
+            try:  # the python 2 typing backport returns None
+                hints = get_type_hints(target) or target.__annotations__
+
+            except (NameError, TypeError):  # unresolved forward references
+                hints = target.__annotations__
+
+        hints = dict(
+            (name, hint) for name, hint in hints.items()
+            if Types._isspec(hint)
+        )
+
+        if self._rtype is None and 'return' in hints:
+            self.rtype = hints['return']
+
+        index = code.co_argcount + getattr(code, 'co_kwonlyargcount', 0)
+
+        if code.co_flags & CO_VARARGS:
+            name = code.co_varnames[index]
+            if name in hints:
+                hints[name] = None if Tuple is None else Tuple[
+                    hints[name], Ellipsis
+                ]
+            index += 1
+
+        if code.co_flags & CO_VARKEYWORDS:
+            name = code.co_varnames[index]
+            if name in hints:
+                hints[name] = None if Dict is None else Dict[
+                    str, hints[name]
+                ]
+
+        ptypes = dict(
+            (name, hint) for name, hint in hints.items()
+            if hint is not None and name != 'return' and
+            name not in self._ptypes
+        )
+
+        if ptypes:
+            ptypes.update(self._ptypes)
+            self.ptypes = ptypes
+
+    @staticmethod
+    def _isspec(hint):
+        """True iif input annotation is a type specification, in order to
+        ignore annotations which can not be validated once at bind time
+        rather than failing at every call."""
+
+        if isinstance(hint, (tuple, list, set)):
+            result = all(Types._isspec(item) for item in hint)
+
+        else:
+            result = (
+                isclass(hint) or _generic(hint) is not None or isinstance(
+                    hint, (Types.SpecialCondition, Types.Array)
+                ) or (Any is not None and hint is Any) or (
+                    TypeVar is not None and isinstance(hint, TypeVar)
+                )
+            )
+
+        return result
+
+    def _getbinding(self, target):
+        """Get the binding of checked parameters of input target.
+
+        A binding is a tuple of (name, kind, index, default, validator) by
+        checked parameter, where index is the positional index of a named
+        parameter, and default is its default value if it is valid (checked
+        once here), otherwise a private marker.
+
+        :return: target binding, or None if target is not a python function.
+        :rtype: tuple
+        """
+
+        code = getattr(target, '__code__', None)
+
+        if code is None:
+            return None
+
+        result = self._bindings.get(code)
+
+        if result is None:
+
+            argcount = code.co_argcount
+            kwonlyargcount = getattr(code, 'co_kwonlyargcount', 0)
+            names = code.co_varnames[:argcount + kwonlyargcount]
+
+            defaults = dict(
+                zip(names[argcount - len(target.__defaults__ or ()):argcount],
+                    target.__defaults__ or ())
+            )
+            defaults.update(getattr(target, '__kwdefaults__', None) or {})
+
+            index = argcount + kwonlyargcount
+            varargs = varkw = None
+
+            if code.co_flags & CO_VARARGS:
+                varargs = code.co_varnames[index]
+                index += 1
+
+            if code.co_flags & CO_VARKEYWORDS:
+                varkw = code.co_varnames[index]
+
+            result = []
+
+            for name, validator in self._pvalidators.items():
+
+                if name in names:
+                    index = names.index(name)
+                    default = defaults.get(name, _NODEFAULT)
+                    if default is not _NODEFAULT and not validator(default):
+                        default = _NODEFAULT
+                    result.append(
+                        (
+                            name, Types.NAMED,
+                            index if index < argcount else None,
+                            default, validator
+                        )
+                    )
+
+                elif name == varargs:
+                    result.append(
+                        (name, Types.VARARGS, names, None, validator)
+                    )
+
+                elif name == varkw:
+                    result.append(
+                        (name, Types.VARKW, names, None, validator)
+                    )
+
+            result = self._bindings[code] = tuple(result)
+
+        return result
+
+    def _interception(self, joinpoint):
+
+        target = joinpoint.target
+        args = joinpoint.args
+        kwargs = joinpoint.kwargs
+
+        if self._pvalidators:
+
+            binding = self._getbinding(target)
+
+            if binding is None:  # not a python function
+                callargs = getcallargs(target, *args, **kwargs)
+                binding = (
+                    (name, Types.NAMED, None, _NODEFAULT, validator)
+                    for name, validator in self._pvalidators.items()
+                )
+                kwargs = callargs
+
+            for name, kind, index, default, validator in binding:
+
+                if kind is Types.NAMED:
+
+                    if name in kwargs:
+                        value = kwargs[name]
+
+                    elif index is not None and index < len(args):
+                        value = args[index]
+
+                    else:
+                        continue
+
+                    if value is default:
+                        continue  # valid default values are checked once
+
+                elif kind is Types.VARARGS:  # index contains named parameters
+                    value = args[
+                        len([_ for _ in index if _ not in kwargs]):
+                    ]
+
+                else:
+                    value = dict(
+                        item for item in kwargs.items() if item[0] not in index
+                    )
+
+                if not validator(value):
+                    raise Types.TypesError(
+                        "wrong typed parameter for arg {0} : {1} ({2}). \
+                        Expected: {3}."
+                        .format(
+                            name, value, type(value), self._ptypes[name]
+                        )
+                    )
+
+        result = joinpoint.proceed()
+
+        rvalidator = self._rvalidator
+
+        if rvalidator is not None and not rvalidator(result):
+            raise Types.TypesError(
+                "wrong result type for {0} with parameters {1}, {2}: {3} \
+                ({4}). Expected {5}."
+                .format(
+                    joinpoint.target, joinpoint.args, joinpoint.kwargs,
+                    result, type(result), self._rtype
+                )
+            )
+
+        ivalidator = self._ivalidator
+
+        if ivalidator is not None and not (
+                result is None or isstream(result)
+        ):
+            if iter(result) is result:
+                # proxy iterators with a stream which is intercepted lazily
+                result = (item for item in result)
+
+            else:  # containers are iterable again and checked at once
+                items = Types._checkeditems(
+                    result, self._checking, self._limit
+                ) if isinstance(result, Sized) else result
+
+                for item in items:
+                    if not ivalidator(item):
+                        raise Types.TypesError(
+                            "wrong result item type for {0} with parameters \
+                            {1}, {2}: {3} ({4}). Expected {5}."
+                            .format(
+                                joinpoint.target, joinpoint.args,
+                                joinpoint.kwargs, item, type(item),
+                                self._rtype
+                            )
+                        )
+
+        return result
+
+    def _item_interception(self, stream, item):
+
+        for validator, expected in (
+                (self._yvalidator, self._ytype),
+                (self._ivalidator, self._rtype)
+        ):
+            if validator is not None and not validator(item):
+                raise Types.TypesError(
+                    "wrong yielded item type for {0} with parameters {1}, \
+                    {2}: {3} ({4}). Expected {5}."
+                    .format(
+                        stream.target, stream.args, stream.kwargs, item,
+                        type(item), expected
+                    )
+                )
+
+        return item
+
+
+def types(*args, **kwargs):
+    """Quick alias for the Types Annotation with only args and kwargs
+    parameters.
+
+    :param tuple args: may contain rtype.
+    :param dict kwargs: may contain ptypes.
+    """
+
+    rtype = first(args)
+
+    return Types(rtype=rtype, ptypes=kwargs)
+
+
+class Curried(PrivateInterceptor):
+    """Annotation that returns a function that keeps returning functions
+    until all arguments are supplied; then the original function is
+    evaluated.
+
+    Inspirated from Jeff Laughlin Consulting LLC projects.
+    """
+
+    ARGS = 'args'  #: args attribute name
+    KWARGS = 'kwargs'  #: kwargs attribute name
+    DEFAULT_ARGS = 'default_args'  #: default args attribute name
+    DEFAULT_KWARGS = 'default_kwargs'  #: default kwargs attribute name
+
+    __slots__ = (
+        ARGS, KWARGS, DEFAULT_ARGS, DEFAULT_KWARGS
+    ) + PrivateInterceptor.__slots__
+
+    class CurriedResult(object):
+        """Curried result in case of missing arguments."""
+
+        __slots__ = ('curried', 'exception')
+
+        def __init__(self, curried, exception):
+
+            super(Curried.CurriedResult, self).__init__()
+
+            self.curried = curried
+            self.exception = exception
+
+    def __init__(self, varargs=None, keywords=None, *args, **kwargs):
+        """
+        :param tuple varargs: function call varargs.
+        :param dict keywords: function call keywords.
+        """
+
+        super(Curried, self).__init__(*args, **kwargs)
+
+        # initialize arguments
+        if varargs is None:
+            varargs = ()
+        if keywords is None:
+            keywords = {}
+        # set attributes
+        self.args = self.default_args = varargs
+        self.kwargs = self.default_kwargs = keywords
+
+    def _bind_target(self, target, *args, **kwargs):
+
+        @wraps(target)
+        def wrapper(*args, **kwargs):
+            """Target wrapper."""
+
+            return target(*args, **kwargs)
+
+        result = super(Curried, self)._bind_target(
+            target=wrapper, *args, **kwargs
+        )
+
+        return result
+
+    def _interception(self, joinpoint, *args, **kwargs):
+
+        result = None
+
+        target = joinpoint.target
+
+        args = joinpoint.args
+        kwargs = joinpoint.kwargs
+
+        self.kwargs.update(kwargs)
+        self.args += args
+
+        try:
+            # check if all arguments are given
+            getcallargs(target, *self.args, **self.kwargs)
+            joinpoint.args = self.args
+            joinpoint.kwargs = self.kwargs
+            result = joinpoint.proceed()
+        except TypeError as ex:
+            # in case of problem, returns curried decorater and exception
+            result = Curried.CurriedResult(self, ex)
+
+        return result
+
+
+def curried(*args, **kwargs):
+    """Curried annotation with varargs and kwargs.
+    """
+
+    return Curried(varargs=args, keywords=kwargs)
+
+
+def example_exc_handler(tries_remaining, exception, delay):
+    """Example exception handler; prints a warning to stderr.
+
+    tries_remaining: The number of tries remaining.
+    exception: The exception instance which was raised.
+    """
+
+    print >> stderr, "Caught '{0}', {1} tries remaining, \
+    sleeping for {2} seconds".format(exception, tries_remaining, delay)
+
+
+class Retries(PrivateInterceptor):
+    """Function decorator implementing retrying logic.
+
+    condition: retry condition, among execution success or failure or both.
+    delay: Sleep this many seconds * backoff * try number after failure
+    backoff: Multiply delay by this factor after each failure
+    exceptions: A tuple of exception classes; default (Exception,)
+    hook: A function with the signature myhook(data, condition, tries_remaining
+    , mydelay) where data is result function or raised Exception, condition is
+    ON_ERROR or ON_SUCCESS depending on error or success execution function,
+    tries_remaining is tries remaining, and finally, mydelay is waiting seconds
+    between calls; default None.
+
+    The decorator will call the function up to max_tries times if it raises
+    an exception or if it simply execute the function, depending on state
+    condition.
+
+    By default it catches instances of the Exception class and subclasses.
+    This will recover after all but the most fatal errors. You may specify a
+    custom tuple of exception classes with the 'exceptions' argument; the
+    function will only be retried if it raises one of the specified
+    exceptions.
+
+    Additionally you may specify a hook function which will be called prior
+    to retrying with the number of remaining tries and the exception instance;
     see given example. This is primarily intended to give the opportunity to
     log the failure. Hook is not called after failure if no retries remain.
     """
 
-    MAX_TRIES = 'max_tries'  #: max_tries attribute name.
-    DELAY = 'delay'  #: delay attribute name.
-    BACKOFF = 'backoff'  #: backoff attribute name.
-    EXCEPTIONS = 'exceptions'  #: exceptions attribute name.
-    HOOK = 'hook'  #: hook attribute name.
-    CONDITION = 'condition'  #: condition attribute name.
+    MAX_TRIES = 'max_tries'  #: max_tries attribute name.
+    DELAY = 'delay'  #: delay attribute name.
+    BACKOFF = 'backoff'  #: backoff attribute name.
+    EXCEPTIONS = 'exceptions'  #: exceptions attribute name.
+    HOOK = 'hook'  #: hook attribute name.
+    CONDITION = 'condition'  #: condition attribute name.
+
+    DEFAULT_DELAY = 1
+    DEFAULT_BACKOFF = 2
+    DEFAULT_EXCEPTIONS = (Exception,)
+
+    ON_ERROR = 1  #: on error retries condition.
+    ON_SUCCESS = 2  #: on success retries condition.
+    ALL = ON_ERROR | ON_SUCCESS  #: all retries condition.
+
+    __slots__ = (
+        MAX_TRIES, DELAY, BACKOFF, EXCEPTIONS, HOOK, CONDITION
+    ) + PrivateInterceptor.__slots__
+
+    def __init__(
+            self,
+            max_tries,
+            delay=DEFAULT_DELAY,
+            backoff=DEFAULT_BACKOFF,
+            exceptions=DEFAULT_EXCEPTIONS,
+            hook=None,
+            condition=ALL,
+            *args, **kwargs
+    ):
+
+        super(Retries, self).__init__(*args, **kwargs)
+
+        self.max_tries = max_tries
+        self.delay = delay
+        self.backoff = backoff
+        self.exceptions = exceptions
+        self.hook = hook
+        self.condition = condition
+
+    def _interception(self, joinpoint):
+
+        result = None
+
+        mydelay = self.delay
+
+        for tries_remaining in range(self.max_tries - 1, -1, -1):
+
+            try:
+                result = joinpoint.proceed()
+
+            except self.exceptions as ex:
+
+                mydelay = self._checkretry(
+                    mydelay=mydelay, condition=Retries.ON_ERROR, data=ex,
+                    tries_remaining=tries_remaining
+                )
+
+            else:
+
+                mydelay = self._checkretry(
+                    mydelay=mydelay, condition=Retries.ON_SUCCESS, data=result,
+                    tries_remaining=tries_remaining
+                )
+
+                if mydelay is None:
+                    break  # stop execution if mydelay is None
+
+        return result
+
+    def _checkretry(self, mydelay, condition, tries_remaining, data):
+        """Check if input parameters allow to retries function execution.
+
+        :param float mydelay: waiting delay between two execution.
+        :param int condition: condition to check with this condition.
+        :param int tries_remaining: tries remaining.
+        :param data: data to hook.
+        """
+
+        result = mydelay
+
+        if self.condition & condition and tries_remaining > 0:
+
+            # hook data with tries_remaining and mydelay
+            if self.hook is not None:
+                self.hook(data, condition, tries_remaining, mydelay)
+            # wait mydelay seconds
+            sleep(mydelay)
+            result *= self.backoff  # increment mydelay with this backoff
+
+        elif condition is Retries.ON_ERROR:
+            raise data  # raise data if no retries and on_error
+
+        else:  # else Nonify mydelay to prevent callee function to stop
+            result = None
+
+        return result
+
+
+class _Flight(object):
+    """Result (and its tags) or error of a call shared with concurrent
+    calls."""
+
+    __slots__ = ('event', 'result', 'tags', 'exc_info')
+
+    def __init__(self):
+
+        super(_Flight, self).__init__()
+
+        self.event = Event()
+        self.result = self.exc_info = None
+        self.tags = frozenset()
+
+
+_CALLS = local()  #: stack of tag sets of memoized calls by thread.
+
+
+def _calltags():
+    """Get the tag set of the current memoized call, or None."""
+
+    stack = getattr(_CALLS, 'stack', None)
+
+    return stack[-1] if stack else None
+
+
+def addtags(*tags):
+    """Report tags of the result of the current memoized call, such as tags
+    of data read by the target. Memoize.invalidate removes results with one
+    of input tags.
+
+    Tags of a memoized call are also tags of memoized calls in progress which
+    depend on it (in the same thread).
+
+    :param tags: hashable tags.
+    """
+
+    calltags = _calltags()
 
-    DEFAULT_DELAY = 1
-    DEFAULT_BACKOFF = 2
-    DEFAULT_EXCEPTIONS = (Exception,)
+    if calltags is not None:
+        calltags.update(tags)
 
-    ON_ERROR = 1  #: on error retries condition.
-    ON_SUCCESS = 2  #: on success retries condition.
-    ALL = ON_ERROR | ON_SUCCESS  #: all retries condition.
 
-    __slots__ = (
-        MAX_TRIES, DELAY, BACKOFF, EXCEPTIONS, HOOK, CONDITION
-    ) + PrivateInterceptor.__slots__
+def _tagged(func, *args, **kwargs):
+    """Call a function and collect tags reported with addtags.
+
+    :return: function result and tags.
+    :rtype: tuple
+    """
+
+    stack = getattr(_CALLS, 'stack', None)
+
+    if stack is None:
+        stack = _CALLS.stack = []
+
+    tags = set()
+    stack.append(tags)
+
+    try:
+        result = func(*args, **kwargs)
+
+    finally:
+        stack.pop()
+
+        if stack:  # calls in progress depend on tags
+            stack[-1].update(tags)
+
+    return result, frozenset(tags)
+
+
+class _TagIndex(object):
+    """Index of cache entries by tag, registered in the global invalidation
+    hub while it is used by a Memoize."""
+
+    __slots__ = ('lock', 'keys', '__weakref__')
+
+    def __init__(self, lock):
+
+        super(_TagIndex, self).__init__()
+
+        self.lock = lock
+        self.keys = {}  # cache by (cache id, key) by tag
+
+        _TAG_INDEXES[self] = None
+
+    def add(self, cache, key, tags):
+        """Index an entry with input tags."""
+
+        ckey = id(cache), key
+
+        for tag in tags:
+            self.keys.setdefault(tag, {})[ckey] = cache
+
+    def remove(self, cacheid, key, tags):
+        """Remove an entry from the index."""
+
+        ckey = cacheid, key
+
+        for tag in tags:
+            keys = self.keys.get(tag)
+
+            if keys is not None:
+                keys.pop(ckey, None)
+
+                if not keys:
+                    del self.keys[tag]
+
+    def invalidate(self, tag):
+        """Remove entries with input tag from their cache.
+
+        :return: number of removed entries.
+        :rtype: int
+        """
+
+        with self.lock:
+            keys = self.keys.pop(tag, {})
+
+            for (_, key), cache in keys.items():
+                cache.pop(key, None)
+
+        return len(keys)
+
+
+#: global invalidation hub of tag indexes (a WeakSet requires python 2.7).
+_TAG_INDEXES = WeakKeyDictionary()
+
+
+def invalidate(tag):
+    """Remove results with input tag from all Memoize caches.
+
+    :return: number of removed results.
+    :rtype: int
+    """
+
+    return sum(index.invalidate(tag) for index in list(_TAG_INDEXES))
+
+
+class _RefreshPool(object):
+    """Bounded pool of daemon threads which run tasks.
+
+    Tasks are dropped when the queue is full, and idle threads stop after IDLE
+    seconds."""
+
+    IDLE = 10  #: idle time in seconds before a thread stops.
+
+    __slots__ = ('workers', '_queue', '_lock', '_count')
+
+    def __init__(self, workers, size):
+        """
+        :param int workers: maximal number of threads.
+        :param int size: maximal number of waiting tasks.
+        """
+
+        super(_RefreshPool, self).__init__()
+
+        self.workers = workers
+        self._queue = Queue(size)
+        self._lock = Lock()
+        self._count = 0
+
+    def submit(self, task):
+        """Run a task in a thread.
+
+        :return: False if the queue is full and task is dropped.
+        :rtype: bool
+        """
+
+        try:
+            self._queue.put_nowait(task)
+
+        except Full:
+            return False
+
+        with self._lock:
+            if self._count < self.workers:
+                self._count += 1
+
+                thread = Thread(target=self._run)
+                thread.daemon = True
+                thread.start()
+
+        return True
+
+    def _run(self):
+        """Run tasks until the thread is idle."""
+
+        while True:
+            try:
+                task = self._queue.get(timeout=_RefreshPool.IDLE)
+
+            except Empty:
+                with self._lock:  # a task may have been submitted meanwhile
+                    if self._queue.empty():
+                        self._count -= 1
+                        break
+
+                continue
+
+            task()
+            del task  # do not retain parameters (an instance) while idle
+
+
+class Memoize(PrivateInterceptor):
+    """Save funtion results related to called parameters.
+
+    Keys, sizes and evictions:
+
+    Results are cached by a key of parameters given by a key function. The
+    default one (b3j0f.annotation.cache.makekey) is safe from hash collisions
+    and supports unhashable parameters (sequences, sets, mappings, buffers and
+    numpy arrays).
+
+    When the cache is full, entries are evicted by a policy among:
+
+    - LRU (default): least recently used entries.
+    - LFU: least frequently used entries.
+    - TTL: entries older than ttl seconds, then least recently used ones.
+
+    The in-process cache can be bounded by an estimated size in bytes of
+    entries (parameter max_bytes), and be shrunk by a
+    b3j0f.annotation.cache.RSSWatcher when the resident set size of the process
+    crosses a threshold (parameter watcher).
+
+    In instance mode (parameter instance), the first parameter of the target
+    (self of a method) is not part of keys and is not retained. Every instance
+    has its own cache, which is released when the instance is garbage
+    collected. Instances must be weak referenceable.
+
+    Results can be persisted and shared by processes with a backend (such as a
+    b3j0f.annotation.cache.SQLiteCache) behind the in-process cache.
+
+    Concurrency, freshness and tags:
+
+    In single flight mode, concurrent calls which miss the same key wait for
+    the result (or the error) of the first one instead of calling the target.
+    Calls in progress are registered in stripes of locks chosen by key hash,
+    therefore calls with unrelated keys hardly contend. A target must not call
+    itself recursively with the same parameters in this mode.
+
+    After a soft time to live (parameter soft_ttl), a cached result is stale:
+    it is still given to callers while a thread of a bounded pool calls the
+    target again in order to refresh it. The TTL policy time to live is then a
+    hard one after which callers wait for a new result. Refresh errors are
+    ignored and the stale result is kept.
+
+    Results can be tagged by a function of parameters (parameter tags) and by
+    the target with the function addtags, and be removed by tag with the
+    method invalidate, or from all memoizers with the function invalidate.
+
+    Errors and asyncio tasks:
+
+    Errors of chosen types (parameter errors) can be cached apart, during
+    error_ttl seconds, and raised again without calling the target (a failed
+    asyncio task is given again).
+
+    If the target returns a coroutine (async def) or a future, a shared
+    asyncio task is cached instead: concurrent awaiters of a key join the
+    running computation, and later ones get the result of the done task.
+    Callers get a shield of the task, which is not cancelled when one of
+    them is (by a timeout for example). Failed and cancelled tasks are removed
+    from the cache, unless failures is True. Tasks can not be stored in
+    backends (a ValueError is raised when a coroutine function is bound, or
+    when a coroutine or a future is returned), and tags reported by
+    coroutines are not collected.
+
+    Introspection:
+
+    getparams finds the parameters of a cached result by equality, or in
+    constant time by identity with a reverse index (parameter reverse).
+
+    Cache statistics are given by the method stats, and calls can be measured
+    by a handler as with the Instrument annotation."""
+
+    MAX_SIZE = 'max_size'  #: max size result.
+    POLICY = 'policy'  #: eviction policy attribute name.
+    SINGLE_FLIGHT = 'single_flight'  #: single flight mode attribute name.
+    KEYFUNC = 'keyfunc'  #: key function attribute name.
+    _CACHE = '_cache'  #: cache object which stores results and params.
+    _LOCK = '_lock'  #: lock of cache accesses and bookkeeping.
+    _STRIPES = '_stripes'  #: (lock, flights by key) stripes.
+    _INDEX = '_index'  #: (args, kwargs) by key by result id reverse index.
+    HANDLER = 'handler'  #: call measures handler attribute name.
+    INSTANCE = 'instance'  #: instance mode attribute name.
+    _CACHEKWARGS = '_cachekwargs'  #: cache parameters attribute name.
+    _INSTANCES = '_instances'  #: (ref, cache) by instance id attribute name.
+    _RELEASED = '_released'  #: ids of collected instances attribute name.
+    _WATCHER = '_watcher'  #: rss watcher attribute name.
+    SOFT_TTL = 'soft_ttl'  #: soft time to live attribute name.
+    _POOL = '_pool'  #: refresh pool attribute name.
+    _REFRESHING = '_refreshing'  #: (cache id, key) of refreshing entries.
+    TAGS = 'tags'  #: parameters tags function attribute name.
+    FAILURES = 'failures'  #: failed tasks caching attribute name.
+    ERRORS = 'errors'  #: cached error types attribute name.
+    _ERRORS = '_errors'  #: errors cache attribute name.
+    _ERRORLOCK = '_errorlock'  #: errors cache lock attribute name.
+    _ERRORHITS = '_errorhits'  #: number of raised cached errors.
+    _TAGINDEX = '_tagindex'  #: entries by tag attribute name.
+    _HITS = '_hits'  #: number of hits attribute name.
+    _MISSES = '_misses'  #: number of misses attribute name.
+    _JOINED = '_joined'  #: number of joined flights attribute name.
+
+    #: upper bounds in seconds of entry age histograms (None is infinite).
+    AGES = (1, 10, 60, 600, 3600, 86400, None)
+
+    LRU = 'lru'  #: least recently used eviction policy.
+    LFU = 'lfu'  #: least frequently used eviction policy.
+    TTL = 'ttl'  #: time to live eviction policy.
+
+    DEFAULT_MAX_SIZE = maxsize  #: default max size value.
+    DEFAULT_TTL = 60  #: default time to live in seconds of the TTL policy.
+    DEFAULT_STRIPES = 16  #: default number of single flight lock stripes.
+    DEFAULT_REFRESH_WORKERS = 4  #: default number of refresh threads.
+    DEFAULT_REFRESH_QUEUE = 64  #: default number of waiting refreshes.
+    DEFAULT_ERROR_TTL = 5  #: default time to live in seconds of errors.
+    DEFAULT_ERROR_MAX_SIZE = 1024  #: default max number of cached errors.
+
+    __slots__ = (
+        POLICY, SINGLE_FLIGHT, KEYFUNC, HANDLER, INSTANCE,
+        _CACHE, _LOCK, _STRIPES, _INDEX, _HITS, _MISSES, _CACHEKWARGS,
+        _INSTANCES, _RELEASED, _WATCHER, SOFT_TTL, _POOL, _REFRESHING, TAGS,
+        _TAGINDEX, FAILURES, ERRORS, _ERRORS, _ERRORLOCK, _ERRORHITS, _JOINED
+    ) + PrivateInterceptor.__slots__
+
+    def __init__(
+            self, max_size=DEFAULT_MAX_SIZE, policy=None, ttl=None,
+            single_flight=False, stripes=DEFAULT_STRIPES, keyfunc=makekey,
+            backend=None, reverse=False, sizeof=None, handler=None,
+            max_bytes=None, watcher=None, instance=False, soft_ttl=None,
+            refresh_workers=DEFAULT_REFRESH_WORKERS,
+            refresh_queue=DEFAULT_REFRESH_QUEUE, tags=None, failures=False,
+            errors=None, error_ttl=DEFAULT_ERROR_TTL,
+            error_max_size=DEFAULT_ERROR_MAX_SIZE, *args, **kwargs
+    ):
+        """
+        Keys, sizes and evictions:
+
+        :param keyfunc: function which takes in parameters called args and
+            kwargs, and returns a hashable key. Default is
+            b3j0f.annotation.cache.makekey.
+        :param int max_size: maximal number of cached results.
+        :param str policy: eviction policy among LRU, LFU and TTL. Default is
+            TTL if ttl is given, otherwise LRU.
+        :param float ttl: time to live in seconds of results with the TTL
+            policy. Default is DEFAULT_TTL.
+        :param sizeof: if True, estimate the memory footprint of entries
+            (parameters and result) with b3j0f.annotation.cache.sizeof, or with
+            this function which takes an entry in parameter.
+        :param int max_bytes: maximal estimated size in bytes of in-process
+            entries (sized with sizeof).
+        :param RSSWatcher watcher: resident set size watcher which shrinks the
+            in-process cache.
+        :param bool instance: if True (default False), cache results by
+            instance (first target parameter). Incompatible with backend.
+        :param backend: shared second level cache behind the in-process cache
+            whose max_size is given by max_size. Backend keys do not contain
+            the function identity, therefore Memoize namespaces them by target
+            module and qualified name, and one backend can be shared by several
+            functions (other users of a backend must use one cache name by
+            function). Entries are tuples, therefore a backend with a
+            serializer attribute must have a serializer. Entries which can not
+            be serialized are kept in process.
+
+        Concurrency, freshness and tags:
+
+        :param bool single_flight: if True (default False), concurrent calls
+            which miss the same key share the result of the first one.
+        :param int stripes: number of single flight lock stripes.
+        :param float soft_ttl: time in seconds after which cached results are
+            refreshed in background.
+        :param int refresh_workers: maximal number of refresh threads.
+        :param int refresh_queue: maximal number of waiting refreshes. Stale
+            results are not refreshed when the queue is full.
+        :param tags: function which takes in parameters called args and
+            kwargs, and returns an iterable of result tags.
+
+        Errors and asyncio tasks:
+
+        :param errors: exception type or tuple of exception types to cache.
+        :param float error_ttl: time to live in seconds of cached errors.
+        :param int error_max_size: maximal number of cached errors.
+        :param bool failures: if True (default False), failed asyncio tasks
+            stay cached.
+
+        Introspection:
+
+        :param bool reverse: if True (default False), maintain a reverse index
+            of cached results by identity, used by getparams. With a backend,
+            only results cached by this process are indexed.
+        :param handler: call measures handler which takes in parameters self
+            and a dict of measures (target, hit and key).
+        """
+
+        super(Memoize, self).__init__(*args, **kwargs)
+
+        if policy is None:
+            policy = Memoize.LRU if ttl is None else Memoize.TTL
+
+        if policy not in POLICIES:
+            raise ValueError('Wrong eviction policy {0}.'.format(policy))
+
+        if instance and backend is not None:
+            raise ValueError('Instance mode does not support backends.')
+
+        if getattr(backend, 'serializer', True) is None:
+            raise ValueError('Backends without serializer store bytes only.')
+
+        self.policy = policy
+
+        if sizeof is True or (sizeof is None and max_bytes is not None):
+            sizeof = _sizeof
+
+        self._cachekwargs = {
+            'max_size': max_size, 'sizeof': sizeof or None,
+            'max_bytes': max_bytes
+        }
+
+        if policy == Memoize.TTL:
+            self._cachekwargs['ttl'] = (
+                Memoize.DEFAULT_TTL if ttl is None else ttl
+            )
+
+        self._index = {} if reverse else None
+        self._watcher = watcher
+        self.instance = instance
+        self.tags = tags
+        self.failures = failures
+        self.errors = errors
+        self._errorhits = 0
+
+        if errors is None:
+            self._errors = self._errorlock = None
+
+        else:
+            self._errors = TTLCache(max_size=error_max_size, ttl=error_ttl)
+            self._errorlock = Lock()
+
+        # thread-safe backends do not protect self bookkeeping (counters,
+        # indexes and refreshes), therefore self lock is always a real lock
+        self._lock = Lock()
+
+        if instance:
+            self._cache = None
+            self._instances = {}
+            self._released = []
+
+        else:
+            self._cache = self._newcache(backend)
+
+            if watcher is not None:
+                watcher.watch(self._cache, self._lock)
+
+        self._tagindex = _TagIndex(self._lock)
+
+        self.soft_ttl = soft_ttl
+        self._pool = None if soft_ttl is None else _RefreshPool(
+            refresh_workers, refresh_queue
+        )
+        self._refreshing = set()
+
+        self._hits = self._misses = self._joined = 0
+        self.handler = handler
+        self.single_flight = single_flight
+        self.keyfunc = keyfunc
+        self._stripes = tuple((Lock(), {}) for _ in range(stripes))
+
+    def __del__(self):
+
+        try:  # stop to watch self caches
+            if self._watcher is not None:
+                with self._lock:
+                    caches = self._caches()
+
+                for cache in caches:
+                    self._watcher.unwatch(cache)
+
+        except AttributeError:  # raised if self is not fully initialized
+            pass
+
+        super(Memoize, self).__del__()
+
+    @property
+    def max_size(self):
+        """Get the maximal number of cached results (by instance in instance
+        mode)."""
+
+        return self._cachekwargs['max_size']
+
+    @max_size.setter
+    def max_size(self, value):
+        """Change the maximal number of cached results, and evict exceeding
+        ones."""
+
+        with self._lock:
+            for cache in self._caches():
+                cache.max_size = value
+
+            self._cachekwargs['max_size'] = value
+
+    @property
+    def max_bytes(self):
+        """Get the maximal estimated size in bytes of in-process entries (by
+        instance in instance mode)."""
+
+        return self._cachekwargs['max_bytes']
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        """Change the maximal estimated size in bytes of in-process entries,
+        and evict exceeding ones."""
+
+        if value is not None and self._cachekwargs['sizeof'] is None:
+            raise ValueError('Entries are not sized (see sizeof).')
+
+        with self._lock:
+            for cache in self._caches():
+                cache.max_bytes = value
+
+            self._cachekwargs['max_bytes'] = value
+
+    def _bind_target(self, target, *args, **kwargs):
+
+        if iscoroutinefunction(target) and isinstance(
+                self._cache, TieredCache
+        ):
+            raise ValueError('Backends do not support asyncio tasks.')
+
+        return super(Memoize, self)._bind_target(target, *args, **kwargs)
+
+    def _newcache(self, backend=None):
+        """Create a cache with self parameters.
+
+        :param backend: second level cache.
+        """
+
+        result = POLICIES[self.policy](**self._cachekwargs)
+
+        if backend is not None:
+            result = TieredCache(result, backend)
+
+        result.onremove = partial(self._onremove, id(result))
+
+        return result
+
+    def _caches(self):
+        """Get caches (one per living instance in instance mode)."""
+
+        if self.instance:
+            result = [cache for _, cache in self._instances.values()]
+
+        else:
+            result = [self._cache]
+
+        return result
+
+    def _instancecache(self, instance):
+        """Get the cache of input instance, and release caches of collected
+        instances.
+
+        Caches are released lazily because weak reference callbacks can be
+        called while self lock is acquired by the current thread.
+        """
+
+        iid = id(instance)
+
+        with self._lock:
+            released = self._released
+
+            while released:
+                rid = released.pop()
+                item = self._instances.get(rid)
+
+                if item is not None and item[0]() is None:
+                    del self._instances[rid]
+                    self._release(item[1])
+
+            item = self._instances.get(iid)
+
+            if item is None or item[0]() is not instance:
+                if item is not None:  # id of a collected instance
+                    self._release(item[1])
+
+                cache = self._newcache()
+                self._instances[iid] = (
+                    ref(instance, lambda _, iid=iid: released.append(iid)),
+                    cache
+                )
+
+                if self._watcher is not None:
+                    self._watcher.watch(cache, self._lock)
+
+            else:
+                cache = item[1]
+
+        return cache
+
+    def _release(self, cache):
+        """Release the cache of a collected instance."""
+
+        if self._watcher is not None:
+            self._watcher.unwatch(cache)
+
+        cache.clear()
+
+    def _getkey(self, args, kwargs, target=None):
+        """Get cache key from args and kwargs with self keyfunc.
+
+        With a backend, keys are namespaced by the target module and
+        qualified name, since backends are shared by functions.
 
-    def __init__(
-            self,
-            max_tries,
-            delay=DEFAULT_DELAY,
-            backoff=DEFAULT_BACKOFF,
-            exceptions=DEFAULT_EXCEPTIONS,
-            hook=None,
-            condition=ALL,
-            *args, **kwargs
-    ):
+        :param tuple args: called vargs.
+        :param dict kwargs: called keywords.
+        :param target: called target.
+        :return: hashable key."""
 
-        super(Retries, self).__init__(*args, **kwargs)
+        result = self.keyfunc(args, kwargs)
 
-        self.max_tries = max_tries
-        self.delay = delay
-        self.backoff = backoff
-        self.exceptions = exceptions
-        self.hook = hook
-        self.condition = condition
+        if target is not None and isinstance(self._cache, TieredCache):
+            result = (
+                target.__module__,
+                getattr(target, '__qualname__', target.__name__),
+                result
+            )
+
+        return result
 
     def _interception(self, joinpoint):
 
         result = None
 
-        mydelay = self.delay
+        _cache, args, kwargs = self._resolve(joinpoint)
 
-        for tries_remaining in range(self.max_tries - 1, -1, -1):
+        key = self._getkey(args, kwargs, joinpoint.target)
 
-            try:
-                result = joinpoint.proceed()
+        error = None
 
-            except self.exceptions as ex:
+        tiered = isinstance(_cache, TieredCache)
+        entry = self._get(_cache, key) if tiered else None
 
-                mydelay = self._checkretry(
-                    mydelay=mydelay, condition=Retries.ON_ERROR, data=ex,
-                    tries_remaining=tries_remaining
-                )
+        with self._lock:
+            if not tiered:
+                entry = _cache.get(key)
+
+            if entry is None and self._errors is not None:
+                error = self._geterror(_cache, key)
+
+            if entry is None and error is None:
+                self._misses += 1
 
             else:
+                self._hits += 1
+
+        if self.handler is not None:
+            self.handler(
+                self,
+                {
+                    'target': joinpoint.target,
+                    'hit': entry is not None or error is not None,
+                    'key': key
+                }
+            )
 
-                mydelay = self._checkretry(
-                    mydelay=mydelay, condition=Retries.ON_SUCCESS, data=result,
-                    tries_remaining=tries_remaining
-                )
+        if error is not None:
+            if isinstance(error, BaseException):
+                raise error
 
-                if mydelay is None:
-                    break  # stop execution if mydelay is None
+            return shield(error)  # failed task
+
+        if entry is not None:
+            result = entry[2]
+
+            if entry[4]:
+                addtags(*entry[4])
+
+            if self.soft_ttl is not None and (
+                    time() - entry[3] >= self.soft_ttl
+            ):
+                self._revalidate(joinpoint, _cache, key, entry)
+
+        elif self.single_flight:
+            result = self._flight(joinpoint, _cache, key, args, kwargs)
+
+        else:
+            result, tags = self._proceed(joinpoint, _cache, key)
+            self._set(_cache, key, args, kwargs, result, tags)
+
+        if isfuture(result):
+            # the cached task is shared by awaiters, and must not be
+            # cancelled by one of them (on a timeout for example)
+            result = shield(result)
 
         return result
 
-    def _checkretry(self, mydelay, condition, tries_remaining, data):
-        """Check if input parameters allow to retries function execution.
+    def _proceed(self, joinpoint, cache, key):
+        """Proceed a missed call, and schedule a returned coroutine or future
+        in an asyncio task.
 
-        :param float mydelay: waiting delay between two execution.
-        :param int condition: condition to check with this condition.
-        :param int tries_remaining: tries remaining.
-        :param data: data to hook.
+        :return: result and tags reported by the target.
+        :rtype: tuple
         """
 
-        result = mydelay
+        try:
+            result, tags = _tagged(joinpoint.proceed)
 
-        if self.condition & condition and tries_remaining > 0:
+        except self.errors or ():
+            self._seterror(cache, key, exc_info())
+            raise
 
-            # hook data with tries_remaining and mydelay
-            if self.hook is not None:
-                self.hook(data, condition, tries_remaining, mydelay)
-            # wait mydelay seconds
-            sleep(mydelay)
-            result *= self.backoff  # increment mydelay with this backoff
+        if iscoroutine(result) or isfuture(result):
+            if isinstance(cache, TieredCache):
+                if iscoroutine(result):
+                    result.close()  # avoid a never awaited warning
 
-        elif condition is Retries.ON_ERROR:
-            raise data  # raise data if no retries and on_error
+                raise ValueError('Backends do not support asyncio tasks.')
 
-        else:  # else Nonify mydelay to prevent callee function to stop
-            result = None
+            result = ensure_future(result)
+            result.add_done_callback(partial(self._landed, cache, key))
+
+        return result, tags
+
+    def _landed(self, cache, key, task):
+        """Remove a cancelled task, or a failed task if failures are not
+        cached. A failed task with a cached error type is cached with
+        errors."""
+
+        if task.cancelled() or (
+                not self.failures and task.exception() is not None
+        ):
+            with self._lock:
+                entry = cache.get(key)
+
+                if entry is not None and entry[2] is task:
+                    cache.pop(key)
+
+            if self.errors and not task.cancelled() and isinstance(
+                    task.exception(), self.errors
+            ):
+                self._seterror(cache, key, task)
+
+    def _geterror(self, cache, key):
+        """Get a cached error.
+
+        Errors are keyed by their cache instead of its id, which can be reused
+        by the cache of another instance once the former is released.
+
+        :return: new copy of a cached exception, failed task or None.
+        """
+
+        with self._errorlock:
+            result = self._errors.get((cache, key))
+
+            if result is not None:
+                self._errorhits += 1
+
+        if isinstance(result, BaseException):
+            # a new exception per raise keeps the cached one free from
+            # tracebacks and contexts of callers
+            result = copy(result)
 
         return result
 
+    def _seterror(self, cache, key, error):
+        """Cache a raised error from its exc_info, or a failed task.
 
-class Memoize(PrivateInterceptor):
-    """Save funtion results related to called parameters.
+        Raised errors are cached without their traceback, and errors which
+        can not be copied (because of their constructor) are not cached.
+        """
 
-    Parameters must be hashable."""
+        if isinstance(error, tuple):  # exc_info
+            try:
+                error = copy(error[1])
 
-    MAX_SIZE = 'max_size'  #: max size result.
-    _CACHE = '_cache'  #: cache object which stores results and params.
+            except Exception:
+                return
 
-    DEFAULT_MAX_SIZE = maxsize  #: default max size value.
+        with self._errorlock:
+            self._errors.set((cache, key), error)
 
-    __slots__ = (MAX_SIZE, _CACHE) + PrivateInterceptor.__slots__
+    def _revalidate(self, joinpoint, cache, key, entry):
+        """Refresh a stale entry in background, unless it is already being
+        refreshed."""
 
-    def __init__(self, max_size=DEFAULT_MAX_SIZE, *args, **kwargs):
+        rkey = id(cache), key
 
-        super(Memoize, self).__init__(*args, **kwargs)
+        with self._lock:
+            if rkey in self._refreshing:
+                return
 
-        self.max_size = max_size
-        self._cache = {}
+            self._refreshing.add(rkey)
 
-    def _getkey(self, args, kwargs):
-        """Get hash key from args and kwargs.
+        if isfuture(entry[2]):  # refreshed by the event loop
+            task = ensure_future(joinpoint.proceed())
+            task.add_done_callback(
+                partial(self._refreshed, rkey, cache, entry)
+            )
 
-        args and kwargs must be hashable.
+            return
 
-        :param tuple args: called vargs.
-        :param dict kwargs: called keywords.
-        :return: hash(tuple(args) + tuple((key, val) for key in sorted(kwargs)).
-        :rtype: int."""
+        task = partial(
+            self._refresh, rkey, joinpoint.target, joinpoint.args,
+            dict(joinpoint.kwargs), cache, entry
+        )
 
-        values = list(args)
+        if not self._pool.submit(task):
+            with self._lock:
+                self._refreshing.discard(rkey)
 
-        keys = sorted(list(kwargs))
+    def _refresh(self, rkey, target, args, kwargs, cache, entry):
+        """Call target and cache the new result of a stale entry."""
 
-        for key in keys:
-            values.append((key, kwargs[key]))
+        try:
+            result, tags = _tagged(target, *args, **kwargs)
 
-        result = hash(tuple(values))
+        except Exception:
+            pass  # the stale result is kept
 
-        return result
+        else:
+            self._set(cache, rkey[1], entry[0], entry[1], result, tags)
 
-    def _interception(self, joinpoint):
+        finally:
+            with self._lock:
+                self._refreshing.discard(rkey)
 
-        result = None
+    def _refreshed(self, rkey, cache, entry, task):
+        """Cache the done task of a stale task, unless it failed."""
+
+        try:
+            if not task.cancelled() and task.exception() is None:
+                self._set(cache, rkey[1], entry[0], entry[1], task, entry[4])
+
+        finally:
+            with self._lock:
+                self._refreshing.discard(rkey)
+
+    def _resolve(self, joinpoint):
+        """Get the cache and the parameters of a call.
+
+        :return: cache, args and kwargs (without the instance in instance
+            mode).
+        :rtype: tuple
+        """
 
         args = joinpoint.args
         kwargs = joinpoint.kwargs
-        key = self._getkey(args, kwargs)
 
-        _cache = self._cache
+        if self.instance:
+            code = get_function_code(joinpoint.target)
 
-        if key in _cache:
-            _, _, result = _cache[key]
+            if code.co_argcount:
+                kwargs = kwargs.copy()
+                instance = kwargs.pop(code.co_varnames[0])
+
+            else:
+                instance, args = args[0], args[1:]
+
+            cache = self._instancecache(instance)
 
         else:
-            result = joinpoint.proceed()
+            cache = self._cache
+
+        return cache, args, kwargs
+
+    def _get(self, cache, key):
+        """Get the entry of input key.
+
+        The backend of a tiered cache is read out of the lock (it has its own
+        one), and found entries are copied in the first level.
+        """
+
+        if isinstance(cache, TieredCache):
+            with self._lock:
+                result = cache.l1.get(key)
+
+            if result is None:
+                result = cache.load(key)
+
+                if result is not None:
+                    with self._lock:
+                        cache.l1.set(key, result)
+
+        else:
+            with self._lock:
+                result = cache.get(key)
+
+        return result
+
+    def _set(self, cache, key, args, kwargs, result, tags=frozenset()):
+        """Cache a result with its creation time and tags, and index it.
+
+        :param frozenset tags: tags reported by the target.
+        """
+
+        if self.tags is not None:
+            tags = tags.union(self.tags(args, kwargs))
+
+        entry = args, kwargs, result, time(), tags
+
+        if isinstance(cache, TieredCache):
+            cache.store(key, entry)  # out of the lock
+            l1 = cache.l1
+
+        else:
+            l1 = cache
+
+        with self._lock:
+            l1.set(key, entry)
 
-            if len(self._cache) < self.max_size:
-                _cache[key] = (args, kwargs, result)
+            if key in l1:
+                _index = self._index
+
+                if _index is not None:
+                    _index.setdefault(id(result), {})[id(cache), key] = (
+                        args, kwargs
+                    )
+
+                if tags:
+                    self._tagindex.add(cache, key, tags)
+
+    def _onremove(self, cacheid, key, entry):
+        """Remove a cache entry from the reverse index and the tag index."""
+
+        _index = self._index
+
+        if _index is not None:
+            keys = _index.get(id(entry[2]))
+
+            if keys is not None:
+                keys.pop((cacheid, key), None)
+
+                if not keys:
+                    del _index[id(entry[2])]
+
+        if entry[4]:
+            self._tagindex.remove(cacheid, key, entry[4])
+
+    def invalidate(self, *tags):
+        """Remove cached results with one of input tags, in time proportional
+        to the number of removed results.
+
+        :return: number of removed results.
+        :rtype: int
+        """
+
+        return sum(self._tagindex.invalidate(tag) for tag in tags)
+
+    def stats(self):
+        """Get cache statistics.
+
+        :return: dict with:
+
+            - hits: number of calls which found a cached result or error.
+            - errors: number of hits which raised a cached error.
+            - misses: number of calls which did not find a cached result.
+            - joined: number of misses which joined a concurrent call of
+              their key in single flight mode.
+            - evictions: number of evicted (or expired) results.
+            - entries: number of cached results.
+            - bytes: estimated size of in-process entries (None without
+              sizeof).
+            - ages: number of in-process entries by age upper bound in
+              seconds (see AGES).
+        :rtype: dict
+        """
+
+        with self._lock:
+            caches = self._caches()
+
+            result = {
+                'hits': self._hits,
+                'errors': self._errorhits,
+                'misses': self._misses,
+                'joined': self._joined,
+                'evictions': sum(cache.evictions for cache in caches),
+                'entries': sum(len(cache) for cache in caches),
+                'bytes': (
+                    None if self._cachekwargs['sizeof'] is None
+                    else sum(cache.bytes for cache in caches)
+                )
+            }
+            items = [item for cache in caches for item in cache.items()]
+
+        now = time()
+        ages = result['ages'] = dict((bound, 0) for bound in Memoize.AGES)
+
+        for _, entry in items:
+            age = now - entry[3]
+
+            for bound in Memoize.AGES:
+                if bound is None or age < bound:
+                    ages[bound] += 1
+                    break
+
+        return result
+
+    def _flight(self, joinpoint, cache, key, args, kwargs):
+        """Proceed a missed call once for all concurrent calls of input key.
+
+        :return: call result.
+        """
+
+        lock, flights = self._stripes[hash(key) % len(self._stripes)]
+        fkey = id(cache), key
+
+        with lock:
+            flight = flights.get(fkey)
+
+            if flight is None:
+                entry = self._get(cache, key)  # a flight may have landed
+
+                if entry is not None:
+                    addtags(*entry[4])
+
+                    return entry[2]
+
+                flight = flights[fkey] = _Flight()
+                leader = True
+
+            else:
+                leader = False
+
+                with self._lock:
+                    self._joined += 1
+
+        if leader:
+            try:
+                result, tags = self._proceed(joinpoint, cache, key)
+                flight.result, flight.tags = result, tags
+
+                self._set(cache, key, args, kwargs, result, tags)
+
+            except BaseException:
+                flight.exc_info = exc_info()
+                raise
+
+            finally:
+                with lock:
+                    del flights[fkey]
+
+                flight.event.set()
+
+        else:
+            flight.event.wait()
+
+            if flight.exc_info is not None:
+                reraise(*flight.exc_info)
+
+            result = flight.result
+            addtags(*flight.tags)
 
         return result
 
@@ -557,18 +2501,247 @@ class Memoize(PrivateInterceptor):
 
         :param result: cached result.
         :raises: ValueError if result is not cached.
-        :return: args and kwargs registered with input result.
+        :return: args and kwargs registered with input result (by identity
+            if a reverse index is maintained, otherwise by equality), without
+            the instance in instance mode.
         :rtype: tuple"""
 
-        for key in self._cache:
-            if self._cache[key][2] == result:
-                args, kwargs, _ = self._cache[key]
+        if self._index is not None:
+            with self._lock:
+                keys = self._index.get(id(result))
+
+                if keys:
+                    return next(iter(keys.values()))
+
+            raise ValueError('Result is not cached')
+
+        with self._lock:
+            items = [
+                item for cache in self._caches() for item in cache.items()
+            ]
+
+        for _, (args, kwargs, value, _, _) in items:
+            if value == result:
                 return args, kwargs
 
         else:
             raise ValueError('Result is not cached')
 
     def clearcache(self):
-        """Clear cache."""
+        """Clear cache (statistics are kept)."""
+
+        with self._lock:
+            for cache in self._caches():
+                cache.clear()
+
+        if self._errors is not None:
+            with self._errorlock:
+                self._errors.clear()
+
+
+class MemoizeMany(Memoize):
+    """Save results of batch functions element by element.
+
+    A batch function takes a sequence of elements in a batch parameter and
+    returns the list of their results in the same order (such as
+    fetch_many(ids)). Cached results are served, and the target is called
+    once with the sequence of missing elements only, whatever the batch
+    they came from. Results are merged in the order of called elements.
+
+    Results are cached by a key of the element and of other parameters. The
+    single flight mode, soft time to live and cached errors are not
+    supported.
+
+    Call measures contain the target and the numbers of element hits and
+    misses."""
+
+    PARAM = 'param'  #: batch parameter name attribute name.
+
+    __slots__ = (PARAM,) + Memoize.__slots__
+
+    def __init__(self, param=None, *args, **kwargs):
+        """
+        :param str param: batch parameter name. Default is the first target
+            parameter, after the instance in instance mode, and after a first
+            parameter named self or cls.
+        """
+
+        super(MemoizeMany, self).__init__(*args, **kwargs)
+
+        if self.single_flight or self.soft_ttl is not None or self.errors:
+            raise ValueError(
+                'MemoizeMany does not support single flight, soft ttl and '
+                'errors.'
+            )
+
+        self.param = param
 
-        self._cache.clear()
+    def _interception(self, joinpoint):
+
+        _cache, args, kwargs = self._resolve(joinpoint)
+
+        param = self.param
+
+        if param is None:
+            code = get_function_code(joinpoint.target)
+            param = code.co_varnames[0]
+
+            if self.instance or param in ('self', 'cls'):  # bound parameter
+                param = code.co_varnames[1]
+
+        kwargs = kwargs.copy()
+        batch = kwargs.pop(param)
+
+        if not isinstance(batch, Sequence):  # iterators are consumed once
+            batch = list(batch)
+
+        keys = [
+            self._getkey((element,), kwargs, joinpoint.target)
+            for element in batch
+        ]
+
+        if isinstance(_cache, TieredCache):
+            entries = [self._get(_cache, key) for key in keys]
+
+        else:
+            with self._lock:
+                entries = [_cache.get(key) for key in keys]
+
+        missing = {}  # element indexes by missing key
+
+        for index, (key, entry) in enumerate(zip(keys, entries)):
+            if entry is None:
+                missing.setdefault(key, []).append(index)
+
+        misses = sum(len(indexes) for indexes in missing.values())
+
+        with self._lock:
+            self._hits += len(keys) - misses
+            self._misses += misses
+
+        if self.handler is not None:
+            self.handler(
+                self,
+                {
+                    'target': joinpoint.target, 'hits': len(keys) - misses,
+                    'misses': misses
+                }
+            )
+
+        result = []
+
+        for entry in entries:
+            if entry is None:
+                result.append(None)
+
+            else:
+                result.append(entry[2])
+                addtags(*entry[4])
+
+        if missing:
+            indexes = [indexes[0] for indexes in missing.values()]
+            indexes.sort()
+            elements = [batch[index] for index in indexes]
+
+            if isinstance(batch, tuple):
+                elements = tuple(elements)
+
+            joinpoint.kwargs = dict(joinpoint.kwargs)
+            joinpoint.kwargs[param] = elements
+            values, tags = _tagged(joinpoint.proceed)
+            values = list(values)
+
+            if len(values) != len(elements):
+                raise ValueError(
+                    'Wrong number of results {0} for {1} elements.'.format(
+                        len(values), len(elements)
+                    )
+                )
+
+            for index, element, value in zip(indexes, elements, values):
+                key = keys[index]
+
+                self._set(_cache, key, (element,), kwargs, value, tags)
+
+                for _index in missing[key]:
+                    result[_index] = value
+
+        return result
+
+
+class Instrument(PrivateInterceptor):
+    """Measure target calls.
+
+    Measures are given to a handler, such as handler(instrument, measures),
+    where measures is a dict which contains:
+
+    - target: called target.
+    - duration: call duration in seconds.
+
+    If the call result is a (async) generator, measures are given once the
+    generator is exhausted, closed or fails, and contain additionally:
+
+    - items: number of yielded items.
+    - first: seconds between the call and the first item (None if no item).
+    - throughput: yielded items per second.
+    """
+
+    HANDLER = 'handler'  #: handler attribute name.
+
+    START = 'start'  #: call start timestamp exec_ctx key.
+    FIRST = 'first'  #: first item timestamp exec_ctx key.
+
+    __slots__ = (HANDLER,) + PrivateInterceptor.__slots__
+
+    def __init__(self, handler, *args, **kwargs):
+        """
+        :param handler: measures handler which takes in parameters self and a
+            dict of measures.
+        """
+
+        super(Instrument, self).__init__(*args, **kwargs)
+
+        self.handler = handler
+
+    def _interception(self, joinpoint):
+
+        start = time()
+
+        result = joinpoint.proceed()
+
+        if isstream(result):
+            joinpoint.exec_ctx[Instrument.START] = start
+
+        else:
+            self.handler(
+                self, {'target': joinpoint.target, 'duration': time() - start}
+            )
+
+        return result
+
+    def _item_interception(self, stream, item):
+
+        if stream.count == 1:
+            stream.exec_ctx[Instrument.FIRST] = time()
+
+        return item
+
+    def _end_interception(self, stream):
+
+        duration = time() - stream.exec_ctx[Instrument.START]
+
+        first = stream.exec_ctx.get(Instrument.FIRST)
+
+        if first is not None:
+            first -= stream.exec_ctx[Instrument.START]
+
+        self.handler(
+            self,
+            {
+                'target': stream.target,
+                'duration': duration,
+                'items': stream.count,
+                'first': first,
+                'throughput': stream.count / duration if duration else None
+            }
+        )
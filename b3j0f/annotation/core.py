@@ -44,10 +44,11 @@ Such Annotation:
 __all__ = ['Annotation', 'StopPropagation', 'RoutineAnnotation']
 
 from b3j0f.utils.property import (
-    put_properties, del_properties, get_local_property, get_property
+    put_properties, del_properties, get_local_property, get_property,
+    find_ctx
 )
 
-from six import get_method_function
+from six import get_method_function, get_unbound_function
 
 from time import time
 
@@ -56,7 +57,7 @@ try:
 except ImportError:
     from dummy_threading import Timer
 
-from inspect import ismethod, getmembers, isfunction
+from inspect import ismethod, getmembers, isfunction, isroutine, isclass
 
 
 class Annotation(object):
@@ -89,6 +90,11 @@ class Annotation(object):
     #: attribute name for accessing to target annotations from a target
     __ANNOTATIONS_KEY__ = '__ANNOTATIONS__'
 
+    #: True once an annotation which overrides annotates_member is bound to a
+    #: class. Until then, get_annotations does not search class annotations
+    #: of routines (which requires to find their class).
+    _CLASS_MEMBERS = False
+
     #: attribute name for target binding notifying
     _ON_BIND_TARGET = '_on_bind_target'
 
@@ -319,6 +325,12 @@ class Annotation(object):
         # insert self at first position
         local_annotations.insert(0, self)
 
+        if isclass(target) and not Annotation._CLASS_MEMBERS and (
+                get_unbound_function(type(self).annotates_member)
+                is not get_unbound_function(Annotation.annotates_member)
+        ):
+            Annotation._CLASS_MEMBERS = True
+
         # add target to self targets
         if target not in self.targets:
             self.targets.append(target)
@@ -337,6 +349,22 @@ class Annotation(object):
         if _on_bind_target is not None:
             _on_bind_target(self, target=target, ctx=ctx)
 
+    def annotates_member(self, name, member, ctx=None):
+        """Check if self, bound to a class, annotates input class member.
+
+        Such annotation is stored once in the class, and is returned by
+        get_annotations on the member.
+
+        :param str name: member name.
+        :param member: class member.
+        :param type ctx: class of the member, used to inspect its raw
+            definition (static or class method).
+        :return: False by default.
+        :rtype: bool
+        """
+
+        return False
+
     def remove_from(self, target, ctx=None):
         """Remove self annotation from target annotations.
 
@@ -598,6 +626,12 @@ class Annotation(object):
 
                         result.append(annotation)
 
+            if Annotation._CLASS_MEMBERS and isroutine(target):
+                result += cls._get_member_annotations(
+                    target=target, exclude=exclude, ctx=ctx, select=select,
+                    _history=_history
+                )
+
         if mindepth >= 0 or (maxdepth > 0 and (result or not followannotated)):
 
             if _history is None:
@@ -620,6 +654,54 @@ class Annotation(object):
 
         return result
 
+    @classmethod
+    def _get_member_annotations(cls, target, exclude, ctx, select, _history):
+        """Get annotations of cls type bound to the class of input target which
+        annotate target such as a class member.
+
+        :param target: routine from where get annotations.
+        :param tuple exclude: annotation types to remove from selection.
+        :param ctx: target ctx. Found from target if None.
+        :param select: selection function.
+        :param list _history: elements parsed by get_annotations.
+        :rtype: list
+        """
+
+        result = []
+
+        memberctx = find_ctx(target) if ctx is None else ctx
+
+        name = getattr(target, '__name__', None)
+
+        if memberctx is not None and memberctx is not target and name:
+
+            if not isclass(memberctx):
+                memberctx = memberctx.__class__
+
+            # class annotations are already parsed if the class is in history
+            if _history is None or memberctx not in _history:
+
+                annotations_by_ctx = get_property(
+                    elt=memberctx, key=Annotation.__ANNOTATIONS_KEY__
+                )
+
+                for elt, annotations in annotations_by_ctx:
+
+                    for annotation in annotations:
+
+                        if (
+                                (elt is memberctx or annotation.propagate)
+                                and isinstance(annotation, cls)
+                                and not isinstance(annotation, exclude)
+                                and annotation.annotates_member(
+                                    name, target, memberctx
+                                )
+                                and select(target, ctx, annotation)
+                        ):
+                            result.append(annotation)
+
+        return result
+
     @classmethod
     def get_annotated_fields(cls, instance, select=lambda *p: True):
         """Get dict of {annotated fields: annotations} by cls of
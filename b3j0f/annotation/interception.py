@@ -28,14 +28,97 @@
 
 from .core import Annotation
 
-from b3j0f.aop import weave, unweave
+from b3j0f.aop import weave, unweave, get_advices, Joinpoint
+
+from contextlib import contextmanager
+
+try:
+    from threading import local
+
+except ImportError:
+    from dummy_threading import local
+
+from inspect import (
+    isgenerator, isclass, isfunction, ismethod, getmembers, getmro
+)
+
+from re import match
+
+from six import string_types
+
+from itertools import count
+
+from random import random
+
+from time import time
+
+try:
+    from inspect import isasyncgen
+
+except ImportError:  # python < 3.6
+    def isasyncgen(_):
+        """Asynchronous generators do not exist before python 3.6."""
+
+        return False
+
+try:
+    from contextvars import ContextVar
+
+except ImportError:  # python < 3.7
+    class ContextVar(object):
+        """Thread local fallback of contextvars.ContextVar."""
+
+        def __init__(self, name, default=None):
+
+            super(ContextVar, self).__init__()
+
+            self.name = name
+            self._default = default
+            self._local = local()
+
+        def get(self):
+            """Get the value in the current thread."""
+
+            return getattr(self._local, 'value', self._default)
+
+        def set(self, value):
+            """Set the value in the current thread.
+
+            :return: token to give to the method reset.
+            """
+
+            result = self.get()
+
+            self._local.value = value
+
+            return result
+
+        def reset(self, token):
+            """Restore the value before the call to set which returned input
+            token."""
+
+            self._local.value = token
 
 __all__ = [
     'Interceptor',
-    'PrivateInterceptor', 'CallInterceptor', 'PrivateCallInterceptor'
+    'PrivateInterceptor', 'CallInterceptor', 'PrivateCallInterceptor',
+    'InterceptedGenerator', 'InterceptedAsyncGenerator', 'isstream',
+    'Sampling', 'RateSampling', 'CountSampling', 'BudgetSampling',
+    'InterceptionJoinpoint', 'ExecutionContext'
 ]
 
 
+def _isstaticmethod(cls, name):
+    """True iif the raw definition of input class member is a staticmethod.
+    """
+
+    for base in getmro(cls):
+        if name in base.__dict__:
+            return isinstance(base.__dict__[name], staticmethod)
+
+    return False
+
+
 class Interceptor(Annotation):
     """Annotation able to intercept annotated elements.
 
@@ -55,11 +138,32 @@ class Interceptor(Annotation):
     #: interceptor attribute name
     INTERCEPTOR = '__interceptor__'
 
+    #: item interception attribute name
+    ITEM_INTERCEPTION = 'item_interception'
+
+    #: end interception attribute name
+    END_INTERCEPTION = 'end_interception'
+
+    #: sampling attribute name
+    SAMPLING = 'sampling'
+
+    #: methods attribute name
+    METHODS = 'methods'
+
+    #: public attribute name
+    PUBLIC = 'public'
+
     #: private attribute name for pointcut
     _POINTCUT = '_pointcut'
 
+    #: interceptor types enabled in the current context
+    _CONTEXT_ENABLED = ContextVar(
+        'b3j0f.annotation.interceptors', default=()
+    )
+
     __slots__ = (
         INTERCEPTION, ENABLE,  # public attributes
+        ITEM_INTERCEPTION, END_INTERCEPTION, SAMPLING, METHODS, PUBLIC,
         _POINTCUT  # private attribute
     ) + Annotation.__slots__
 
@@ -68,6 +172,8 @@ class Interceptor(Annotation):
 
     def __init__(
             self, interception=None, pointcut=None, enable=True,
+            item_interception=None, end_interception=None, sampling=None,
+            methods=None, public=True,
             *args, **kwargs
     ):
         """Default constructor with interception function and enable property.
@@ -77,6 +183,23 @@ class Interceptor(Annotation):
             and an AdvicesExecutor.
         :param pointcut: pointcut to use in order to weave interception.
         :param bool enable:
+        :param callable item_interception: if not None and if an intercepted
+            call returns a (async) generator, called on every yielded item with
+            the InterceptedGenerator and the item in parameters. Its result is
+            the item given to the consumer.
+        :param callable end_interception: if not None and if an intercepted
+            call returns a (async) generator, called once with the
+            InterceptedGenerator when the generator is exhausted, closed or
+            fails.
+        :param Sampling sampling: if not None, select calls to intercept. Not
+            sampled calls are proceeded without interception.
+        :param methods: if not None and if self annotates a class, self is
+            stored once in the class and intercepts class methods instead of
+            the class. Methods are selected by name with a regex (str), a
+            function which takes a name in parameter, or True for all methods.
+            In this case, pointcut is ignored.
+        :param bool public: if True (default), intercept only public methods
+            in the class mode (see methods).
         """
 
         super(Interceptor, self).__init__(*args, **kwargs)
@@ -84,6 +207,11 @@ class Interceptor(Annotation):
         self.interception = interception
         self._pointcut = pointcut
         self.enable = enable
+        self.item_interception = item_interception
+        self.end_interception = end_interception
+        self.sampling = sampling
+        self.methods = methods
+        self.public = public
 
     @property
     def pointcut(self):
@@ -100,10 +228,16 @@ class Interceptor(Annotation):
 
         # for all targets
         for target in self.targets:
+            # the pointcut is ignored by class targets in the class mode
+            if self.methods is not None and isclass(target):
+                continue
             # unweave old advices
             unweave(target, pointcut=pointcut, advices=self.intercepts)
             # weave new advices with new pointcut
-            weave(target, pointcut=value, advices=self.intercepts)
+            weave(
+                target, pointcut=value, advices=self.intercepts,
+                pointcut_application=InterceptionJoinpoint.application
+            )
 
         # and save new pointcut
         setattr(self, Interceptor._POINTCUT, value)
@@ -115,9 +249,11 @@ class Interceptor(Annotation):
             target=target, ctx=ctx, *args, **kwargs
         )
 
-        pointcut = getattr(self, Interceptor.POINTCUT)
-
-        weave(result, pointcut=pointcut, advices=self.intercepts, ctx=ctx)
+        weave(
+            result, pointcut=self._targetpointcut(result),
+            advices=self.intercepts, ctx=ctx,
+            pointcut_application=InterceptionJoinpoint.application
+        )
 
         return result
 
@@ -125,31 +261,143 @@ class Interceptor(Annotation):
 
         super(Interceptor, self).remove_from(target, *args, **kwargs)
 
-        unweave(
-            target, pointcut=self.pointcut, advices=self.intercepts, ctx=ctx
+        if self.methods is not None and isclass(target):
+            # unweave methods one by one with the class such as their ctx
+            for name, member in getmembers(target):
+                if self.annotates_member(name, member, target):
+                    unweave(
+                        member, advices=self.intercepts, ctx=target, depth=0
+                    )
+
+        else:
+            unweave(
+                target, pointcut=self.pointcut, advices=self.intercepts,
+                ctx=ctx
+            )
+
+    def _targetpointcut(self, target):
+        """Get the pointcut to use on input target.
+
+        :return: self pointcut, or a pointcut which selects class methods
+            annotated by self if target is a class in the class mode.
+        """
+
+        result = self.pointcut
+
+        if self.methods is not None and isclass(target):
+
+            def result(member):
+                """Select annotated methods."""
+
+                name = getattr(member, '__name__', '')
+
+                return self.annotates_member(name, member, target)
+
+        return result
+
+    def annotates_member(self, name, member, ctx=None):
+        """Check if self, in the class mode, intercepts input class member.
+
+        Static methods are not intercepted, since weaving them in the class
+        would make them instance methods.
+
+        :param str name: member name.
+        :param member: class member.
+        :param type ctx: class of the member.
+        :rtype: bool
+        """
+
+        methods = self.methods
+
+        result = (
+            methods is not None
+            and (isfunction(member) or ismethod(member))
+            and not (self.public and name.startswith('_'))
+            and not (ctx is not None and _isstaticmethod(ctx, name))
         )
 
+        if result and methods is not True:
+
+            if isinstance(methods, string_types):
+                result = match(methods, name) is not None
+
+            else:
+                result = methods(name)
+
+        return result
+
     def intercepts(self, joinpoint):
-        """Self target interception if self is enabled
+        """Self target interception if self is enabled and if the call is
+        sampled.
 
         :param joinpoint: advices executor
         """
 
         result = None
 
-        if self.enable:
+        if self.enable or isinstance(self, Interceptor._CONTEXT_ENABLED.get()):
+
+            sampling = self.sampling
+
+            if sampling is None:
+                result = self._intercepts(joinpoint)
 
-            interception = getattr(self, Interceptor.INTERCEPTION)
+            elif not sampling():  # not sampled call
+                result = joinpoint.proceed()
 
-            joinpoint.exec_ctx[Interceptor.INTERCEPTION] = self
+            elif sampling.timed:
+                start = time()
 
-            result = interception(joinpoint)
+                try:
+                    result = self._intercepts(joinpoint)
+
+                finally:
+                    sampling.record(time() - start)
+
+            else:
+                result = self._intercepts(joinpoint)
 
         else:
             result = joinpoint.proceed()
 
         return result
 
+    def _intercepts(self, joinpoint):
+        """Apply self interception on input joinpoint.
+
+        :param joinpoint: advices executor
+        """
+
+        interception = getattr(self, Interceptor.INTERCEPTION)
+
+        joinpoint.exec_ctx[Interceptor.INTERCEPTION] = self
+
+        result = interception(joinpoint)
+
+        if (
+                self.item_interception is not None
+                or self.end_interception is not None
+        ):
+            if (
+                    isgenerator(result)
+                    or type(result) is InterceptedGenerator
+            ):
+                result = InterceptedGenerator(
+                    generator=result, interceptor=self,
+                    joinpoint=joinpoint
+                )
+
+            elif (
+                    isasyncgen(result)
+                    or type(result) is InterceptedAsyncGenerator
+            ):
+                result = InterceptedAsyncGenerator(
+                    generator=result, interceptor=self,
+                    joinpoint=joinpoint
+                )
+
+        return result
+
     @classmethod
     def set_enable(cls, target, enable=True):
         """(Dis|En)able annotated interceptors."""
@@ -159,19 +407,53 @@ class Interceptor(Annotation):
         for interceptor in interceptors:
             setattr(interceptor, Interceptor.ENABLE, enable)
 
+    @classmethod
+    @contextmanager
+    def enabled_for(cls, *types):
+        """Context manager which enables disabled interceptors of input types
+        in the current context only (thread or asyncio task).
+
+        >>> with Interceptor.enabled_for(Types, Condition):
+        ...     handle(request)
+
+        :param tuple types: interceptor types to enable. cls by default.
+        """
+
+        context = Interceptor._CONTEXT_ENABLED
+
+        token = context.set(context.get() + (types or (cls,)))
+
+        try:
+            yield
+
+        finally:
+            context.reset(token)
+
 
 class PrivateInterceptor(Interceptor):
     """Interceptor with a private interception resource.
+
+    Sub classes may define the methods _item_interception and
+    _end_interception in order to intercept generator results.
     """
 
     __slots__ = Interceptor.__slots__
 
+    #: private item interception. None if generator items are not intercepted.
+    _item_interception = None
+
+    #: private end interception. None if generator ends are not intercepted.
+    _end_interception = None
+
     def __init__(self, *args, **kwargs):
         """
         Do nothing except set self._interception such as its interception
         """
         super(PrivateInterceptor, self).__init__(
-            interception=self._interception, *args, **kwargs
+            interception=self._interception,
+            item_interception=self._item_interception,
+            end_interception=self._end_interception,
+            *args, **kwargs
         )
 
     def _interception(self, joinpoint):
@@ -229,3 +511,854 @@ class PrivateCallInterceptor(CallInterceptor):
         """
 
         raise NotImplementedError()
+
+
+def isstream(value):
+    """Check if input value is a (async) generator, intercepted or not.
+
+    :rtype: bool
+    """
+
+    return (
+        isgenerator(value) or isasyncgen(value)
+        or isinstance(value, InterceptedGenerator)
+    )
+
+
+class InterceptedGenerator(object):
+    """Generator proxy which applies interceptor item and end interceptions on
+    an intercepted generator result.
+
+    Items are intercepted lazily while the consumer pulls them, therefore
+    streaming results are never materialized.
+
+    The end interception is applied once when the generator is exhausted,
+    fails, is closed, or is garbage collected before its end.
+    """
+
+    #: generator attribute name
+    GENERATOR = 'generator'
+
+    #: interceptor attribute name
+    INTERCEPTOR = 'interceptor'
+
+    #: intercepted call target attribute name
+    TARGET = 'target'
+
+    #: intercepted call args attribute name
+    ARGS = 'args'
+
+    #: intercepted call kwargs attribute name
+    KWARGS = 'kwargs'
+
+    #: intercepted call execution context attribute name
+    EXEC_CTX = 'exec_ctx'
+
+    #: yielded items count attribute name
+    COUNT = 'count'
+
+    #: private attribute name for item interception
+    _ITEM = '_item'
+
+    #: private attribute name for end interception
+    _END = '_end'
+
+    __slots__ = (
+        GENERATOR, INTERCEPTOR, TARGET, ARGS, KWARGS, EXEC_CTX, COUNT,
+        _ITEM, _END
+    )
+
+    def __init__(self, generator, interceptor, joinpoint):
+        """
+        :param generator: intercepted generator.
+        :param Interceptor interceptor: interceptor which provides item and
+            end interceptions.
+        :param joinpoint: joinpoint which produced the generator. Its target,
+            args, kwargs and a copy of its exec_ctx are saved in self.
+        """
+
+        super(InterceptedGenerator, self).__init__()
+
+        self.generator = generator
+        self.interceptor = interceptor
+        self.target = joinpoint.target
+        self.args = joinpoint.args
+        self.kwargs = joinpoint.kwargs
+        self.exec_ctx = joinpoint.exec_ctx.copy()
+        self.count = 0
+        self._item = interceptor.item_interception
+        self._end = interceptor.end_interception
+
+    def _intercept(self, item):
+        """Apply the item interception on input item.
+
+        :param item: item yielded by self generator.
+        :return: item to give to the consumer.
+        """
+
+        self.count += 1
+
+        _item = self._item
+
+        return item if _item is None else _item(self, item)
+
+    def _stop(self):
+        """Apply the end interception once."""
+
+        _end = self._end
+
+        if _end is not None:
+            self._end = None
+            _end(self)
+
+    def __iter__(self):
+
+        return self
+
+    def __next__(self):
+
+        return self.send(None)
+
+    next = __next__  # python 2 iterator protocol
+
+    def send(self, value):
+        """Send a value to self generator and intercept the yielded item."""
+
+        try:
+            item = self.generator.send(value)
+
+        except BaseException:
+            self._stop()
+            raise
+
+        return self._intercept(item)
+
+    def throw(self, *args):
+        """Raise an exception in self generator and intercept the yielded
+        item."""
+
+        try:
+            item = self.generator.throw(*args)
+
+        except BaseException:
+            self._stop()
+            raise
+
+        return self._intercept(item)
+
+    def close(self):
+        """Close self generator."""
+
+        try:
+            self.generator.close()
+
+        finally:
+            self._stop()
+
+    def __del__(self):
+
+        # an abandoned generator is finalized like a closed one
+        if getattr(self, InterceptedGenerator._END, None) is not None:
+            self.close()
+
+
+class InterceptedAsyncGenerator(InterceptedGenerator):
+    """Asynchronous generator proxy which applies interceptor item and end
+    interceptions on an intercepted asynchronous generator result."""
+
+    __slots__ = InterceptedGenerator.__slots__
+
+    class Awaitable(object):
+        """Awaitable which intercepts the item produced by an awaitable of an
+        asynchronous generator."""
+
+        __slots__ = ('stream', 'awaitable', 'iterator')
+
+        def __init__(self, stream, awaitable):
+
+            super(InterceptedAsyncGenerator.Awaitable, self).__init__()
+
+            self.stream = stream
+            self.awaitable = awaitable
+            self.iterator = None
+
+        def __await__(self):
+
+            self._await()
+
+            return self
+
+        def _await(self):
+            """Get the awaited iterator.
+
+            asyncio tasks send values to self without awaiting it, since it
+            has the coroutine methods."""
+
+            result = self.iterator
+
+            if result is None:
+                result = self.iterator = self.awaitable.__await__()
+
+            return result
+
+        def __iter__(self):
+
+            return self
+
+        def __next__(self):
+
+            return self.send(None)
+
+        def send(self, value):
+            """Send a value to the awaited iterator."""
+
+            return self._call(self._await().send, value)
+
+        def throw(self, *args):
+            """Raise an exception in the awaited iterator."""
+
+            return self._call(self._await().throw, *args)
+
+        def close(self):
+            """Close the awaited iterator."""
+
+            self._await().close()
+
+        def _call(self, func, *args):
+            """Execute func and intercept the produced item if any."""
+
+            try:
+                result = func(*args)
+
+            except StopIteration as ex:
+                item = ex.args[0] if ex.args else None
+                raise StopIteration(self.stream._intercept(item))
+
+            except BaseException:
+                self.stream._stop()
+                raise
+
+            return result
+
+    class Closing(Awaitable):
+        """Awaitable which applies the end interception once the awaitable of
+        an asynchronous generator closing is done."""
+
+        __slots__ = ()
+
+        def _call(self, func, *args):
+
+            try:
+                result = func(*args)
+
+            except BaseException:  # StopIteration once closed
+                self.stream._stop()
+                raise
+
+            return result
+
+    def __iter__(self):
+
+        raise TypeError('{0} is not iterable.'.format(self))
+
+    def __next__(self):
+
+        raise TypeError('{0} is not an iterator.'.format(self))
+
+    next = __next__
+
+    def send(self, value):
+
+        raise TypeError('use asend instead of send.')
+
+    def throw(self, *args):
+
+        raise TypeError('use athrow instead of throw.')
+
+    def close(self):
+
+        raise TypeError('use aclose instead of close.')
+
+    def __aiter__(self):
+
+        return self
+
+    def __anext__(self):
+
+        return self.asend(None)
+
+    def asend(self, value):
+        """Send a value to self generator and intercept the yielded item."""
+
+        return InterceptedAsyncGenerator.Awaitable(
+            self, self.generator.asend(value)
+        )
+
+    def athrow(self, *args):
+        """Raise an exception in self generator and intercept the yielded
+        item."""
+
+        return InterceptedAsyncGenerator.Awaitable(
+            self, self.generator.athrow(*args)
+        )
+
+    def aclose(self):
+        """Close self generator, and apply the end interception once it is
+        closed."""
+
+        return InterceptedAsyncGenerator.Closing(self, self.generator.aclose())
+
+    def __del__(self):
+
+        # the event loop finalizes the abandoned asynchronous generator
+        if getattr(self, InterceptedGenerator._END, None) is not None:
+            self._stop()
+
+
+class Sampling(object):
+    """Interceptor sampling policy which selects calls to intercept.
+
+    A sampling is called before every call of an enabled interceptor and
+    returns True if the call has to be intercepted. If self.timed is True,
+    durations of intercepted calls are given to the method record.
+
+    This base class samples all calls.
+    """
+
+    #: timed attribute name
+    TIMED = 'timed'
+
+    __slots__ = (TIMED,)
+
+    def __init__(self, timed=False):
+        """
+        :param bool timed: if True (default False), give intercepted call
+            durations to the method record.
+        """
+
+        super(Sampling, self).__init__()
+
+        self.timed = timed
+
+    def __call__(self):
+        """
+        :return: True if the current call has to be intercepted.
+        :rtype: bool
+        """
+
+        return True
+
+    def record(self, duration):
+        """Record the duration of an intercepted call.
+
+        :param float duration: intercepted call duration in seconds.
+        """
+
+
+class RateSampling(Sampling):
+    """Sample calls randomly with a fixed rate."""
+
+    #: rate attribute name
+    RATE = 'rate'
+
+    __slots__ = (RATE,) + Sampling.__slots__
+
+    def __init__(self, rate, *args, **kwargs):
+        """
+        :param float rate: probability in [0, 1] for a call to be intercepted.
+        """
+
+        super(RateSampling, self).__init__(*args, **kwargs)
+
+        self.rate = rate
+
+    def __call__(self):
+
+        return random() < self.rate
+
+
+class CountSampling(Sampling):
+    """Sample one call every n calls, starting with the first one."""
+
+    #: n attribute name
+    N = 'n'
+
+    #: private calls counter attribute name
+    _COUNTER = '_counter'
+
+    __slots__ = (N, _COUNTER) + Sampling.__slots__
+
+    def __init__(self, n, *args, **kwargs):
+        """
+        :param int n: intercept one call every n calls.
+        """
+
+        super(CountSampling, self).__init__(*args, **kwargs)
+
+        self.n = n
+        self._counter = count()
+
+    def __call__(self):
+
+        return next(self._counter) % self.n == 0
+
+
+class BudgetSampling(Sampling):
+    """Sample calls while their cumulated duration does not exceed a time
+    budget per period.
+
+    The sampling rate adapts itself to the interception cost: cheap calls are
+    all intercepted whereas expensive calls are intercepted until the budget
+    is consumed, then calls are not intercepted until the next period.
+    """
+
+    #: budget attribute name
+    BUDGET = 'budget'
+
+    #: period attribute name
+    PERIOD = 'period'
+
+    #: private period end timestamp attribute name
+    _END = '_end'
+
+    #: private consumed budget attribute name
+    _SPENT = '_spent'
+
+    __slots__ = (BUDGET, PERIOD, _END, _SPENT) + Sampling.__slots__
+
+    def __init__(self, budget, period=1, *args, **kwargs):
+        """
+        :param float budget: seconds allowed to intercepted calls per period.
+        :param float period: period duration in seconds.
+        """
+
+        super(BudgetSampling, self).__init__(timed=True, *args, **kwargs)
+
+        self.budget = budget
+        self.period = period
+        self._end = 0
+        self._spent = 0
+
+    def __call__(self):
+
+        now = time()
+
+        if now >= self._end:  # start a new period
+            self._end = now + self.period
+            self._spent = 0
+
+        return self._spent < self.budget
+
+    def record(self, duration):
+
+        self._spent += duration
+
+
+class ExecutionContext(object):
+    """Reusable execution context shared by advices during an intercepted
+    call.
+
+    It provides dict methods used on joinpoint.exec_ctx, and stores items in
+    preallocated lists in order to be reused without allocation.
+    """
+
+    #: private keys attribute name
+    _KEYS = '_keys'
+
+    #: private values attribute name
+    _VALUES = '_values'
+
+    #: private size attribute name
+    _SIZE = '_size'
+
+    #: default number of preallocated items
+    DEFAULT_CAPACITY = 8
+
+    __slots__ = (_KEYS, _VALUES, _SIZE)
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        :param int capacity: number of preallocated items.
+        """
+
+        super(ExecutionContext, self).__init__()
+
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._size = 0
+
+    def _index(self, key):
+        """Get the index of input key.
+
+        :return: key index or -1 if key does not exist.
+        :rtype: int
+        """
+
+        keys = self._keys
+        size = self._size
+        index = 0
+
+        while index < size:  # avoid range allocation
+            if keys[index] == key:
+                return index
+
+            index += 1
+
+        return -1
+
+    def __getitem__(self, key):
+
+        index = self._index(key)
+
+        if index < 0:
+            raise KeyError(key)
+
+        return self._values[index]
+
+    def __setitem__(self, key, value):
+
+        index = self._index(key)
+
+        if index < 0:
+            index = self._size
+
+            if index == len(self._keys):
+                self._keys.append(key)
+                self._values.append(value)
+
+            else:
+                self._keys[index] = key
+
+            self._size = index + 1
+
+        self._values[index] = value
+
+    def __delitem__(self, key):
+
+        index = self._index(key)
+
+        if index < 0:
+            raise KeyError(key)
+
+        last = self._size - 1
+
+        # move the last item at the place of the deleted one
+        self._keys[index] = self._keys[last]
+        self._values[index] = self._values[last]
+        self._keys[last] = self._values[last] = None
+        self._size = last
+
+    def __contains__(self, key):
+
+        return self._index(key) >= 0
+
+    def __len__(self):
+
+        return self._size
+
+    def __iter__(self):
+
+        return iter(self.keys())
+
+    def __eq__(self, other):
+
+        return self.copy() == other
+
+    def __ne__(self, other):
+
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+
+        return '{0}({1})'.format(type(self).__name__, self.copy())
+
+    def get(self, key, default=None):
+        """Get the value of input key or default if key does not exist."""
+
+        index = self._index(key)
+
+        return default if index < 0 else self._values[index]
+
+    def setdefault(self, key, default=None):
+        """Get the value of input key and set it with default if key does not
+        exist."""
+
+        index = self._index(key)
+
+        if index < 0:
+            self[key] = default
+            result = default
+
+        else:
+            result = self._values[index]
+
+        return result
+
+    def pop(self, *args):
+        """Remove input key and return its value.
+
+        :param key: key to remove.
+        :param default: value to return if key does not exist.
+        """
+
+        key = args[0]
+        index = self._index(key)
+
+        if index < 0:
+            if len(args) > 1:
+                return args[1]
+
+            raise KeyError(key)
+
+        result = self._values[index]
+
+        del self[key]
+
+        return result
+
+    def keys(self):
+        """:rtype: list"""
+
+        return self._keys[:self._size]
+
+    def values(self):
+        """:rtype: list"""
+
+        return self._values[:self._size]
+
+    def items(self):
+        """:rtype: list"""
+
+        return list(zip(self.keys(), self.values()))
+
+    def update(self, *args, **kwargs):
+        """Update self items like the dict method update."""
+
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        """Get a dict copy of self items, which can be kept after the call.
+
+        :rtype: dict
+        """
+
+        return dict(self.items())
+
+    def clear(self):
+        """Remove all items without releasing preallocated lists."""
+
+        keys = self._keys
+        values = self._values
+        index = self._size
+
+        while index > 0:
+            index -= 1
+            keys[index] = values[index] = None
+
+        self._size = 0
+
+
+class _ExecutionContexts(local):
+    """Thread local stack of reusable execution contexts."""
+
+    def __init__(self):
+
+        super(_ExecutionContexts, self).__init__()
+
+        self.contexts = []
+        self.depth = 0
+
+
+class _JoinpointState(local):
+    """Thread local state of the running call of a joinpoint."""
+
+    def __init__(self, args, kwargs):
+
+        super(_JoinpointState, self).__init__()
+
+        self.args = args
+        self.kwargs = kwargs
+        self.exec_ctx = None
+        self.advices = ()
+        self.index = 0
+        # arguments replaced by the last assignment (before a start)
+        self.oldargs = self.oldkwargs = None
+
+
+class InterceptionJoinpoint(Joinpoint):
+    """Joinpoint used to weave interceptors of this library.
+
+    Instead of the default joinpoint, the execution context is an
+    ExecutionContext reused by intercepted calls of the same thread, advices
+    are iterated with an index, and the call state (arguments, execution
+    context and advices) is restored after recursive calls. Therefore, an
+    intercepted call does not allocate execution objects.
+
+    The call state is local to threads, so that concurrent calls of the same
+    target do not share arguments.
+
+    The execution context is cleared at the end of the call. Its method copy
+    returns a dict which can be kept after the call.
+    """
+
+    #: private attribute name for the thread local call state
+    _STATE = '_state'
+
+    __slots__ = (_STATE,)
+
+    #: execution contexts by thread
+    _CONTEXTS = _ExecutionContexts()
+
+    def __init__(self, *args, **kwargs):
+
+        self._state = _JoinpointState((), {})
+
+        super(InterceptionJoinpoint, self).__init__(*args, **kwargs)
+
+        # default arguments of calls in other threads
+        self._state = _JoinpointState(self.args, self.kwargs)
+
+    @property
+    def args(self):
+        """Call varargs of the current thread."""
+
+        return self._state.args
+
+    @args.setter
+    def args(self, value):
+
+        state = self._state
+        state.oldargs = state.args
+        state.args = value
+
+    @property
+    def kwargs(self):
+        """Call keywords of the current thread."""
+
+        return self._state.kwargs
+
+    @kwargs.setter
+    def kwargs(self, value):
+
+        state = self._state
+        state.oldkwargs = state.kwargs
+        state.kwargs = value
+
+    @property
+    def exec_ctx(self):
+        """Execution context of the current thread call."""
+
+        return self._state.exec_ctx
+
+    @exec_ctx.setter
+    def exec_ctx(self, value):
+
+        self._state.exec_ctx = value
+
+    @staticmethod
+    def application(target, function=None, ctx=None):
+        """Pointcut application which weaves a new InterceptionJoinpoint on
+        input target.
+
+        :return: interception function.
+        """
+
+        return InterceptionJoinpoint().apply_pointcut(
+            target=target, function=function, ctx=ctx
+        )
+
+    def get_advices(self, target):
+
+        return get_advices(target, ctx=self.ctx)
+
+    def start(
+            self, target=None, args=None, kwargs=None, advices=None,
+            exec_ctx=None, ctx=None
+    ):
+
+        if target is not None:
+            self.set_target(target=target, ctx=ctx)
+
+        state = self._state
+
+        # save the state of a running call of the same joinpoint. Woven
+        # functions assign call arguments before starting, in which case
+        # replaced arguments are the running ones
+        oldargs = state.oldargs
+        oldkwargs = state.oldkwargs
+        state.oldargs = state.oldkwargs = None
+
+        if oldargs is None:
+            oldargs = state.args
+
+        if oldkwargs is None:
+            oldkwargs = state.kwargs
+
+        oldexec_ctx = state.exec_ctx
+        oldadvices = state.advices
+        oldindex = state.index
+
+        if args is not None:
+            state.args = args
+
+        if kwargs is not None:
+            state.kwargs = kwargs
+
+        if advices is None:
+            if self._advices is not None:
+                advices = self._advices
+
+            else:
+                advices = self.get_advices(self._interception)
+
+        contexts = InterceptionJoinpoint._CONTEXTS
+        depth = contexts.depth
+
+        if depth == len(contexts.contexts):
+            contexts.contexts.append(ExecutionContext())
+
+        context = contexts.contexts[depth]
+        contexts.depth = depth + 1
+
+        if self._exec_ctx:
+            context.update(self._exec_ctx)
+
+        if exec_ctx:
+            context.update(exec_ctx)
+
+        state.exec_ctx = context
+        state.advices = advices
+        state.index = 0
+
+        try:
+            result = self.proceed()
+
+        finally:
+            context.clear()
+            contexts.depth = depth
+
+            state.args = oldargs
+            state.kwargs = oldkwargs
+            state.exec_ctx = oldexec_ctx
+            state.advices = oldadvices
+            state.index = oldindex
+
+        return result
+
+    def proceed(self):
+
+        state = self._state
+        index = state.index
+        advices = state.advices
+
+        if index < len(advices):
+            state.index = index + 1
+            result = advices[index](self)
+
+        else:
+            result = self.target(*state.args, **state.kwargs)
+
+        return result
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Allocation benchmark of intercepted calls.
+
+Usage: python -m b3j0f.annotation.test.bench [calls]
+
+Allocations are measured with the module tracemalloc (python >= 3.4).
+Without it, only durations are measured.
+"""
+
+from __future__ import print_function
+
+from sys import argv
+
+from time import time
+
+from b3j0f.aop import weave
+
+from ..interception import Interceptor
+
+try:
+    import tracemalloc
+
+except ImportError:
+    tracemalloc = None
+
+#: default number of calls.
+DEFAULT_CALLS = 1000000
+
+
+def interception(joinpoint):
+    """Interception which only proceeds the joinpoint."""
+
+    joinpoint.exec_ctx['interception'] = interception
+
+    return joinpoint.proceed()
+
+
+def measure(func, calls=DEFAULT_CALLS):
+    """Measure allocations of calls to input func.
+
+    :param func: function to call without parameters.
+    :param int calls: number of calls.
+    :return: duration in seconds, retained memory and peak memory in bytes
+        during calls (None without tracemalloc).
+    :rtype: tuple
+    """
+
+    func()  # warm up lazy initializations
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+
+    start = time()
+
+    for _ in range(calls):
+        func()
+
+    duration = time() - start
+
+    if tracemalloc is None:
+        retained = peak = None
+
+    else:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        retained, peak = current - before, peak - before
+
+    return duration, retained, peak
+
+
+def bench(calls=DEFAULT_CALLS):
+    """Compare allocations of calls woven with b3j0f.aop and calls
+    intercepted by an Interceptor.
+
+    :param int calls: number of calls.
+    :return: measures by name.
+    :rtype: dict
+    """
+
+    def aopfunc():
+        pass
+
+    weave(aopfunc, advices=interception)
+
+    def interceptorfunc():
+        pass
+
+    Interceptor(interception=interception)(interceptorfunc)
+
+    return {
+        'b3j0f.aop': measure(aopfunc, calls),
+        'Interceptor': measure(interceptorfunc, calls)
+    }
+
+
+def main():
+    """Print bench results."""
+
+    if tracemalloc is None:
+        print(
+            'tracemalloc is not available (python < 3.4): allocations are not'
+            ' measured.'
+        )
+
+    calls = int(argv[1]) if len(argv) > 1 else DEFAULT_CALLS
+
+    for name, (duration, retained, peak) in sorted(bench(calls).items()):
+        if retained is None:
+            print('{0}: {1} calls in {2:.2f}s'.format(name, calls, duration))
+
+        else:
+            print(
+                '{0}: {1} calls in {2:.2f}s, {3} retained bytes, {4} peak '
+                'bytes'.format(name, calls, duration, retained, peak)
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,735 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+from unittest import main, skipIf
+
+from b3j0f.utils.ut import UTCase
+
+from os import fork, waitpid, path, environ, _exit
+
+from shutil import rmtree
+
+from subprocess import check_output
+
+from sys import executable
+
+from tempfile import mkdtemp
+
+from time import sleep
+
+from gc import collect
+
+from threading import Lock
+
+from ..cache import (
+    LRUCache, LFUCache, TTLCache, SQLiteCache, TieredCache,
+    makekey, freeze, digest, stabledigest, sizeof, rss, RSSWatcher,
+    SharedMemoryCache, SharedMemory
+)
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+class LRUCacheTest(UTCase):
+    """Test the LRUCache."""
+
+    def setUp(self):
+
+        self.cache = LRUCache(max_size=2)
+
+    def test_set(self):
+
+        self.cache[1] = 1
+        self.cache.set(2, 2)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache[1], 1)
+        self.assertEqual(self.cache.get(2), 2)
+        self.assertIsNone(self.cache.get(3))
+        self.assertRaises(KeyError, self.cache.__getitem__, 3)
+
+    def test_evict(self):
+
+        self.cache[1] = 1
+        self.cache[2] = 2
+        self.cache.get(1)
+        self.cache[3] = 3
+
+        self.assertEqual(sorted(self.cache), [1, 3])
+
+        self.cache[1] = 4  # update is an access
+        self.cache[2] = 2
+
+        self.assertEqual(sorted(self.cache.items()), [(1, 4), (2, 2)])
+
+    def test_max_size(self):
+
+        for i in range(2):
+            self.cache[i] = i
+
+        self.cache.max_size = 1
+
+        self.assertEqual(list(self.cache), [1])
+
+        self.cache.max_size = 0
+        self.cache[2] = 2
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_pop(self):
+
+        self.cache[1] = 1
+        self.cache[2] = 2
+
+        self.assertEqual(self.cache.pop(1), 1)
+        self.assertIsNone(self.cache.pop(1, None))
+        self.assertRaises(KeyError, self.cache.pop, 1)
+
+        del self.cache[2]
+
+        self.assertNotIn(2, self.cache)
+
+        self.cache[3] = 3
+        self.cache.clear()
+        self.cache[4] = 4
+
+        self.assertEqual(list(self.cache), [4])
+
+    def test_onremove(self):
+
+        removed = []
+
+        self.cache.onremove = lambda key, value: removed.append((key, value))
+
+        self.cache[1] = 1
+        self.cache[2] = 2
+        self.cache[1] = 3  # replaced
+        self.cache[4] = 4  # evicts 2
+        self.cache.pop(4)
+        self.cache.clear()
+
+        self.assertEqual(removed, [(1, 1), (2, 2), (4, 4), (1, 3)])
+
+        removed[:] = []
+        cache = TTLCache(ttl=1, timer=lambda: self.now, onremove=(
+            lambda key, value: removed.append(key)
+        ))
+        self.now = 0
+        cache[1] = 1
+        self.now = 1
+
+        self.assertNotIn(1, cache)
+        self.assertEqual(removed, [1])
+
+
+class LFUCacheTest(UTCase):
+    """Test the LFUCache."""
+
+    def test_evict(self):
+
+        cache = LFUCache(max_size=3)
+
+        for i in range(3):
+            cache[i] = i
+
+        cache.get(0)
+        cache.get(0)
+        cache.get(1)
+        cache[3] = 3  # evicts 2, used once
+
+        self.assertEqual(sorted(cache), [0, 1, 3])
+
+        cache[4] = 4  # evicts 3, used once and least recently than 4
+
+        self.assertEqual(sorted(cache), [0, 1, 4])
+
+        cache.get(4)
+        cache.get(4)
+        cache.get(4)
+        cache[5] = 5  # evicts 1
+
+        self.assertEqual(sorted(cache), [0, 4, 5])
+
+        cache.pop(5)
+        cache.pop(0)
+        cache[6] = 6
+        cache.get(6)
+        cache.pop(6)  # no more entries used once or twice
+        cache[7] = 7
+        cache[8] = 8
+        cache[9] = 9  # evicts 7
+
+        self.assertEqual(sorted(cache), [4, 8, 9])
+
+        cache.max_size = 1
+
+        self.assertEqual(list(cache), [4])
+
+
+class MaxBytesTest(UTCase):
+    """Test caches bounded by size in bytes."""
+
+    def setUp(self):
+
+        self.cache = LRUCache(max_bytes=10, sizeof=len)
+
+    def test_evict(self):
+
+        self.cache[1] = 'aaaa'
+        self.cache[2] = 'bbbb'
+        self.cache[3] = 'cccc'  # evicts 1
+
+        self.assertEqual(sorted(self.cache), [2, 3])
+        self.assertEqual(self.cache.bytes, 8)
+
+        self.cache[2] = 'bbbbbbbb'  # evicts 3
+
+        self.assertEqual(list(self.cache), [2])
+        self.assertEqual(self.cache.bytes, 8)
+
+        del self.cache[2]
+
+        self.assertEqual(self.cache.bytes, 0)
+
+    def test_too_big(self):
+
+        self.cache[1] = 'a'
+        self.cache[1] = 'a' * 11
+
+        self.assertNotIn(1, self.cache)
+        self.assertEqual(self.cache.bytes, 0)
+
+    def test_max_bytes(self):
+
+        for key in range(5):
+            self.cache[key] = 'aa'
+
+        self.cache.max_bytes = 4
+
+        self.assertEqual(sorted(self.cache), [3, 4])
+
+        self.cache.clear()
+
+        self.assertEqual(self.cache.bytes, 0)
+
+    def test_unsized(self):
+
+        cache = LRUCache()
+
+        self.assertRaises(ValueError, setattr, cache, 'max_bytes', 10)
+
+    def test_shrink(self):
+
+        cache = LFUCache()
+
+        for key in range(4):
+            cache[key] = key
+
+        cache.get(0)
+        cache.get(1)
+
+        self.assertEqual(cache.shrink(), 2)
+        self.assertEqual(sorted(cache), [0, 1])
+        self.assertEqual(cache.evictions, 2)
+
+
+class RSSWatcherTest(UTCase):
+    """Test the RSSWatcher."""
+
+    def setUp(self):
+
+        self.rss = 0
+        self.watcher = RSSWatcher(
+            max_rss=100, interval=0.01, rss=lambda: self.rss
+        )
+        self.cache = LRUCache()
+
+        for key in range(4):
+            self.cache[key] = key
+
+    def test_rss(self):
+
+        value = rss()
+
+        if value is not None:
+            self.assertGreater(value, 0)
+
+    def test_check(self):
+
+        self.watcher.watch(self.cache)
+
+        self.assertFalse(self.watcher.check())
+        self.assertEqual(len(self.cache), 4)
+
+        self.rss = 101
+
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(sorted(self.cache), [2, 3])
+
+        self.watcher.unwatch(self.cache)
+
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(len(self.cache), 2)
+
+    def test_thread(self):
+
+        self.rss = 101
+        self.watcher.watch(self.cache)
+
+        for _ in range(500):
+            if not self.cache:
+                break
+
+            sleep(0.01)
+
+        self.watcher.unwatch(self.cache)
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_collected(self):
+
+        self.watcher.watch(self.cache)
+
+        del self.cache
+        collect()
+
+        self.assertEqual(len(self.watcher._caches), 0)
+
+        for _ in range(500):  # the thread stops without watched caches
+            if self.watcher._thread is None:
+                break
+
+            sleep(0.01)
+
+        self.assertIsNone(self.watcher._thread)
+
+
+class TTLCacheTest(UTCase):
+    """Test the TTLCache."""
+
+    def setUp(self):
+
+        self.now = 0
+        self.cache = TTLCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_expire(self):
+
+        self.cache[1] = 1
+        self.now = 5
+        self.cache[2] = 2
+
+        self.assertEqual(self.cache[1], 1)
+
+        self.now = 10
+
+        self.assertNotIn(1, self.cache)
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(self.cache.get(2), 2)
+
+        self.now = 15
+
+        self.assertEqual(self.cache.items(), [])
+
+    def test_renew(self):
+
+        self.cache[1] = 1
+        self.now = 5
+        self.cache[1] = 2
+        self.now = 10
+
+        self.assertEqual(self.cache[1], 2)
+
+    def test_evict(self):
+
+        self.cache[1] = 1
+        self.cache[2] = 2
+        self.cache.get(1)
+        self.cache[3] = 3  # evicts least recently used
+
+        self.assertEqual(sorted(self.cache), [1, 3])
+
+        self.now = 10
+        self.cache[4] = 4  # purges expired entries
+
+        self.assertEqual(list(self.cache), [4])
+        # one evicted entry and two expired ones
+        self.assertEqual(self.cache.evictions, 3)
+
+
+class KeyTest(UTCase):
+    """Test cache keys."""
+
+    def test_collision(self):
+
+        class Collision(object):
+            """Unequal values with the same hash."""
+
+            def __hash__(self):
+                return 0
+
+        self.assertNotEqual(
+            makekey((Collision(),), {}), makekey((Collision(),), {})
+        )
+
+    def test_keys(self):
+
+        self.assertEqual(makekey((1, 2), {'a': 3}), makekey((1, 2), {'a': 3}))
+        self.assertNotEqual(makekey((('a', 1),), {}), makekey((), {'a': 1}))
+        self.assertNotEqual(makekey(([1],), {}), makekey(((1,),), {}))
+        self.assertEqual(
+            makekey(([1, {'a': {2}}],), {'b': bytearray(b'c')}),
+            makekey(([1, {'a': {2}}],), {'b': bytearray(b'c')})
+        )
+        self.assertNotEqual(
+            makekey(({'a': [1]},), {}), makekey(({'a': [2]},), {})
+        )
+
+        hash(makekey(([1], {'a': set([1])}), {'b': [bytearray(b'c')]}))
+
+    def test_freeze(self):
+
+        self.assertEqual(freeze(1), 1)
+        self.assertEqual(freeze(memoryview(b'ab')), freeze(memoryview(b'ab')))
+        self.assertNotEqual(freeze(bytearray(b'a')), freeze(bytearray(b'b')))
+        self.assertNotEqual(freeze([1]), freeze(set([1])))
+        self.assertRaises(TypeError, freeze, type('A', (object,), {
+            '__hash__': None
+        })())
+
+    @skipIf(numpy is None, 'numpy is not installed')
+    def test_array(self):
+
+        array = numpy.arange(6.).reshape(2, 3)
+
+        self.assertEqual(freeze(array), freeze(array.copy()))
+        self.assertNotEqual(freeze(array), freeze(array.reshape(3, 2)))
+        self.assertNotEqual(freeze(array), freeze(array.astype(int)))
+        self.assertNotEqual(freeze(array), freeze(array + 1))
+        self.assertEqual(freeze(array.T), freeze(array.T.copy()))
+        self.assertEqual(digest(array.T), digest(array.T.copy()))
+        self.assertEqual(
+            freeze(numpy.array([[1], 'a'], dtype=object)),
+            freeze(numpy.array([[1], 'a'], dtype=object))
+        )
+
+
+class SizeofTest(UTCase):
+    """Test the sizeof function."""
+
+    def test_nested(self):
+
+        value = [1, 'a']
+
+        self.assertGreater(sizeof([value]), sizeof(value))
+        self.assertGreater(sizeof({'a': value}), sizeof(value))
+
+    def test_shared(self):
+
+        value = list(range(100))
+
+        # shared objects are counted once
+        self.assertLess(sizeof([value, value]), 2 * sizeof(value))
+
+
+class SQLiteCacheTest(UTCase):
+    """Test the SQLiteCache."""
+
+    def setUp(self):
+
+        self.tmp = mkdtemp()
+        self.path = path.join(self.tmp, 'cache.db')
+        self.cache = SQLiteCache(self.path, max_size=2)
+
+    def tearDown(self):
+
+        rmtree(self.tmp)
+
+    def test_set(self):
+
+        key = makekey(([1], 'a'), {'b': 2})
+
+        self.cache.set(key, {'c': [3]})
+
+        self.assertEqual(self.cache.get(key), {'c': [3]})
+        self.assertIn(key, self.cache)
+        self.assertIsNone(self.cache.get(makekey((), {})))
+        self.assertEqual(len(self.cache), 1)
+
+        self.cache.set(key, 4)
+
+        self.assertEqual(self.cache.get(key), 4)
+        self.assertEqual(len(self.cache), 1)
+
+        # persistence and sharing
+        cache = SQLiteCache(self.path)
+        self.assertEqual(cache.get(key), 4)
+        self.assertEqual(cache.pop(key), 4)
+        self.assertRaises(KeyError, cache.pop, key)
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evict(self):
+
+        for i in range(3):
+            self.cache.set(i, i)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertNotIn(0, self.cache)
+
+        self.cache.get(1)
+        self.cache.set(3, 3)  # evicts 2
+
+        self.assertEqual(
+            sorted(value for _, value in self.cache.items()), [1, 3]
+        )
+
+        self.cache.max_size = 1
+
+        self.assertEqual(len(self.cache), 1)
+
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_atimes(self):
+
+        def atime():
+
+            return self.cache._connection().execute(
+                'SELECT atime FROM memoize'
+            ).fetchone()[0]
+
+        self.cache.set(1, 1)
+        created = atime()
+
+        for _ in range(SQLiteCache.ATIMES - 1):
+            self.cache.get(1)
+
+        self.assertEqual(atime(), created)
+
+        self.cache.get(1)  # writes the batch of access times
+
+        self.assertGreater(atime(), created)
+
+    def test_names(self):
+
+        cache = SQLiteCache(self.path, name='other')
+
+        cache.set(1, 2)
+        self.cache.set(1, 1)
+
+        self.assertEqual(cache.get(1), 2)
+        self.assertRaises(ValueError, SQLiteCache, self.path, name='a;b')
+
+    def test_processes(self):
+
+        self.cache.set(1, 1)
+
+        pid = fork()
+
+        if pid == 0:  # child process writes with the parent cache object
+            try:
+                self.cache.set(2, 2)
+
+            finally:
+                _exit(0)
+
+        waitpid(pid, 0)
+
+        self.assertEqual(self.cache.get(2), 2)
+        self.assertEqual(self.cache.get(1), 1)
+
+    def test_tiered(self):
+
+        cache = TieredCache(LRUCache(max_size=1), self.cache)
+
+        cache.set(1, 1)
+        cache.set(2, 2)
+
+        self.assertEqual(list(cache.l1), [2])
+        self.assertEqual(cache.get(1), 1)  # from the second level
+        self.assertEqual(list(cache.l1), [1])
+        self.assertEqual(cache.pop(1), 1)
+        self.assertNotIn(1, cache)
+        self.assertEqual(len(cache), 1)
+
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_tiered_unserializable(self):
+
+        cache = TieredCache(LRUCache(), self.cache)
+        lock = Lock()
+
+        cache.set(1, 1)
+        cache.set(1, lock)  # replaces 1 in the first level only
+
+        self.assertIs(cache.get(1), lock)
+        self.assertNotIn(1, self.cache)
+        self.assertIs(cache.pop(1), lock)
+
+        cache.set(lock, 2)
+
+        self.assertEqual(cache.get(lock), 2)
+        self.assertIn(lock, cache)
+        self.assertEqual(cache.pop(lock), 2)
+        self.assertNotIn(lock, cache)
+
+
+@skipIf(SharedMemory is None, 'shared memory requires python >= 3.8')
+class SharedMemoryCacheTest(UTCase):
+    """Test the SharedMemoryCache."""
+
+    def setUp(self):
+
+        self.cache = SharedMemoryCache(slots=4, slot_size=128, probes=4)
+
+    def tearDown(self):
+
+        self.cache.close()
+        self.cache.unlink()
+
+    def test_set(self):
+
+        key = makekey(([1], 'a'), {'b': 2})
+
+        self.cache.set(key, {'c': [3]})
+
+        self.assertEqual(self.cache.get(key), {'c': [3]})
+        self.assertIn(key, self.cache)
+        self.assertIsNone(self.cache.get(makekey((), {})))
+
+        self.cache.set(key, 4)
+
+        self.assertEqual(self.cache.get(key), 4)
+        self.assertEqual(len(self.cache), 1)
+
+        # sharing
+        cache = SharedMemoryCache(name=self.cache.name)
+        self.assertEqual(cache.pop(key), 4)
+        self.assertRaises(KeyError, cache.pop, key)
+        self.assertEqual(len(self.cache), 0)
+        cache.close()
+
+    def test_evict(self):
+
+        for i in range(6):
+            self.cache.set(i, i)
+
+        self.assertEqual(len(self.cache), 4)
+        self.assertEqual(self.cache.evictions, 2)
+        self.assertIn(5, self.cache)
+        self.assertEqual(len(self.cache.items()), 4)
+
+        self.cache.set(6, 'a' * 200)  # too big
+
+        self.assertNotIn(6, self.cache)
+
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_zerocopy(self):
+
+        cache = SharedMemoryCache(
+            slots=4, slot_size=64, serializer=None, zerocopy=True
+        )
+
+        try:
+            cache.set(1, b'abc')
+            value = cache.get(1)
+
+            self.assertIsInstance(value, memoryview)
+            self.assertEqual(value.tobytes(), b'abc')
+
+            del value
+
+        finally:
+            cache.close()
+            cache.unlink()
+
+    def test_processes(self):
+
+        self.cache.set(1, 1)
+
+        pid = fork()
+
+        if pid == 0:  # child process writes with the parent cache object
+            try:
+                self.cache.set(2, 2)
+
+            finally:
+                _exit(0)
+
+        waitpid(pid, 0)
+
+        self.assertEqual(self.cache.get(2), 2)
+        self.assertEqual(self.cache.get(1), 1)
+
+
+class StableDigestTest(UTCase):
+    """Test stable digests of keys."""
+
+    def test_stable(self):
+
+        script = (
+            'from b3j0f.annotation.cache import stabledigest, makekey;'
+            'print(repr(stabledigest(makekey(({"a": {u"b", u"c"}},), {}))))'
+        )
+
+        digests = set(
+            check_output(
+                [executable, '-c', script],
+                env=dict(environ, PYTHONHASHSEED=seed)
+            ) for seed in ('1', '2')
+        )
+
+        self.assertEqual(len(digests), 1)
+
+    def test_digest(self):
+
+        # equal keys have the same digest
+        for key in ((True,), (1.,), (1 + 0j,)):
+            self.assertEqual(stabledigest(key), stabledigest((1,)))
+
+        self.assertEqual(stabledigest((u'a',)), stabledigest(('a',)))
+        self.assertNotEqual(stabledigest((1.5,)), stabledigest((1,)))
+        self.assertNotEqual(stabledigest(('1',)), stabledigest((1,)))
+        self.assertNotEqual(stabledigest((None,)), stabledigest(('',)))
+        self.assertNotEqual(stabledigest((('a',),)), stabledigest(('a',)))
+        self.assertEqual(
+            stabledigest(frozenset([1, 2])), stabledigest(frozenset([2, 1]))
+        )
+
+
+if __name__ == '__main__':
+    main()
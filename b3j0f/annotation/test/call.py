@@ -25,12 +25,55 @@
 # SOFTWARE.
 # --------------------------------------------------------------------
 
-from unittest import main
+from unittest import main, skipIf
+
+from time import sleep
+
+from sys import maxsize
+
+from threading import Thread, Event, Lock
+
+from os import path
+
+from shutil import rmtree
+
+from tempfile import mkdtemp
+
+from weakref import ref
+
+from gc import collect
+
+try:
+    from asyncio import (
+        new_event_loop, set_event_loop, gather, sleep as asleep, wait_for,
+        TimeoutError as ATimeoutError
+    )
+
+except ImportError:  # python < 3.4
+    new_event_loop = None
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+try:
+    from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+except ImportError:
+    Any = None
 
 from b3j0f.utils.ut import UTCase
 
 from ..interception import Interceptor
-from ..call import Types, Curried, Retries, Memoize
+from ..call import (
+    Types, Curried, Retries, Memoize, MemoizeMany, Instrument, addtags,
+    invalidate
+)
+from ..cache import (
+    SQLiteCache, LRUCache, RSSWatcher, SharedMemoryCache, SharedMemory
+)
 
 
 class CallTests(UTCase):
@@ -176,6 +219,231 @@ class CallTests(UTCase):
         self._assertCall(d, [])
         self._assertCall(d, [2, ''])
 
+    def testValidator(self):
+
+        validator = Types.validator(int)
+
+        self.assertTrue(validator(1))
+        self.assertTrue(validator(None))
+        self.assertFalse(validator(''))
+
+        validator = Types.validator({Types.NotNone(int)})
+
+        self.assertTrue(validator(set([1, 2])))
+        self.assertTrue(validator(set()))
+        self.assertFalse(validator(set([1, None])))
+        self.assertFalse(validator([1]))
+
+        validator = Types.validator(Types.NotEmpty([(int, float)]))
+
+        self.assertTrue(validator([1, 2.]))
+        self.assertFalse(validator([]))
+        self.assertFalse(validator(['']))
+        self.assertFalse(validator(1))
+
+    def testValidatorCache(self):
+
+        validators = Types._VALIDATORS
+
+        for limit in range(Types.MAX_VALIDATORS + 1):
+            Types.validator(int, limit=limit)
+
+        # least recently used validators are evicted
+        self.assertEqual(len(validators), Types.MAX_VALIDATORS)
+        self.assertIs(
+            Types.validator(int, limit=1), Types.validator(int, limit=1)
+        )
+
+    def testBinding(self):
+
+        @Types(ptypes={'b': int, 'c': Types.NotNone(int), 'd': [int]})
+        def a(a, b, c=None, d=None):
+            pass
+
+        a(None, 1, 2)
+        a('', b=1, c=2, d=[3])
+        a(None, 1, 2, [3])
+        self._assertCall(a, None, '', 2)
+        self._assertCall(a, None, 1, None)
+        self._assertCall(a, None, 1)  # invalid default value is checked
+        self._assertCall(a, None, 1, 2, [''])
+        self._assertCall(a, None, b=1, c='')
+
+        @Types(ptypes={'args': Types.NotEmpty(tuple), 'kwargs': dict})
+        def b(*args, **kwargs):
+            pass
+
+        b(1, 2, b=3)
+        b(1)
+        self._assertCall(b)
+        self._assertCall(b, b=3)
+
+        class C(object):
+
+            @Types(ptypes={'a': Types.NotNone(int)})
+            def b(self, a):
+                return a
+
+        self.assertEqual(C().b(1), 1)
+        self.assertEqual(C().b(a=2), 2)
+        self._assertCall(C().b, None)
+
+    def testChecking(self):
+
+        value = list(range(100)) + ['']
+
+        self.assertFalse(Types.validator([int])(value))
+        self.assertFalse(Types.validator([int], checking=Types.FULL)(value))
+        self.assertTrue(Types.validator([int], checking=Types.OFF)(value))
+        self.assertTrue(Types.validator([int], checking=Types.OFF)([]))
+        self.assertFalse(Types.validator([int], checking=Types.OFF)({1}))
+        self.assertTrue(
+            Types.validator([int], checking=Types.FIRST, limit=100)(value)
+        )
+        self.assertFalse(
+            Types.validator([int], checking=Types.FIRST, limit=101)(value)
+        )
+        self.assertFalse(
+            Types.validator([int], checking=Types.SAMPLE, limit=101)(value)
+        )
+
+        validator = Types.validator({int}, checking=Types.SAMPLE, limit=10)
+
+        self.assertTrue(validator(set(range(100))))
+        self.assertFalse(validator(set([''] * 100)))
+        self.assertTrue(validator(set(range(5))))
+
+        value = tuple(range(100))  # sequences are sampled by index
+        items = list(Types._checkeditems(value, Types.SAMPLE, 10))
+        self.assertEqual(len(items), 10)
+        self.assertTrue(set(items) <= set(value))
+
+        value = set(range(100))  # unordered containers fall back to FIRST
+        self.assertEqual(
+            list(Types._checkeditems(value, Types.SAMPLE, 10)),
+            list(Types._checkeditems(value, Types.FIRST, 10))
+        )
+
+        validator = Types.validator(
+            [[int]], checking=Types.FIRST, limit=1
+        )  # nested containers are checked with the same mode
+        self.assertTrue(validator([[1, ''], ['']]))
+        self.assertFalse(validator([['', 1]]))
+
+    def testGlobalChecking(self):
+
+        @Types(ptypes={'a': [int]})
+        def a(a):
+            pass
+
+        @Types(ptypes={'a': [int]}, checking=Types.FULL)
+        def b(a):
+            pass
+
+        value = [1, '']
+
+        self.assertRaises(Types.TypesError, a, value)
+
+        Types.default_checking, Types.default_limit = Types.FIRST, 1
+
+        try:
+            a(value)
+            self.assertRaises(Types.TypesError, b, value)
+
+        finally:
+            Types.default_checking = Types.FULL
+            Types.default_limit = 16
+
+        self.assertRaises(Types.TypesError, a, value)
+
+        types = Types.get_annotations(b)[0]
+        types.checking = Types.OFF
+        b(value)
+        types.checking, types.limit = Types.FIRST, 2
+        self.assertRaises(Types.TypesError, b, value)
+
+        self.assertRaises(ValueError, Types, checking='all')
+
+    def testChangeTypes(self):
+
+        annotation = Types(rtype=int)
+
+        @annotation
+        def a(p=None):
+            return p
+
+        a(1)
+        self._assertCall(a, '')
+
+        annotation.rtype = str
+
+        a('')
+        self._assertCall(a, 1)
+
+        annotation.ptypes = {'p': str}
+
+        self._assertCall(a, 1)
+
+    def testYieldTypes(self):
+
+        @Types(ytype=int)
+        def a(*items):
+            for item in items:
+                yield item
+
+        self.assertEqual(list(a(1, None, 2)), [1, None, 2])
+
+        result = a(1, '')
+        self.assertEqual(next(result), 1)
+        self.assertRaises(Types.TypesError, next, result)
+
+        @Types(ytype=Types.NotNone(int))
+        def b(*items):
+            for item in items:
+                yield item
+
+        self.assertRaises(Types.TypesError, list, b(1, None))
+
+    def testIterTypes(self):
+
+        @Types(rtype=Types.Iter(Types.NotNone(int)))
+        def a(*items):
+            return iter(items)
+
+        result = a(1, None)
+
+        self.assertFalse(isinstance(result, list))
+        self.assertEqual(next(result), 1)
+        self.assertRaises(Types.TypesError, next, result)
+        self.assertEqual(list(a(1, 2)), [1, 2])
+
+        @Types(rtype=Types.Iter(int))
+        def b(value):
+            return value
+
+        # containers are checked at once and returned unchanged
+        value = [1, 2]
+        self.assertIs(b(value), value)
+        self.assertEqual(len(b((1, 2))), 2)
+        self.assertIsNone(b(None))
+        self.assertRaises(Types.TypesError, b, [''])
+        self.assertRaises(Types.TypesError, b, 1)
+        self.assertRaises(Types.TypesError, list, b(iter([''])))
+
+        @Types(rtype=Types.Iter(int), ytype=Types.NotNone(object))
+        def c(*items):
+            for item in items:
+                yield item
+
+        result = c(1, 2)
+        self.assertEqual(next(result), 1)
+        self.assertEqual(result.send(None), 2)
+        self.assertRaises(Types.TypesError, list, c(''))
+        self.assertRaises(Types.TypesError, list, c(None))
+
+        self.assertTrue(Types.validator(Types.Iter(int))(set()))
+        self.assertFalse(Types.validator(Types.Iter(int))(1))
+
     def testInterceptor(self):
 
         def interception(target, args, kwargs):
@@ -230,6 +498,483 @@ class CallTests(UTCase):
         self.assertTrue(result == "")
 
 
+@skipIf(Any is None, 'typing is not installed')
+class TypingTypesTest(UTCase):
+    """Test typing generic types specifications."""
+
+    def test_generics(self):
+
+        validator = Types.validator(Dict[str, List[int]])
+
+        self.assertTrue(validator(None))
+        self.assertTrue(validator({}))
+        self.assertTrue(validator({'a': [1, 2], 'b': []}))
+        self.assertFalse(validator({'a': [1, '']}))
+        self.assertFalse(validator({1: [1]}))
+        self.assertFalse(validator([]))
+
+        validator = Types.validator(Set[int])
+
+        self.assertTrue(validator(set([1, 2])))
+        self.assertFalse(validator(set([1, ''])))
+        self.assertFalse(validator([1]))
+
+        validator = Types.validator(Tuple[int, str])
+
+        self.assertTrue(validator((1, '')))
+        self.assertFalse(validator((1, 2)))
+        self.assertFalse(validator((1, '', 2)))
+
+        validator = Types.validator(Tuple[int, ...])
+
+        self.assertTrue(validator((1, 2, 3)))
+        self.assertTrue(validator(()))
+        self.assertFalse(validator((1, '')))
+
+        validator = Types.validator(Tuple[()])
+
+        self.assertTrue(validator(()))
+        self.assertFalse(validator((1,)))
+        self.assertTrue(Types.validator(Tuple)((1,)))
+
+    def test_special_forms(self):
+
+        validator = Types.validator(Union[int, List[str]])
+
+        self.assertTrue(validator(1))
+        self.assertTrue(validator(['']))
+        self.assertTrue(validator(None))
+        self.assertFalse(validator([1]))
+
+        validator = Types.validator(Types.NotNone(Optional[int]))
+
+        self.assertTrue(validator(1))
+        self.assertFalse(validator(None))
+        self.assertFalse(validator(''))
+
+        self.assertTrue(Types.validator(Any)(object()))
+        self.assertTrue(Types.validator(List)([1, '']))
+        self.assertFalse(Types.validator(List)(()))
+
+        validator = Types.validator([(int, List[int])])
+
+        self.assertTrue(validator([1, [2]]))
+        self.assertFalse(validator([1, ['']]))
+
+    def test_cache(self):
+
+        self.assertIs(
+            Types.validator(Dict[str, int]), Types.validator(Dict[str, int])
+        )
+        self.assertIs(Types.validator(int), Types.validator(int))
+        self.assertIsNot(
+            Types.validator(int), Types.validator(int, checking=Types.OFF)
+        )
+        self.assertIsNot(Types.validator([int]), Types.validator([int]))
+
+    def test_annotations(self):
+
+        def a(a, b=None):
+            return a
+
+        a.__annotations__ = {'a': Union[int, str], 'b': int, 'return': int}
+
+        a = Types(ptypes={'b': str}, annotations=True)(a)
+
+        self.assertEqual(a(1, ''), 1)
+        self.assertRaises(Types.TypesError, a, 1.)
+        self.assertRaises(Types.TypesError, a, '')
+        self.assertRaises(Types.TypesError, a, 1, 2)
+
+        def c(*args, **kwargs):
+            pass
+
+        c.__annotations__ = {'args': int, 'kwargs': List[int]}
+
+        c = Types(annotations=True)(c)
+
+        c(1, 2, c=[3])
+        self.assertRaises(Types.TypesError, c, 1, '')
+        self.assertRaises(Types.TypesError, c, c=[''])
+
+        def b(a):
+            return a
+
+        b.__annotations__ = {'a': int}
+
+        b = Types()(b)  # annotations are not used by default
+
+        self.assertEqual(b(''), '')
+
+        def d(a, b):
+            return a
+
+        d.__annotations__ = {'a': 'doc', 'b': object(), 'return': int}
+
+        d = Types(annotations=True)(d)  # ignores annotations which are not
+        # type specifications
+
+        self.assertEqual(d(1, 2), 1)
+        self.assertRaises(Types.TypesError, d, '', 2)
+
+
+@skipIf(numpy is None, 'numpy is not installed')
+class ArrayTypesTest(UTCase):
+    """Test the Types.Array specification."""
+
+    def test_metadata(self):
+
+        validator = Types.validator(
+            Types.Array(dtype='float64', shape=(None, 3), contiguous=True)
+        )
+
+        self.assertTrue(validator(None))
+        self.assertTrue(validator(numpy.zeros((4, 3))))
+        self.assertTrue(validator(numpy.zeros((0, 3))))
+        self.assertFalse(validator([[0., 0., 0.]]))
+        self.assertFalse(validator(numpy.zeros((4, 3), dtype=int)))
+        self.assertFalse(validator(numpy.zeros((4, 2))))
+        self.assertFalse(validator(numpy.zeros(3)))
+        self.assertFalse(validator(numpy.zeros((3, 4)).T))
+
+        validator = Types.validator(Types.Array(ndim=2, contiguous='F'))
+
+        self.assertTrue(validator(numpy.zeros((3, 4)).T))
+        self.assertFalse(validator(numpy.zeros((3, 4, 1), order='F')))
+
+    def test_finite(self):
+
+        validator = Types.validator(Types.Array(finite=True))
+
+        self.assertTrue(validator(numpy.arange(4)))
+        self.assertTrue(validator(numpy.ones(4)))
+        self.assertFalse(validator(numpy.array([1., numpy.nan])))
+        self.assertFalse(validator(numpy.array([1j, numpy.inf])))
+
+    def test_types(self):
+
+        @Types(
+            rtype=Types.NotNone(Types.Array(ndim=1)),
+            ptypes={'points': Types.Array(shape=(None, 2), finite=True)}
+        )
+        def mean(points):
+            return None if points is None else points.mean(axis=0)
+
+        self.assertEqual(list(mean(numpy.ones((3, 2)))), [1., 1.])
+        self.assertRaises(Types.TypesError, mean, numpy.ones((3, 3)))
+        self.assertRaises(
+            Types.TypesError, mean, numpy.array([[1., numpy.nan]])
+        )
+        self.assertRaises(Types.TypesError, mean, None)
+
+        validator = Types.validator([Types.Array(ndim=1)])
+
+        self.assertTrue(validator([numpy.ones(2), numpy.ones(3)]))
+        self.assertFalse(validator([numpy.ones(2), numpy.ones((3, 1))]))
+
+
+@skipIf(new_event_loop is None, 'asyncio is not available')
+class AsyncMemoizeTest(UTCase):
+    """Test the memoize annotation on asynchronous targets."""
+
+    def setUp(self):
+
+        self.n = 0
+        self.loop = new_event_loop()
+        set_event_loop(self.loop)
+
+    def tearDown(self):
+
+        set_event_loop(None)
+        self.loop.close()
+
+    def _func(self, memoize, fail=False):
+        """Get a memoized function which returns a coroutine."""
+
+        def func(value):
+
+            self.n += 1
+
+            if fail:
+                return wait_for(asleep(1), 0.001)
+
+            return asleep(0.01, result=value)
+
+        return memoize(func)
+
+    def test_join(self):
+
+        for policy in (Memoize.LRU, Memoize.LFU, Memoize.TTL):
+            self.n = 0
+            func = self._func(Memoize(policy=policy))
+
+            results = self.loop.run_until_complete(
+                gather(func(1), func(1), func(2))
+            )
+
+            self.assertEqual(results, [1, 1, 2])
+            self.assertEqual(self.n, 2)
+
+            # the done task is awaited again
+            self.assertEqual(self.loop.run_until_complete(func(1)), 1)
+            self.assertEqual(self.n, 2)
+
+    def test_timeout(self):
+
+        func = self._func(Memoize())
+
+        results = self.loop.run_until_complete(
+            gather(wait_for(func(1), 0.001), func(1), return_exceptions=True)
+        )
+
+        # the timeout of an awaiter does not cancel the shared task
+        self.assertIsInstance(results[0], ATimeoutError)
+        self.assertEqual(results[1], 1)
+        self.assertEqual(self.loop.run_until_complete(func(1)), 1)
+        self.assertEqual(self.n, 1)
+
+    def test_failure(self):
+
+        func = self._func(Memoize(), fail=True)
+
+        for _ in range(2):
+            self.assertRaises(
+                ATimeoutError, self.loop.run_until_complete, func(1)
+            )
+
+        self.assertEqual(self.n, 2)
+
+    def test_errors(self):
+
+        func = self._func(Memoize(errors=ATimeoutError), fail=True)
+
+        for _ in range(2):
+            self.assertRaises(
+                ATimeoutError, self.loop.run_until_complete, func(1)
+            )
+
+        self.assertEqual(self.n, 1)
+
+    def test_failures(self):
+
+        func = self._func(Memoize(failures=True), fail=True)
+
+        for _ in range(2):
+            self.assertRaises(
+                ATimeoutError, self.loop.run_until_complete, func(1)
+            )
+
+        self.assertEqual(self.n, 1)
+
+    def test_backend(self):
+
+        func = self._func(Memoize(backend=LRUCache()))
+
+        self.assertRaises(ValueError, func, 1)
+        self.assertEqual(self.n, 1)
+
+
+class _Task(object):
+    """Done task without asyncio."""
+
+    def __init__(self, exception=None, cancelled=False):
+
+        self._exception = exception
+        self._cancelled = cancelled
+
+    def cancelled(self):
+
+        return self._cancelled
+
+    def exception(self):
+
+        return self._exception
+
+
+class TaskMemoizeTest(UTCase):
+    """Test the memoize bookkeeping of done tasks (runs without asyncio)."""
+
+    def _landed(self, memoize, task):
+        """Cache and land input task, and get True iif it stays cached."""
+
+        cache = memoize._cache
+
+        memoize._set(cache, 'key', (), {}, task)
+        memoize._landed(cache, 'key', task)
+
+        result = 'key' in cache
+        cache.clear()
+
+        return result
+
+    def test_landed(self):
+
+        memoize = Memoize()
+
+        self.assertTrue(self._landed(memoize, _Task()))
+        self.assertFalse(self._landed(memoize, _Task(cancelled=True)))
+        self.assertFalse(self._landed(memoize, _Task(KeyError())))
+
+    def test_failures(self):
+
+        memoize = Memoize(failures=True)
+
+        self.assertTrue(self._landed(memoize, _Task(KeyError())))
+        self.assertFalse(self._landed(memoize, _Task(cancelled=True)))
+
+    def test_errors(self):
+
+        memoize = Memoize(errors=KeyError)
+        task = _Task(KeyError())
+
+        self.assertFalse(self._landed(memoize, task))
+        self.assertIs(memoize._errors.get((memoize._cache, 'key')), task)
+
+        self.assertFalse(self._landed(memoize, _Task(ValueError())))
+        self.assertEqual(len(memoize._errors), 1)
+
+    def test_landed_replaced(self):
+
+        memoize = Memoize()
+        cache = memoize._cache
+        task = _Task(cancelled=True)
+
+        memoize._set(cache, 'key', (), {}, task)
+        memoize._set(cache, 'key', (), {}, 1)  # replaced before landing
+        memoize._landed(cache, 'key', task)
+
+        self.assertEqual(cache.get('key')[2], 1)
+
+
+class MemoizeManyTest(UTCase):
+    """Test the MemoizeMany annotation."""
+
+    def setUp(self):
+
+        self.batches = []
+
+        def fetch(ids, scale=1):
+
+            self.batches.append(ids)
+
+            return [value * scale for value in ids]
+
+        self.memoize = MemoizeMany()
+        self.fetch = self.memoize(fetch)
+
+    def test_batch(self):
+
+        self.assertEqual(self.fetch([1, 2, 3]), [1, 2, 3])
+        self.assertEqual(self.fetch([3, 4, 2, 4]), [3, 4, 2, 4])
+
+        # only missing elements are fetched, once
+        self.assertEqual(self.batches, [[1, 2, 3], [4]])
+
+        stats = self.memoize.stats()
+
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 5)
+        self.assertEqual(stats['entries'], 4)
+        self.assertEqual(self.memoize.getparams(4), ((4,), {'scale': 1}))
+
+    def test_hits(self):
+
+        self.fetch((1, 2))
+
+        self.assertEqual(self.fetch((2, 1)), [2, 1])
+        self.assertEqual(self.batches, [(1, 2)])
+
+    def test_params(self):
+
+        self.fetch([1, 2])
+
+        self.assertEqual(self.fetch([1, 2], scale=2), [2, 4])
+        self.assertEqual(self.fetch(iter([1, 2])), [1, 2])
+        self.assertEqual(len(self.batches), 2)
+
+    def test_wrong_results(self):
+
+        memoize = MemoizeMany()
+        fetch = memoize(lambda ids: [])
+
+        self.assertRaises(ValueError, fetch, [1])
+        self.assertEqual(fetch([]), [])
+
+    def test_single_flight(self):
+
+        self.assertRaises(ValueError, MemoizeMany, single_flight=True)
+
+    def test_methods(self):
+
+        class Test(object):
+
+            @MemoizeMany()
+            def fetch(self, ids):
+                return [value * 2 for value in ids]
+
+            @classmethod
+            @MemoizeMany()
+            def cfetch(cls, ids):
+                return [value * 3 for value in ids]
+
+        self.assertEqual(Test().fetch([1, 2]), [2, 4])
+        self.assertEqual(Test.cfetch([1, 2]), [3, 6])
+
+
+class InstrumentTest(UTCase):
+    """Test the Instrument annotation."""
+
+    def setUp(self):
+
+        self.measures = []
+
+        self.instrument = Instrument(
+            lambda instrument, measures: self.measures.append(measures)
+        )
+
+    def test_call(self):
+
+        @self.instrument
+        def func():
+            return 1
+
+        self.assertEqual(func(), 1)
+        self.assertEqual(len(self.measures), 1)
+        self.assertGreaterEqual(self.measures[0]['duration'], 0)
+        self.assertNotIn('items', self.measures[0])
+
+    def test_generator(self):
+
+        @self.instrument
+        def func(count):
+            for item in range(count):
+                yield item
+
+        result = func(3)
+
+        self.assertEqual(self.measures, [])
+
+        self.assertEqual(list(result), [0, 1, 2])
+        self.assertEqual(len(self.measures), 1)
+
+        measures = self.measures[0]
+
+        self.assertEqual(measures['items'], 3)
+        self.assertGreaterEqual(measures['first'], 0)
+        self.assertGreaterEqual(measures['duration'], measures['first'])
+
+    def test_empty_generator(self):
+
+        @self.instrument
+        def func():
+            return
+            yield
+
+        self.assertEqual(list(func()), [])
+        self.assertEqual(self.measures[0]['items'], 0)
+        self.assertIsNone(self.measures[0]['first'])
+
+
 class MemoizeTest(UTCase):
     """Test the memoize annotation."""
 
@@ -247,6 +992,17 @@ class MemoizeTest(UTCase):
 
         self.func = self.memoize(func)
 
+    def _func(self):
+        """Get a new function which counts its calls."""
+
+        def func(*args, **kwargs):
+
+            self.n += 1
+
+            return self.n
+
+        return func
+
     def test_empty(self):
 
         result = self.func()
@@ -283,7 +1039,696 @@ class MemoizeTest(UTCase):
         result = self.func(3, 4, b=5)
         self.assertEqual(result, 3)
 
-        self.assertRaises(ValueError, self.memoize.getparams, 3)
+        # the least recently used result is evicted
+        params = self.memoize.getparams(3)
+        self.assertEqual(params, ((3, 4), {'b': 5}))
+
+        self.assertRaises(ValueError, self.memoize.getparams, 1)
+
+        result = self.func(1, 2, a=3)
+        self.assertEqual(result, 2)
+
+    def test_lfu(self):
+
+        memoize = Memoize(max_size=2, policy=Memoize.LFU)
+        func = memoize(self._func())
+
+        func(1)
+        func(1)
+        func(2)
+        func(3)  # evicts 2 which is less frequently used than 1
+
+        self.assertEqual(func(1), 1)
+        self.assertEqual(func(3), 3)
+        self.assertEqual(func(2), 4)
+
+    def test_ttl(self):
+
+        memoize = Memoize(ttl=0.05)
+
+        self.assertEqual(memoize.policy, Memoize.TTL)
+
+        func = memoize(self._func())
+
+        self.assertEqual(func(), 1)
+        self.assertEqual(func(), 1)
+
+        sleep(0.1)
+
+        self.assertEqual(func(), 2)
+
+    def _flights(self, func, *args):
+        """Call func concurrently with input args and return results."""
+
+        results = []
+
+        def call(arg):
+            try:
+                results.append(func(arg))
+
+            except Exception as ex:
+                results.append(ex)
+
+        threads = [Thread(target=call, args=(arg,)) for arg in args]
+
+        for thread in threads:
+            thread.start()
+
+        return threads, results
+
+    def test_single_flight(self):
+
+        gate = Event()
+        calls = []
+
+        memoize = Memoize(single_flight=True)
+
+        @memoize
+        def func(arg):
+            calls.append(arg)
+            gate.wait()
+            if arg is None:
+                raise ValueError()
+            return [arg]
+
+        threads, results = self._flights(func, *([1] * 5 + [None] * 3))
+
+        # wait for the two flights and the calls which join them
+        while len(calls) < 2 or memoize.stats()['joined'] < 6:
+            sleep(0.001)
+
+        self.assertEqual(sorted(calls, key=str), [1, None])
+
+        gate.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            len([result for result in results if result == [1]]), 5
+        )
+        # concurrent callers share the same result object
+        self.assertEqual(
+            len(set(id(result) for result in results if result == [1])), 1
+        )
+        self.assertEqual(
+            len([ex for ex in results if isinstance(ex, ValueError)]), 3
+        )
+
+        self.assertEqual(func(1), [1])
+        self.assertEqual(len(calls), 2)
+        self.assertRaises(ValueError, func, None)  # errors are not cached
+        self.assertEqual(len(calls), 3)
+
+    def test_single_flight_keys(self):
+
+        gate = Event()
+
+        @Memoize(single_flight=True, stripes=1)
+        def func(arg):
+            if arg:
+                gate.wait()
+            return arg
+
+        threads, _ = self._flights(func, 1)
+
+        self.assertEqual(func(0), 0)  # does not wait for the key 1
+
+        gate.set()
+
+        for thread in threads:
+            thread.join()
+
+    def test_unhashable(self):
+
+        result = self.func([1], a={'b': 2})
+
+        self.assertEqual(self.func([1], a={'b': 2}), result)
+        self.assertEqual(
+            self.memoize.getparams(result), (([1],), {'a': {'b': 2}})
+        )
+        self.assertNotEqual(self.func([2], a={'b': 2}), result)
+
+    def test_keyfunc(self):
+
+        memoize = Memoize(keyfunc=lambda args, kwargs: len(args))
+        func = memoize(self._func())
+
+        self.assertEqual(func(1), 1)
+        self.assertEqual(func(2), 1)
+        self.assertEqual(func(1, 2), 2)
+
+    def test_backend(self):
+
+        tmp = mkdtemp()
+
+        try:
+            dbpath = path.join(tmp, 'cache.db')
+
+            func = Memoize(backend=SQLiteCache(dbpath))(self._func())
+
+            self.assertEqual(func([1]), 1)
+
+            # another process memoizes the same function
+            func = Memoize(backend=SQLiteCache(dbpath))(self._func())
+
+            self.assertEqual(func([1]), 1)
+            self.assertEqual(func([2]), 2)
+
+            # another function does not share results
+            def other(value):
+
+                return 'other'
+
+            other = Memoize(backend=SQLiteCache(dbpath))(other)
+
+            self.assertEqual(other([1]), 'other')
+
+        finally:
+            rmtree(tmp)
+
+    def test_backend_unserializable(self):
+
+        tmp = mkdtemp()
+
+        try:
+            backend = SQLiteCache(path.join(tmp, 'cache.db'))
+
+            @Memoize(backend=backend)
+            def func(value):
+
+                self.n += 1
+
+                return Lock()
+
+            lock = Lock()
+
+            # results and parameters which can not be pickled are kept in
+            # process
+            for value in (1, lock):
+                result = func(value)
+
+                self.assertIs(func(value), result)
+
+            self.assertEqual(self.n, 2)
+            self.assertEqual(len(backend), 0)
+
+        finally:
+            rmtree(tmp)
+
+    def test_backend_lock(self):
+
+        reading, release = Event(), Event()
+
+        class Backend(LRUCache):
+
+            def get(self, key, default=None):
+
+                if key[-1] == ((1,), ()):
+                    reading.set()
+                    release.wait()
+
+                return super(Backend, self).get(key, default)
+
+        func = Memoize(backend=Backend())(self._func())
+
+        first = Thread(target=func, args=(1,))
+        first.start()
+        reading.wait()
+
+        # a pending backend read does not block other calls
+        second = Thread(target=func, args=(2,))
+        second.start()
+        second.join(5)
+        blocked = second.is_alive()
+
+        release.set()
+        first.join()
+        second.join()
+
+        self.assertFalse(blocked)
+        self.assertEqual(self.n, 2)
+
+    def test_backend_serializer(self):
+
+        tmp = mkdtemp()
+
+        try:  # entries are tuples which can not be stored as bytes
+            backend = SQLiteCache(path.join(tmp, 'cache.db'), serializer=None)
+
+            self.assertRaises(ValueError, Memoize, backend=backend)
+
+        finally:
+            rmtree(tmp)
+
+    @skipIf(SharedMemory is None, 'shared memory requires python >= 3.8')
+    def test_shared_memory_backend(self):
+
+        cache = SharedMemoryCache(slots=16, slot_size=512)
+
+        try:
+            func = Memoize(backend=cache)(self._func())
+
+            self.assertEqual(func(1), 1)
+            self.assertEqual(func(1), 1)
+
+            # another process attaches the block with another memoizer
+            func = Memoize(
+                backend=SharedMemoryCache(name=cache.name)
+            )(self._func())
+
+            self.assertEqual(func(1), 1)
+            self.assertEqual(self.n, 1)
+
+            self.assertRaises(
+                ValueError, Memoize,
+                backend=SharedMemoryCache(name=cache.name, serializer=None)
+            )
+
+        finally:
+            cache.close()
+            cache.unlink()
+
+    def test_watcher(self):
+
+        watcher = RSSWatcher(max_rss=maxsize, interval=0.01)
+        memoize = Memoize(watcher=watcher)
+        func = memoize(self._func())
+
+        func(1)
+
+        self.assertEqual(len(watcher._caches), 1)
+
+        memoize.__del__()
+
+        self.assertEqual(len(watcher._caches), 0)
+
+    def test_backend_stats(self):
+
+        tmp = mkdtemp()
+
+        try:
+            memoize = Memoize(
+                backend=SQLiteCache(path.join(tmp, 'cache.db'))
+            )
+            func = memoize(self._func())
+
+            def run():
+
+                for _ in range(100):
+                    func(1)
+
+            threads = [Thread(target=run) for _ in range(4)]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            stats = memoize.stats()
+
+            self.assertEqual(stats['hits'] + stats['misses'], 400)
+
+        finally:
+            rmtree(tmp)
+
+    def test_reverse(self):
+
+        memoize = Memoize(max_size=2, reverse=True)
+
+        @memoize
+        def func(*args, **kwargs):
+            return [args, kwargs]
+
+        result = func(1, a=2)
+
+        self.assertEqual(memoize.getparams(result), ((1,), {'a': 2}))
+        # identity is used instead of equality
+        self.assertRaises(ValueError, memoize.getparams, [(1,), {'a': 2}])
+
+        func(2)
+        func(3)  # evicts result
+
+        self.assertRaises(ValueError, memoize.getparams, result)
+
+        result = func(3)
+
+        self.assertEqual(memoize.getparams(result), ((3,), {}))
+
+        memoize.clearcache()
+
+        self.assertRaises(ValueError, memoize.getparams, result)
+        self.assertEqual(memoize._index, {})
+
+    def test_reverse_shared(self):
+
+        memoize = Memoize(reverse=True)
+
+        @memoize
+        def func(*args):
+            return None
+
+        func(1)
+        func(2)
+
+        self.assertIn(memoize.getparams(None), [((1,), {}), ((2,), {})])
+
+    def test_stats(self):
+
+        memoize = Memoize(max_size=1)
+        func = memoize(self._func())
+
+        func(1)
+        func(1)
+        func(2)  # evicts 1
+
+        stats = memoize.stats()
+
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['entries'], 1)
+        self.assertIsNone(stats['bytes'])
+        self.assertEqual(stats['ages'][1], 1)
+        self.assertEqual(sum(stats['ages'].values()), 1)
+
+    def test_sizeof(self):
+
+        memoize = Memoize(max_size=1, sizeof=lambda entry: 10)
+        func = memoize(self._func())
+
+        func(1)
+        self.assertEqual(memoize.stats()['bytes'], 10)
+
+        func(2)  # evicts 1
+        self.assertEqual(memoize.stats()['bytes'], 10)
+
+        memoize.clearcache()
+        self.assertEqual(memoize.stats()['bytes'], 0)
+
+        memoize = Memoize(sizeof=True)
+        func = memoize(self._func())
+
+        func(1)
+        self.assertGreater(memoize.stats()['bytes'], 0)
+
+    def test_max_bytes(self):
+
+        memoize = Memoize(max_bytes=30, sizeof=lambda entry: 10)
+        func = memoize(self._func())
+
+        for value in range(4):
+            func(value)
+
+        self.assertEqual(memoize.stats()['entries'], 3)
+        self.assertEqual(memoize.stats()['bytes'], 30)
+
+        memoize.max_bytes = 10
+
+        self.assertEqual(memoize.stats()['entries'], 1)
+
+        memoize = Memoize(max_bytes=1)  # default sizeof
+        func = memoize(self._func())
+        func(1)
+
+        self.assertEqual(memoize.stats()['entries'], 0)
+
+    def test_instance(self):
+
+        memoize = Memoize(instance=True, reverse=True)
+
+        class Test(object):
+
+            @memoize
+            def method(this, value):
+
+                self.n += 1
+
+                return [value, self.n]
+
+        test, other = Test(), Test()
+
+        result = test.method(1)
+
+        self.assertIs(test.method(1), result)
+        self.assertIsNot(other.method(1), result)
+        self.assertEqual(memoize.stats()['entries'], 2)
+
+        # the instance is neither a key parameter nor retained
+        self.assertEqual(memoize.getparams(result), ((), {'value': 1}))
+
+        testref = ref(test)
+        del test
+        collect()
+
+        self.assertIsNone(testref())
+
+        other.method(2)  # releases the cache of test
+
+        self.assertEqual(memoize.stats()['entries'], 2)
+        self.assertRaises(ValueError, memoize.getparams, result)
+
+    def test_instance_backend(self):
+
+        self.assertRaises(
+            ValueError, Memoize, instance=True, backend=LRUCache()
+        )
+
+    def _refreshed(self, memoize, result):
+        """Wait for a result refreshed in background."""
+
+        for _ in range(500):
+            try:
+                return memoize.getparams(result)
+
+            except ValueError:
+                sleep(0.01)
+
+    def test_soft_ttl(self):
+
+        memoize = Memoize(soft_ttl=0.2)
+        func = memoize(self._func())
+
+        self.assertEqual(func(), 1)
+
+        sleep(0.3)
+
+        self.assertEqual(func(), 1)  # stale result, refreshed in background
+        self.assertEqual(self._refreshed(memoize, 2), ((), {}))
+        self.assertEqual(func(), 2)
+        self.assertEqual(self.n, 2)
+
+    def test_soft_ttl_instance(self):
+
+        memoize = Memoize(instance=True, soft_ttl=0.1)
+
+        class Test(object):
+
+            @memoize
+            def method(this):
+
+                self.n += 1
+
+                return self.n
+
+        test = Test()
+
+        self.assertEqual(test.method(), 1)
+
+        sleep(0.2)
+
+        self.assertEqual(test.method(), 1)  # refreshed in background
+
+        for _ in range(500):
+            if self.n > 1 and not memoize._refreshing:
+                break
+
+            sleep(0.01)
+
+        # the idle refresh thread does not retain the instance
+        testref = ref(test)
+        del test
+        collect()
+
+        self.assertIsNone(testref())
+
+    def test_soft_ttl_error(self):
+
+        memoize = Memoize(soft_ttl=0.1)
+
+        def func():
+
+            self.n += 1
+
+            if self.n > 1:
+                raise Exception()
+
+            return self.n
+
+        func = memoize(func)
+
+        self.assertEqual(func(), 1)
+
+        sleep(0.2)
+
+        self.assertEqual(func(), 1)
+
+        for _ in range(500):
+            if self.n > 1 and not memoize._refreshing:
+                break
+
+            sleep(0.01)
+
+        # the stale result is kept and refreshed again
+        self.assertEqual(func(), 1)
+
+    def test_tags(self):
+
+        memoize = Memoize(tags=lambda args, kwargs: ['user', args[0]])
+        func = memoize(self._func())
+
+        func(1)
+        func(2)
+
+        self.assertEqual(memoize.invalidate(1), 1)
+        self.assertEqual(memoize.stats()['entries'], 1)
+        self.assertEqual(func(1), 3)
+        self.assertEqual(memoize.invalidate('user', 'unknown'), 2)
+        self.assertEqual(memoize.stats()['entries'], 0)
+
+    def test_addtags(self):
+
+        memoize = Memoize()
+
+        @memoize
+        def user(uid):
+
+            addtags(('user', uid))
+
+            self.n += 1
+
+            return self.n
+
+        @memoize
+        def users(*uids):
+
+            return [user(uid) for uid in uids]
+
+        self.assertEqual(users(1, 2), [1, 2])
+        self.assertEqual(users(2), [2])  # depends on user 2 from a hit
+
+        # dependent results are invalidated with their dependencies
+        self.assertEqual(memoize.invalidate(('user', 2)), 3)
+        self.assertEqual(users(2), [3])
+        self.assertEqual(users(1), [1])
+
+    def test_invalidate(self):
+
+        memoizes = [Memoize(tags=lambda args, kwargs: args) for _ in range(2)]
+        funcs = [memoize(self._func()) for memoize in memoizes]
+
+        for func in funcs:
+            func('tag')
+
+        self.assertEqual(invalidate('tag'), 2)
+
+        for memoize in memoizes:
+            self.assertEqual(memoize.stats()['entries'], 0)
+
+    def test_errors(self):
+
+        memoize = Memoize(errors=(ValueError,), error_ttl=0.1)
+
+        @memoize
+        def func(error):
+
+            self.n += 1
+
+            raise error()
+
+        for _ in range(2):
+            self.assertRaises(ValueError, func, ValueError)
+            self.assertRaises(KeyError, func, KeyError)
+
+        # value errors are raised again without calling the target
+        self.assertEqual(self.n, 3)
+        stats = memoize.stats()
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['entries'], 0)
+
+        sleep(0.2)
+
+        self.assertRaises(ValueError, func, ValueError)
+        self.assertEqual(self.n, 4)
+
+        memoize.clearcache()
+
+        self.assertRaises(ValueError, func, ValueError)
+        self.assertEqual(self.n, 5)
+
+    def test_error_copies(self):
+
+        measures = []
+
+        memoize = Memoize(
+            errors=ValueError, handler=lambda _, m: measures.append(m['hit'])
+        )
+
+        @memoize
+        def func(value):
+
+            raise ValueError(value)
+
+        errors = []
+
+        for _ in range(2):
+            try:
+                func(1)
+
+            except ValueError as error:
+                errors.append(error)
+
+        # every call raises a new copy of the cached error
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEqual(errors[0].args, errors[1].args)
+        self.assertEqual(measures, [False, True])
+
+    def test_error_max_size(self):
+
+        memoize = Memoize(errors=ValueError, error_max_size=1)
+
+        @memoize
+        def func(value):
+
+            self.n += 1
+
+            raise ValueError(value)
+
+        for value in (1, 2, 1):
+            self.assertRaises(ValueError, func, value)
+
+        self.assertEqual(self.n, 3)
+
+    def test_handler(self):
+
+        measures = []
+
+        memoize = Memoize(handler=lambda _, m: measures.append(m['hit']))
+        func = memoize(self._func())
+
+        func(1)
+        func(1)
+
+        self.assertEqual(measures, [False, True])
+
+    def test_policy(self):
+
+        self.assertEqual(self.memoize.policy, Memoize.LRU)
+        self.assertRaises(ValueError, Memoize, policy='fifo')
 
 
 if __name__ == '__main__':
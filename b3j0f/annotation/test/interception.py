@@ -25,14 +25,53 @@
 # SOFTWARE.
 # --------------------------------------------------------------------
 
-from unittest import main
+from unittest import main, skipIf
 
 from b3j0f.utils.ut import UTCase
 
+from ..core import Annotation
+
 from ..interception import (
-    Interceptor, PrivateInterceptor, PrivateCallInterceptor, CallInterceptor
+    Interceptor, PrivateInterceptor, PrivateCallInterceptor, CallInterceptor,
+    InterceptedGenerator, InterceptedAsyncGenerator, RateSampling,
+    CountSampling, BudgetSampling, InterceptionJoinpoint, ExecutionContext
 )
 
+from threading import Thread
+
+from types import FunctionType
+
+from time import sleep
+
+from gc import collect
+
+try:  # asynchronous generators require python >= 3.6
+    from asyncio import new_event_loop, set_event_loop, sleep as asleep
+
+    exec(
+        """
+async def agen(count, log):
+    try:
+        for item in range(count):
+            try:
+                sent = yield item
+
+            except ValueError:
+                log.append('thrown')
+                sent = yield -1
+
+            if sent is not None:
+                log.append(sent)
+
+    finally:
+        await asleep(0)
+        log.append('closed')
+"""
+    )
+
+except (ImportError, SyntaxError):
+    agen = None
+
 
 class InterceptorTest(UTCase):
     """
@@ -163,6 +202,109 @@ class InterceptionTest(InterceptorTest):
         self.assertEqual(self.count, 0)
 
 
+class SamplingTest(InterceptionTest):
+    """Test interception sampling."""
+
+    def test_count(self):
+
+        self.interceptor.sampling = CountSampling(3)
+
+        for _ in range(7):
+            self.call_target()
+
+        self.assertEqual(self.count, 3)
+
+    def test_rate(self):
+
+        self.interceptor.sampling = RateSampling(0)
+
+        self.call_target()
+
+        self.assertEqual(self.count, 0)
+
+        self.interceptor.sampling = RateSampling(1)
+
+        self.call_target()
+
+        self.assertEqual(self.count, 1)
+
+    def test_budget(self):
+
+        self.interceptor.sampling = BudgetSampling(budget=0.01, period=60)
+
+        def interception(joinpoint):
+            self.count += 1
+            sleep(0.01)
+            return joinpoint.proceed()
+
+        self.interceptor.interception = interception
+
+        for _ in range(3):
+            self.call_target()
+
+        self.assertEqual(self.count, 1)
+
+        self.interceptor.sampling._end = 0  # force a new period
+
+        self.call_target()
+
+        self.assertEqual(self.count, 2)
+
+
+class EnabledForTest(InterceptorTest):
+    """Test interceptors enabled for the current thread."""
+
+    def get_interceptor(self):
+
+        return Interceptor(interception=self.interception)
+
+    def get_target(self):
+
+        return lambda: None
+
+    def call_target(self):
+        """Call target."""
+
+        self.target()
+
+    def test_enabled_for(self):
+
+        self.interceptor.enable = False
+
+        with Interceptor.enabled_for():
+            self.call_target()
+
+        self.assertEqual(self.count, 1)
+
+        self.call_target()
+
+        self.assertEqual(self.count, 1)
+
+    def test_enabled_for_other_types(self):
+
+        self.interceptor.enable = False
+
+        with PrivateInterceptor.enabled_for():
+            self.call_target()
+
+        self.assertEqual(self.count, 0)
+
+    def test_enabled_for_thread(self):
+
+        self.interceptor.enable = False
+
+        with Interceptor.enabled_for(Interceptor):
+            thread = Thread(target=self.call_target)
+            thread.start()
+            thread.join()
+
+            self.assertEqual(self.count, 0)
+
+            self.call_target()
+
+        self.assertEqual(self.count, 1)
+
+
 class PrivateInterceptorTest(InterceptorTest):
     """
     Test interception
@@ -250,5 +392,474 @@ class PrivateCallInterceptorTest(InterceptorTest):
         self.target()()
 
 
+class ClassInterceptionTest(UTCase):
+    """Test interception of class methods with the class mode."""
+
+    class Test(object):
+
+        def a(self):
+            return 'a'
+
+        def b(self):
+            return 'b'
+
+        def _c(self):
+            return 'c'
+
+        @staticmethod
+        def d(value):
+            return value
+
+        @classmethod
+        def e(cls):
+            return cls
+
+    def setUp(self):
+
+        self.count = 0
+
+        self.cls = type('Test', (ClassInterceptionTest.Test,), {})
+
+    def interception(self, joinpoint):
+
+        self.count += 1
+
+        return joinpoint.proceed()
+
+    def intercept(self, **kwargs):
+
+        self.interceptor = Interceptor(
+            interception=self.interception, **kwargs
+        )
+
+        self.interceptor(self.cls)
+
+    def tearDown(self):
+
+        self.interceptor.__del__()
+        del self.interceptor
+
+    def test_all(self):
+
+        self.intercept(methods=True)
+
+        instance = self.cls()
+
+        self.assertEqual(instance.a(), 'a')
+        self.assertEqual(instance.b(), 'b')
+        self.assertEqual(instance._c(), 'c')
+
+        self.assertEqual(self.count, 2)
+
+    def test_staticmethod(self):
+
+        self.intercept(methods=True)
+
+        self.assertEqual(self.cls.d('d'), 'd')
+        self.assertEqual(self.cls().d('d'), 'd')
+        self.assertNotIsInstance(self.cls.__dict__.get('d'), FunctionType)
+        self.assertEqual(self.count, 0)  # static methods are not intercepted
+        self.assertEqual(
+            Interceptor.get_annotations(self.cls.d, ctx=self.cls), []
+        )
+
+    def test_classmethod(self):
+
+        self.intercept(methods=True)
+
+        self.assertIs(self.cls.e(), self.cls)
+        self.assertIs(self.cls().e(), self.cls)
+        self.assertNotIsInstance(self.cls.__dict__.get('e'), FunctionType)
+        self.assertEqual(self.count, 2)
+
+    def test_private(self):
+
+        self.intercept(methods=True, public=False)
+
+        instance = self.cls()
+        instance.a()
+        instance._c()
+
+        self.assertEqual(self.count, 2)
+
+    def test_regex(self):
+
+        self.intercept(methods='a')
+
+        instance = self.cls()
+        instance.a()
+        instance.b()
+
+        self.assertEqual(self.count, 1)
+
+    def test_function(self):
+
+        self.intercept(methods=lambda name: name == 'b')
+
+        instance = self.cls()
+        instance.a()
+        instance.b()
+
+        self.assertEqual(self.count, 1)
+
+    def test_get_annotations(self):
+
+        self.intercept(methods='a')
+
+        # routines are searched in classes once such annotation is bound
+        self.assertTrue(Annotation._CLASS_MEMBERS)
+
+        instance = self.cls()
+
+        self.assertEqual(
+            Interceptor.get_annotations(instance.a), [self.interceptor]
+        )
+        self.assertEqual(
+            Interceptor.get_annotations(self.cls.a, ctx=self.cls),
+            [self.interceptor]
+        )
+        self.assertEqual(Interceptor.get_annotations(instance.b), [])
+        self.assertEqual(Interceptor.get_annotations(self.cls), [
+            self.interceptor
+        ])
+
+    def test_remove(self):
+
+        self.intercept(methods=True)
+
+        self.interceptor.remove_from(self.cls)
+
+        self.cls().a()
+
+        self.assertEqual(self.count, 0)
+
+
+class ExecutionContextTest(UTCase):
+    """Test the ExecutionContext."""
+
+    def setUp(self):
+
+        self.context = ExecutionContext(capacity=1)
+
+    def test_items(self):
+
+        self.context['a'] = 1
+        self.context['b'] = 2
+        self.context['a'] = 3
+
+        self.assertEqual(self.context, {'a': 3, 'b': 2})
+        self.assertEqual(len(self.context), 2)
+        self.assertIn('a', self.context)
+        self.assertEqual(self.context.get('c', 4), 4)
+        self.assertRaises(KeyError, self.context.__getitem__, 'c')
+
+        del self.context['a']
+
+        self.assertEqual(self.context, {'b': 2})
+        self.assertEqual(self.context.pop('b'), 2)
+        self.assertEqual(self.context.pop('b', None), None)
+        self.assertEqual(len(self.context), 0)
+
+    def test_copy(self):
+
+        self.context.update({'a': 1}, b=2)
+
+        copy = self.context.copy()
+
+        self.context.clear()
+
+        self.assertEqual(copy, {'a': 1, 'b': 2})
+        self.assertEqual(self.context, {})
+        self.assertEqual(self.context._values, [None, None])
+
+
+class InterceptionJoinpointTest(UTCase):
+    """Test the InterceptionJoinpoint."""
+
+    def test_joinpoint(self):
+
+        contexts = []
+
+        def interception(joinpoint):
+            self.assertIsInstance(joinpoint, InterceptionJoinpoint)
+            contexts.append(joinpoint.exec_ctx)
+            return joinpoint.proceed()
+
+        @Interceptor(interception=interception)
+        def func():
+            pass
+
+        func()
+        func()
+
+        self.assertIs(contexts[0], contexts[1])
+        self.assertEqual(len(contexts[0]), 0)
+
+    def test_recursion(self):
+
+        results = []
+
+        def interception(joinpoint):
+            value = joinpoint.kwargs['value']
+            joinpoint.exec_ctx['value'] = value
+            result = joinpoint.proceed()
+            results.append((value, joinpoint.exec_ctx['value']))
+            return result
+
+        @Interceptor(interception=interception)
+        def func(value):
+            return func(value - 1) + 1 if value else 0
+
+        self.assertEqual(func(2), 2)
+        self.assertEqual(results, [(0, 0), (1, 1), (2, 2)])
+
+    def test_recursion_args(self):
+
+        calls = []
+
+        def interception(joinpoint):
+            joinpoint.proceed()
+            return joinpoint.proceed()  # proceeds again after recursion
+
+        @Interceptor(interception=interception)
+        def func(value):
+            calls.append(value)
+            return func(value - 1) + 1 if value else 0
+
+        self.assertEqual(func(1), 1)
+        self.assertEqual(calls, [1, 0, 0, 1, 0, 0])
+
+    def test_threads(self):
+
+        errors = []
+
+        @Interceptor(interception=lambda joinpoint: joinpoint.proceed())
+        def func(value):
+            return value
+
+        def run(value):
+            for _ in range(1000):
+                if func(value) != value:
+                    errors.append(value)
+
+        threads = [Thread(target=run, args=(value,)) for value in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+
+class GeneratorInterceptionTest(UTCase):
+    """Test item and end interceptions on generator results."""
+
+    def setUp(self):
+
+        self.items = []
+        self.ends = []
+
+        def item_interception(stream, item):
+            self.items.append((stream.count, item))
+            return item * 2
+
+        def end_interception(stream):
+            self.ends.append(stream.count)
+
+        self.interceptor = Interceptor(
+            interception=lambda joinpoint: joinpoint.proceed(),
+            item_interception=item_interception,
+            end_interception=end_interception
+        )
+
+        def gen(count):
+            for item in range(count):
+                yield item
+
+        self.gen = self.interceptor(gen)
+
+    def tearDown(self):
+
+        self.interceptor.__del__()
+        del self.interceptor
+
+    def test_lazy(self):
+
+        result = self.gen(3)
+
+        self.assertIsInstance(result, InterceptedGenerator)
+        self.assertEqual(self.items, [])
+
+        self.assertEqual(next(result), 0)
+        self.assertEqual(self.items, [(1, 0)])
+        self.assertEqual(self.ends, [])
+
+        self.assertEqual(list(result), [2, 4])
+        self.assertEqual(self.items, [(1, 0), (2, 1), (3, 2)])
+        self.assertEqual(self.ends, [3])
+
+    def test_close(self):
+
+        result = self.gen(3)
+        next(result)
+        result.close()
+
+        self.assertEqual(self.ends, [1])
+
+        result.close()
+
+        self.assertEqual(self.ends, [1])
+
+    def test_collected(self):
+
+        result = self.gen(3)
+        next(result)
+
+        del result
+        collect()
+
+        self.assertEqual(self.ends, [1])
+
+    def test_not_generator(self):
+
+        @self.interceptor
+        def func():
+            return [1, 2]
+
+        self.assertEqual(func(), [1, 2])
+        self.assertEqual(self.items, [])
+
+    def test_nested(self):
+
+        self.interceptor(self.gen)
+
+        self.assertEqual(list(self.gen(2)), [0, 4])
+        self.assertEqual(self.ends, [2, 2])
+
+    def test_disable(self):
+
+        self.interceptor.enable = False
+
+        result = self.gen(2)
+
+        self.assertNotIsInstance(result, InterceptedGenerator)
+        self.assertEqual(list(result), [0, 1])
+
+
+@skipIf(agen is None, 'asynchronous generators require python >= 3.6')
+class AsyncGeneratorInterceptionTest(UTCase):
+    """Test item and end interceptions on asynchronous generator results."""
+
+    def setUp(self):
+
+        self.log = []
+
+        def item_interception(stream, item):
+            return item * 2
+
+        def end_interception(stream):
+            self.log.append(('end', stream.count))
+
+        self.interceptor = Interceptor(
+            interception=lambda joinpoint: joinpoint.proceed(),
+            item_interception=item_interception,
+            end_interception=end_interception
+        )
+
+        self.gen = self.interceptor(agen)
+
+        self.loop = new_event_loop()
+        set_event_loop(self.loop)
+
+    def tearDown(self):
+
+        set_event_loop(None)
+        self.loop.close()
+
+        self.interceptor.__del__()
+        del self.interceptor
+
+    def _stream(self, count):
+        """Get an intercepted asynchronous generator of count items."""
+
+        result = self.gen(count, self.log)
+
+        self.assertIsInstance(result, InterceptedAsyncGenerator)
+
+        return result
+
+    def _run(self, awaitable):
+
+        return self.loop.run_until_complete(awaitable)
+
+    def test_anext(self):
+
+        stream = self._stream(2)
+
+        self.assertEqual(self._run(stream.__anext__()), 0)
+        self.assertEqual(self._run(stream.__anext__()), 2)
+        self.assertEqual(self.log, [])
+
+        self.assertRaises(
+            StopAsyncIteration, self._run, stream.__anext__()
+        )
+        self.assertEqual(self.log, ['closed', ('end', 2)])
+
+    def test_asend(self):
+
+        stream = self._stream(2)
+
+        self.assertEqual(self._run(stream.asend(None)), 0)
+        self.assertEqual(self._run(stream.asend('a')), 2)
+        self.assertEqual(self.log, ['a'])
+
+        self.assertRaises(StopAsyncIteration, self._run, stream.asend('b'))
+        self.assertEqual(self.log, ['a', 'b', 'closed', ('end', 2)])
+
+    def test_athrow(self):
+
+        stream = self._stream(2)
+
+        self._run(stream.__anext__())
+
+        # the item yielded by the generator on error is intercepted
+        self.assertEqual(self._run(stream.athrow(ValueError())), -2)
+        self.assertEqual(self.log, ['thrown'])
+
+        self.assertRaises(KeyError, self._run, stream.athrow(KeyError()))
+        self.assertEqual(self.log, ['thrown', 'closed', ('end', 2)])
+
+    def test_aclose(self):
+
+        stream = self._stream(2)
+
+        self._run(stream.__anext__())
+
+        closing = stream.aclose()
+
+        self.assertEqual(self.log, [])
+
+        self._run(closing)
+
+        # the end interception is applied once the generator is closed
+        self.assertEqual(self.log, ['closed', ('end', 1)])
+
+        self._run(stream.aclose())
+
+        self.assertEqual(self.log, ['closed', ('end', 1)])
+
+    def test_not_iterable(self):
+
+        stream = self._stream(1)
+
+        self.assertRaises(TypeError, iter, stream)
+        self.assertRaises(TypeError, stream.send, None)
+        self.assertRaises(TypeError, stream.close)
+
+        self._run(stream.aclose())
+
+
 if __name__ == '__main__':
     main()